@@ -0,0 +1,32 @@
+"""
+The asyncio scenarios of :mod:`benchmarks.bench_client`, kept apart as they
+need Python 3.5 or later.
+"""
+import asyncio
+
+from fixerio.aio import AsyncFixerio
+
+from .bench_client import timer
+
+
+async def _timed(coroutine):
+    start = timer()
+    await coroutine
+    return timer() - start
+
+
+async def _concurrent(url, options, dates):
+    async with AsyncFixerio('bench', concurrency=options.concurrency,
+                            limit_per_host=options.concurrency) as fxrio:
+        fxrio.base_url = url
+        return await asyncio.gather(*[_timed(fxrio.historical_rates(date))
+                                      for date in dates])
+
+
+def concurrent(url, options, dates):
+    """ Historical rates of `dates`, as concurrent asyncio tasks. """
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(_concurrent(url, options, dates))
+    finally:
+        loop.close()
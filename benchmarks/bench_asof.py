@@ -0,0 +1,60 @@
+"""
+Lookups of the rates in force at random times over twenty years of daily
+history, one at a time and vectorized. It requires NumPy.
+
+Run it with ``python -m benchmarks.bench_asof``.
+"""
+from __future__ import division, print_function, unicode_literals
+
+import datetime
+import random
+import timeit
+
+from fixerio.columnar import CurrencyIndex, RateMatrix, np
+from fixerio.currencies import CURRENCIES
+from fixerio.dates import date_range
+
+START = datetime.date(1999, 1, 4)
+END = datetime.date(2018, 12, 31)
+LOOKUPS = 1000000
+NUMBER = 5
+
+
+def history():
+    """ Returns a matrix of random rates of every business day. """
+    matrix = RateMatrix(CurrencyIndex())
+    for day in date_range(START, END, skip_weekends=True, skip_holidays=True):
+        matrix.append(day, dict((code, random.uniform(0.0001, 30000))
+                                for code in CURRENCIES))
+    return matrix
+
+
+def report(name, seconds, lookups):
+    print('{0:<28} {1:10.3f} ms {2:14,.0f} lookups/s'.format(
+        name, seconds * 1000, lookups / seconds))
+
+
+def main():
+    matrix = history()
+    seconds = timeit.timeit(matrix.as_of, number=1)
+    as_of = matrix.as_of()
+    print('history: {0} business days, {1} currencies, indexed in '
+          '{2:.1f} ms'.format(len(matrix), len(CURRENCIES), seconds * 1000))
+
+    first = (START - datetime.date(1970, 1, 1)).days * 86400
+    last = (END - datetime.date(1970, 1, 1)).days * 86400
+    times = np.random.uniform(first, last, LOOKUPS)
+
+    scalars = times[:10000].tolist()
+    seconds = timeit.timeit(
+        lambda: [as_of.rate_as_of(when, 'USD') for when in scalars],
+        number=NUMBER) / NUMBER
+    report('rate_as_of', seconds, len(scalars))
+
+    seconds = timeit.timeit(lambda: as_of.rates_as_of(times, 'USD'),
+                            number=NUMBER) / NUMBER
+    report('rates_as_of', seconds, LOOKUPS)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+"""
+Latency, throughput and memory of the clients in typical usages, against the
+local stub server.
+
+Run it with ``python -m benchmarks.bench_client``. Save the results with
+``--save baseline.json`` and check a later run against them with
+``--compare baseline.json``, which exits with status 1 if any scenario
+regressed beyond ``--tolerance``.
+"""
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+import datetime
+import gc
+import json
+import math
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from fixerio.cache import RateCache
+from fixerio.client import Fixerio
+from fixerio.currencies import CURRENCIES
+
+from . import server
+
+try:
+    import tracemalloc
+except ImportError:  # For Python 2
+    tracemalloc = None
+
+timer = getattr(time, 'perf_counter', time.time)
+
+START_DATE = datetime.date(2000, 1, 3)
+CACHED_DATES = 10
+RANGE_DAYS = 30
+MIN_DELTA_MS = 1.0
+
+
+def dates(count, start=START_DATE):
+    """ Returns `count` consecutive dates in ISO 8601 format. """
+    return [(start + datetime.timedelta(days=i)).isoformat()
+            for i in range(count)]
+
+
+def percentile(values, percent):
+    """ Returns the nearest-rank percentile of `values`. """
+    values = sorted(values)
+    rank = int(math.ceil(percent / 100 * len(values)))
+    return values[max(0, rank - 1)]
+
+
+def timed(function, *args):
+    """ Calls `function` and returns how long it took in seconds. """
+    start = timer()
+    function(*args)
+    return timer() - start
+
+
+def client(url, **kwargs):
+    fxrio = Fixerio('bench', **kwargs)
+    fxrio.base_url = url
+    return fxrio
+
+
+def sequential(url, options):
+    """ Historical rates of distinct dates, one after another. """
+    with client(url) as fxrio:
+        return [timed(fxrio.historical_rates, date)
+                for date in dates(options.calls)]
+
+
+def threaded(url, options):
+    """ Historical rates of distinct dates, from a pool of threads sharing a
+    client. """
+    with client(url, pool_maxsize=options.concurrency) as fxrio:
+        with ThreadPoolExecutor(options.concurrency) as executor:
+            return list(executor.map(
+                lambda date: timed(fxrio.historical_rates, date),
+                dates(options.calls)))
+
+
+def cached(url, options):
+    """ Historical rates of a few dates, served from the cache once they
+    were requested. """
+    with client(url, cache=RateCache()) as fxrio:
+        recent = dates(CACHED_DATES)
+        return [timed(fxrio.historical_rates, recent[i % CACHED_DATES],
+                      ['USD', 'GBP'])
+                for i in range(options.calls)]
+
+
+def bulk_range(url, options):
+    """ Historical rates of consecutive ranges of days, requested in
+    parallel. """
+    days = dates(max(1, options.calls // RANGE_DAYS) * RANGE_DAYS)
+    with client(url, pool_maxsize=options.concurrency) as fxrio:
+        def fetch(period):
+            for _ in fxrio.historical_rates_range(
+                    period[0], period[-1], workers=options.concurrency):
+                pass
+
+        return [timed(fetch, days[i:i + RANGE_DAYS])
+                for i in range(0, len(days), RANGE_DAYS)]
+
+
+def concurrent(url, options):
+    """ Historical rates of distinct dates, as concurrent asyncio tasks.
+    Every task starts at once, so latencies include the time spent waiting
+    for one of the `concurrency` slots. """
+    from .aio_scenarios import concurrent as run
+    return run(url, options, dates(options.calls))
+
+
+SCENARIOS = OrderedDict([
+    ('sequential', sequential),
+    ('threaded', threaded),
+    ('async', concurrent),
+    ('cached', cached),
+    ('range', bulk_range),
+])
+
+
+def available(name):
+    if name != 'async':
+        return True
+    try:
+        import aiohttp  # noqa: F401
+    except ImportError:
+        return False
+    return sys.version_info >= (3, 5)
+
+
+def run(name, url, stub, options):
+    """ Runs a scenario, then runs it again tracing memory allocations.
+
+    :return: the statistics of the scenario.
+    :rtype: dict
+    """
+    scenario = SCENARIOS[name]
+    gc.collect()
+    requests = stub.requests
+    start = timer()
+    latencies = scenario(url, options)
+    elapsed = timer() - start
+    requests = stub.requests - requests
+
+    peak = None
+    if tracemalloc is not None:
+        gc.collect()
+        tracemalloc.start()
+        scenario(url, options)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return OrderedDict([
+        ('calls', len(latencies)),
+        ('requests', requests),
+        ('p50_ms', percentile(latencies, 50) * 1000),
+        ('p99_ms', percentile(latencies, 99) * 1000),
+        ('calls_per_s', len(latencies) / elapsed),
+        ('requests_per_s', requests / elapsed),
+        ('peak_kib', None if peak is None else peak / 1024),
+    ])
+
+
+def report(results):
+    print('{0:<11}{1:>7}{2:>7}{3:>10}{4:>10}{5:>10}{6:>10}{7:>11}'.format(
+        'scenario', 'calls', 'http', 'p50 ms', 'p99 ms', 'calls/s', 'req/s',
+        'peak KiB'))
+    for name, stats in results.items():
+        peak = stats['peak_kib']
+        print('{0:<11}{1:>7}{2:>7}{3:>10.3f}{4:>10.3f}{5:>10.0f}{6:>10.0f}'
+              '{7:>11}'.format(name, stats['calls'], stats['requests'],
+                               stats['p50_ms'], stats['p99_ms'],
+                               stats['calls_per_s'], stats['requests_per_s'],
+                               '-' if peak is None else
+                               '{0:.0f}'.format(peak)))
+
+
+def regressions(results, baseline, tolerance, min_delta_ms=MIN_DELTA_MS):
+    """ Compares results with a baseline.
+
+    Latencies are only compared when they differ by more than
+    `min_delta_ms`, as sub-millisecond ones are mostly noise.
+
+    :return: a description of each regression.
+    :rtype: list
+    """
+    found = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for key, floor in (('p50_ms', min_delta_ms),
+                           ('p99_ms', min_delta_ms), ('peak_kib', 0)):
+            if (stats[key] is not None and base.get(key) and
+                    stats[key] > base[key] * (1 + tolerance) and
+                    stats[key] - base[key] > floor):
+                found.append('{0}: {1} {2:.3f} > {3:.3f}'.format(
+                    name, key, stats[key], base[key]))
+        if stats['calls_per_s'] < base['calls_per_s'] / (1 + tolerance):
+            found.append('{0}: calls_per_s {1:.0f} < {2:.0f}'.format(
+                name, stats['calls_per_s'], base['calls_per_s']))
+    return found
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                        help='scenarios to run, among {0}; all by '
+                             'default'.format(', '.join(SCENARIOS)))
+    parser.add_argument('--calls', type=int, default=300,
+                        help='calls per scenario')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='threads, tasks or range workers')
+    parser.add_argument('--latency', type=float, default=0.002,
+                        help='seconds the server waits before answering')
+    parser.add_argument('--currencies', type=int, default=len(CURRENCIES),
+                        help='currencies in each payload')
+    parser.add_argument('--save', metavar='PATH',
+                        help='write the results as JSON')
+    parser.add_argument('--compare', metavar='PATH',
+                        help='compare the results with saved ones')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='relative slowdown tolerated by --compare')
+    parser.add_argument('--min-delta-ms', type=float, default=MIN_DELTA_MS,
+                        help='latency difference ignored by --compare')
+    options = parser.parse_args(args)
+
+    unknown = set(options.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error('unknown scenarios: {0}'.format(', '.join(unknown)))
+    return options
+
+
+def main(args=None):
+    options = parse_args(args)
+    names = [name for name in options.scenarios or SCENARIOS
+             if available(name)]
+
+    stub, url = server.start(latency=options.latency,
+                             currencies=options.currencies)
+    try:
+        results = OrderedDict((name, run(name, url, stub, options))
+                              for name in names)
+    finally:
+        stub.shutdown()
+
+    report(results)
+    if options.save:
+        with open(options.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if options.compare:
+        with open(options.compare) as f:
+            found = regressions(results, json.load(f), options.tolerance,
+                                options.min_delta_ms)
+        for regression in found:
+            print('REGRESSION ' + regression, file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,97 @@
+"""
+Decoding cost of a realistic 170-currency latest rates payload with the
+standard library and ``orjson``, and the memory held by its rates as dicts
+and as ``RateSnapshot`` objects.
+
+Snapshots are built from the decoded dict, so they only save memory: the
+timings show what building and reading them costs on top of the dict.
+
+Run it with ``python -m benchmarks.bench_decode``.
+"""
+from __future__ import print_function, unicode_literals
+
+import json
+import random
+import sys
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:  # For Python 2
+    tracemalloc = None
+
+from fixerio import decoding
+from fixerio.currencies import CURRENCIES
+from fixerio.decoding import RateSnapshot
+
+NUMBER = 5000
+#: Responses held at once to measure their memory.
+HELD = 1000
+
+
+def payload(codes=CURRENCIES):
+    """ Returns a latest rates payload with a rate for each of `codes`. """
+    rates = dict((code, round(random.uniform(0.0001, 30000), 6))
+                 for code in codes)
+    return json.dumps({'success': True, 'timestamp': 1527847508,
+                       'base': 'EUR', 'date': '2018-06-01',
+                       'rates': rates}).encode('utf-8')
+
+
+def measure(function, number=NUMBER):
+    """ Returns the mean time of `function` in microseconds. """
+    return timeit.timeit(function, number=number) / number * 10 ** 6
+
+
+def held(function, data, number=HELD):
+    """ Returns the bytes held by each of `number` results of `function`
+    called on `data`. """
+    tracemalloc.start()
+    try:
+        results = [function(data) for _ in range(number)]
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return size // len(results)
+
+
+def report(name, micros):
+    print('{0:<34} {1:8.2f} us'.format(name, micros))
+
+
+def main():
+    data = payload()
+    print('payload: {0} currencies, {1} bytes'.format(
+        len(CURRENCIES), len(data)))
+
+    text = data.decode('utf-8')
+    report('json.loads', measure(lambda: json.loads(text)))
+    if decoding.orjson is not None:
+        report('orjson.loads', measure(lambda: decoding.orjson.loads(data)))
+    else:
+        print('orjson is not installed', file=sys.stderr)
+
+    report('loads -> dict', measure(lambda: decoding.loads(data)))
+    report('loads -> RateSnapshot', measure(
+        lambda: RateSnapshot.from_response(decoding.loads(data))))
+
+    response = decoding.loads(data)
+    snapshot = RateSnapshot.from_response(response)
+    report('dict: read every rate', measure(
+        lambda: [response['rates'][code] for code in CURRENCIES]))
+    report('RateSnapshot: read every rate', measure(
+        lambda: [snapshot[code] for code in CURRENCIES]))
+    report('RateSnapshot: values array', measure(lambda: snapshot.values))
+
+    if tracemalloc is None:
+        print('tracemalloc is unavailable', file=sys.stderr)
+        return
+    print('memory held per response: dict {0} bytes, RateSnapshot {1} '
+          'bytes'.format(
+              held(decoding.loads, data),
+              held(lambda d: RateSnapshot.from_response(decoding.loads(d)),
+                   data)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Time taken by ``import fixerio`` in a fresh interpreter, from the output of
+``python -X importtime``, which requires Python 3.7 or later.
+
+Run it with ``python -m benchmarks.bench_import``. It exits with status 1 if
+the median import time exceeds ``--budget-ms``, or if the import loads any
+dependency that should only load on first use.
+"""
+from __future__ import division, print_function, unicode_literals
+
+import argparse
+import subprocess
+import sys
+
+#: Dependencies that must not load on import.
+DEFERRED = ('requests', 'urllib3', 'aiohttp', 'numpy', 'pandas', 'pyarrow',
+            'prometheus_client', 'opentelemetry')
+
+BUDGET_MS = 75.0
+RUNS = 7
+TOP = 10
+
+
+def import_times(module):
+    """ Imports `module` in a fresh interpreter.
+
+    :return: the self and cumulative microseconds of each module imported,
+             by name.
+    :rtype: dict
+    """
+    process = subprocess.Popen(
+        [sys.executable, '-X', 'importtime', '-c',
+         'import {0}'.format(module)],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    _, stderr = process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(stderr.decode('utf-8', 'replace'))
+
+    times = {}
+    for line in stderr.decode('utf-8').splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2
+
+
+def parse_args(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--module', default='fixerio',
+                        help='the module to import')
+    parser.add_argument('--runs', type=int, default=RUNS,
+                        help='imports to take the median of')
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS,
+                        help='the longest median import time allowed')
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    options = parse_args(args)
+    if sys.version_info < (3, 7):
+        print('-X importtime requires Python 3.7 or later', file=sys.stderr)
+        return 2
+
+    runs = [import_times(options.module) for _ in range(options.runs)]
+    total_ms = median([times[options.module][1] for times in runs]) / 1000
+
+    last = runs[-1]
+    print('{0:<40}{1:>10}{2:>14}'.format('module', 'self ms',
+                                         'cumulative ms'))
+    heaviest = sorted(last, key=lambda name: last[name][0], reverse=True)
+    for name in heaviest[:TOP]:
+        own, cumulative = last[name]
+        print('{0:<40}{1:>10.1f}{2:>14.1f}'.format(
+            name, own / 1000, cumulative / 1000))
+    print('import {0}: {1:.1f} ms (median of {2}), budget {3:.1f} ms'.format(
+        options.module, total_ms, options.runs, options.budget_ms))
+
+    failures = []
+    if total_ms > options.budget_ms:
+        failures.append('import takes {0:.1f} ms'.format(total_ms))
+    eager = sorted(name for name in last if name in DEFERRED)
+    if eager:
+        failures.append('imports {0}'.format(', '.join(eager)))
+    for failure in failures:
+        print('OVER BUDGET ' + failure, file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""
+Per-call latency of ``Fixerio.latest()`` with a fresh connection per call
+(the module-level ``requests.get``) against the pooled client session.
+
+Run it with ``python -m benchmarks.bench_session``.
+"""
+from __future__ import print_function, unicode_literals
+
+import timeit
+
+import requests
+
+from fixerio.client import Fixerio
+
+from . import server
+
+CALLS = 500
+
+
+class UnpooledSession(object):
+    """ Sends each request through ``requests.get``, as the client used to. """
+
+    def get(self, url, **kwargs):
+        return requests.get(url, **kwargs)
+
+    def close(self):
+        pass
+
+
+def measure(client, calls=CALLS):
+    """ Returns the mean latency of ``client.latest()`` in milliseconds. """
+    client.latest()  # Warm up.
+    elapsed = timeit.timeit(client.latest, number=calls)
+    return elapsed / calls * 1000
+
+
+def main():
+    stub, url = server.start()
+    Fixerio.base_url = url
+    try:
+        before = measure(Fixerio('bench', session=UnpooledSession()))
+        with Fixerio('bench') as pooled:
+            after = measure(pooled)
+    finally:
+        stub.shutdown()
+
+    print('requests.get    {0:8.3f} ms/call'.format(before))
+    print('pooled session  {0:8.3f} ms/call'.format(after))
+    print('speedup         {0:8.2f}x'.format(before / after))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+"""
+A local stub of the Fixer API used by the benchmarks.
+
+It answers the ``latest`` and ``/{date}`` endpoints with rates for a
+configurable number of currencies, after a configurable latency. Run it
+standalone with ``python -m benchmarks.server [--latency 0.05]``.
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import json
+import re
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import parse_qs, urlparse
+except ImportError:  # For Python 2
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import parse_qs, urlparse
+
+from fixerio.currencies import CURRENCIES
+
+TIMESTAMP = 1527847508
+LATEST_DATE = '2018-06-01'
+
+_DATE_PATH = re.compile(r'/(\d{4}-\d{2}-\d{2})$')
+
+
+def rates(codes=CURRENCIES, date=LATEST_DATE):
+    """ Returns made up but stable rates of `codes` on `date`. """
+    seed = sum(ord(c) for c in date)
+    return dict((code, round(1 + (seed * (i + 7)) % 9973 / 97.0, 6))
+                for i, code in enumerate(codes))
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """ Answers GET requests with rates payloads over HTTP/1.1. """
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; without this, Nagle's
+    # algorithm delays every response on a kept-alive connection.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.endswith('/latest'):
+            date = LATEST_DATE
+        else:
+            match = _DATE_PATH.search(url.path)
+            if match is None:
+                return self._reply(404, {'success': False,
+                                         'error': {'code': 404}})
+            date = match.group(1)
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.server.count()
+
+        codes = self.server.codes
+        symbols = parse_qs(url.query).get('symbols')
+        if symbols:
+            codes = [code for code in symbols[0].split(',') if code in codes]
+
+        self._reply(200, {'success': True, 'timestamp': TIMESTAMP,
+                          'historical': date != LATEST_DATE, 'base': 'EUR',
+                          'date': date, 'rates': rates(codes, date)})
+
+    def _reply(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, latency=0, currencies=len(CURRENCIES)):
+        HTTPServer.__init__(self, address, StubHandler)
+        self.latency = latency
+        self.codes = CURRENCIES[:currencies]
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+
+def start(host='127.0.0.1', port=0, latency=0, currencies=len(CURRENCIES)):
+    """ Starts the stub server in a background thread.
+
+    :param latency: seconds to wait before answering each request.
+    :type latency: float
+    :param currencies: number of currencies in each payload, at most
+                       ``len(CURRENCIES)``.
+    :type currencies: int
+    :return: the running server and its base URL.
+    :rtype: tuple
+    """
+    server = StubServer((host, port), latency=latency, currencies=currencies)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    return server, 'http://{0}:{1}/api/'.format(*server.server_address)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--currencies', type=int, default=len(CURRENCIES))
+    args = parser.parse_args()
+
+    server, url = start(port=args.port, latency=args.latency,
+                        currencies=args.currencies)
+    print('Serving on {0}'.format(url))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,18 @@
 from __future__ import unicode_literals
 
+import sys
+
 from .client import Fixerio  # noqa
 
+if sys.version_info >= (3, 7):
+    def __getattr__(name):
+        # Defers importing aiohttp until the asyncio client is used.
+        if name == 'AsyncFixerio':
+            from .aio import AsyncFixerio  # noqa
+            return AsyncFixerio
+        raise AttributeError(
+            'module {0!r} has no attribute {1!r}'.format(__name__, name))
+elif sys.version_info >= (3, 5):
+    from .aio import AsyncFixerio  # noqa
+
 __version__ = '1.0.0-alpha'
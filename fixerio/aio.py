@@ -0,0 +1,741 @@
+"""
+An asyncio client for Fixer.io, built on ``aiohttp``.
+
+This module requires Python 3.5 or later.
+"""
+import asyncio
+import copy
+import functools
+import time
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from .batching import DEFAULT_WINDOW
+from .cache import HISTORICAL, LATEST, SharedCache, _copy
+from .client import LATEST_PATH, BaseFixerio, _iso_date
+from .conditional import NOT_MODIFIED
+from .decoding import DICT
+from .exceptions import (CircuitOpenError, FixerioException,
+                         RateLimitExceeded)
+from .instrumentation import REQUEST, REQUEST_ERROR, RETRY, timer
+from .refresh import BaseRefresher, logger
+from .singleflight import flight_key
+from .symbols import SymbolSet
+
+DEFAULT_LIMIT = 100
+DEFAULT_LIMIT_PER_HOST = 10
+DEFAULT_CONCURRENCY = 20
+
+if aiohttp is not None:
+    _ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
+    _TRANSIENT_ERRORS = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+else:
+    _ERRORS = _TRANSIENT_ERRORS = (asyncio.TimeoutError,)
+
+
+def _unavailable(ex):
+    """ Whether a request failed as Fixer.io could not be reached or
+    failed itself, rather than for being wrong. """
+    return (isinstance(ex, _TRANSIENT_ERRORS) or
+            (getattr(ex, 'status', None) or 0) >= 500)
+
+
+def _phase_hooks(phase):
+    """ Creates tracing callbacks timing a phase of requests into the dict
+    passed as their ``trace_request_ctx``. """
+    async def start(session, context, params):
+        if context.trace_request_ctx is not None:
+            context.trace_request_ctx[phase + '_start'] = timer()
+
+    async def end(session, context, params):
+        timings = context.trace_request_ctx
+        if timings is not None and phase + '_start' in timings:
+            timings[phase] = timer() - timings.pop(phase + '_start')
+
+    return start, end
+
+
+def _trace_config():
+    """ Creates a trace config timing the DNS resolution, and the set-up of
+    new connections including it. """
+    config = aiohttp.TraceConfig()
+    for phase, on_start, on_end in (
+            ('dns', config.on_dns_resolvehost_start,
+             config.on_dns_resolvehost_end),
+            ('connect', config.on_connection_create_start,
+             config.on_connection_create_end)):
+        start, end = _phase_hooks(phase)
+        on_start.append(start)
+        on_end.append(end)
+
+    return config
+
+
+class _Call(object):
+    """ A coroutine call running in its own task, awaited by every caller
+    sharing it, so that cancelling one of them leaves the others waiting.
+    The task is cancelled once every caller is, and the last caller waits
+    for it to wind down, so nothing of the call outlives its callers. """
+
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, coroutine):
+        self.task = asyncio.ensure_future(coroutine)
+        self.waiters = 0
+
+    async def wait(self):
+        """ Awaits the result of the call. """
+        self.waiters += 1
+        try:
+            return await asyncio.shield(self.task)
+        finally:
+            self.waiters -= 1
+            if not self.waiters and not self.task.done():
+                self.task.cancel()
+                await asyncio.wait([self.task])
+
+
+class AsyncSingleFlight(object):
+    """ Coalesces concurrent coroutine calls with the same key.
+
+    While a call is in flight, further calls with its key await it and share
+    its result instead of making their own.
+    """
+
+    def __init__(self):
+        self._calls = {}
+
+    def __len__(self):
+        return len(self._calls)
+
+    async def do(self, key, function, *args, **kwargs):
+        """ Awaits `function`, unless a call with `key` is in flight.
+
+        :param key: a hashable key identifying the call.
+        :param function: the coroutine function to await.
+        :type function: callable
+        :return: what `function` returns. Calls which joined another one get
+                 a deep copy of it, so callers never share mutable results.
+        :raises: what `function` raises.
+        """
+        call = self._calls.get(key)
+        if call is not None:
+            return copy.deepcopy(await call.wait())
+
+        call = self._calls[key] = _Call(function(*args, **kwargs))
+        call.task.add_done_callback(lambda _: self._forget(key, call))
+        return await call.wait()
+
+    def _forget(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+class AsyncBatcher(object):
+    """ Merges coroutine calls for some symbols into a single call for all
+    of them.
+
+    See :class:`fixerio.batching.Batcher`.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW):
+        self.window = window
+
+        self.calls = 0
+        self.batches = 0
+
+        self._batches = {}
+
+    def __len__(self):
+        return len(self._batches)
+
+    async def do(self, key, symbols, function, *args, **kwargs):
+        """ Awaits `function` for `symbols` and the symbols of the calls
+        joining it, unless a batch with `key` is open.
+
+        :param key: a hashable key identifying the batch.
+        :param symbols: the currency symbols of the call.
+        :type symbols: fixerio.symbols.SymbolSet
+        :param function: the coroutine function to await, with the union of
+                         the symbols as its ``symbols`` keyword argument.
+        :type function: callable
+        :return: a copy of the response, with the rates of `symbols` only.
+        :rtype: dict
+        :raises: what `function` raises.
+        """
+        self.calls += 1
+        batch = self._batches.get(key)
+        if batch is not None:
+            batch[0].update(symbols)
+            return _copy(await batch[1].wait(), symbols)
+
+        self.batches += 1
+        codes = set(symbols)
+        call = _Call(self._run(key, codes, function, args, kwargs))
+        call.task.add_done_callback(lambda _: self._close(key, codes))
+        self._batches[key] = codes, call
+
+        return _copy(await call.wait(), symbols)
+
+    async def _run(self, key, codes, function, args, kwargs):
+        """ Closes the batch once the window is over, and awaits `function`
+        for the symbols of every call in it. """
+        try:
+            await asyncio.sleep(self.window)
+        finally:
+            self._close(key, codes)
+        return await function(*args, symbols=SymbolSet(codes), **kwargs)
+
+    def _close(self, key, codes):
+        batch = self._batches.get(key)
+        if batch is not None and batch[0] is codes:
+            del self._batches[key]
+
+
+class AsyncRefresher(BaseRefresher):
+    """ Refreshes the latest rates of a :class:`AsyncFixerio` client in an
+    asyncio task. """
+
+    def __init__(self, *args, **kwargs):
+        super(AsyncRefresher, self).__init__(*args, **kwargs)
+        self._task = None
+
+    async def refresh(self):
+        """ Fetches the latest rates and swaps them in.
+
+        :raises FixerioException: if any error making a request.
+        """
+        self._swap(await self.client._refresh(LATEST, self.symbols))
+
+    async def start(self, wait=True):
+        """ Starts refreshing in a task of the running event loop.
+
+        :param wait: whether to fetch the rates before returning, so the
+                     first reads are served from the snapshot too.
+        :type wait: bool
+        """
+        if wait:
+            await self.refresh()
+
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """ Stops refreshing, cancelling a refresh in progress and waiting
+        for its request to be cancelled as well. """
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self):
+        delay = self.next_refresh_at() - self.clock()
+        while True:
+            await asyncio.sleep(max(0, delay))
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except BaseException:
+                self.failures += 1
+                logger.exception('Failed to refresh the latest rates')
+                delay = self.retry_interval
+            else:
+                delay = self.next_refresh_at() - self.clock()
+
+
+class AsyncFixerio(BaseFixerio):
+    """ An asyncio client for Fixer.io.
+
+    Every request goes through a shared pool of connections, and at most
+    `concurrency` requests are in flight at once, so many lookups may be
+    gathered on a single event loop.
+
+    Shared caches, historical stores and quota files are read and written
+    in the default executor of the loop, as their I/O would block it.
+    """
+
+    def __init__(self, access_key, symbols=None, base=None, session=None,
+                 limit=DEFAULT_LIMIT, limit_per_host=DEFAULT_LIMIT_PER_HOST,
+                 concurrency=DEFAULT_CONCURRENCY, keep_alive=True,
+                 timeout=None, cache=None, store=None, coalesce=True,
+                 rate_limiter=None, retry=None, circuit_breaker=None,
+                 result_type=DICT, conditional=True, instrumentation=None,
+                 snapshot=None, batch_window=None):
+        """
+        :param access_key: your API Key.
+        :type access_key: str or unicode
+        :param symbols: currency symbols to request specific exchange rates.
+        :type symbols: list or tuple
+        :param base: the base currency to request rates against. The Free
+                     Plan only supports EUR, the default.
+        :type base: str or unicode
+        :param session: a session to send requests with. If it is not
+                        passed, the client creates and owns its own.
+        :type session: aiohttp.ClientSession
+        :param limit: maximum number of open connections.
+        :type limit: int
+        :param limit_per_host: maximum number of open connections per host.
+        :type limit_per_host: int
+        :param concurrency: maximum number of requests in flight.
+        :type concurrency: int
+        :param keep_alive: whether to reuse connections between requests.
+        :type keep_alive: bool
+        :param timeout: seconds to wait for the server, as a single value or
+                        as a ``(connect, read)`` tuple.
+        :type timeout: float or tuple
+        :param cache: a cache to serve repeated requests from, either
+                      in-process or shared with other processes.
+        :type cache: fixerio.cache.RateCache or fixerio.cache.SharedCache
+        :param store: a persistent store to read historical rates from and
+                      write them through to.
+        :type store: fixerio.store.HistoricalStore
+        :param coalesce: whether concurrent identical requests share a single
+                         request to Fixer.io.
+        :type coalesce: bool
+        :param rate_limiter: a scheduler keeping requests within the rate
+                             limit and the quota of your plan.
+        :type rate_limiter: fixerio.ratelimit.RateLimiter
+        :param retry: the policy to retry failed requests with.
+        :type retry: fixerio.retry.RetryPolicy
+        :param circuit_breaker: a circuit breaker failing requests fast
+                                while Fixer.io is failing.
+        :type circuit_breaker: fixerio.retry.CircuitBreaker
+        :param result_type: what rates are returned as, either ``'dict'``
+                            for plain dicts as decoded from Fixer.io, or
+                            ``'snapshot'`` for compact
+                            :class:`fixerio.decoding.RateSnapshot` objects.
+        :type result_type: str or unicode
+        :param conditional: whether to request rates again with the
+                            validators of the last response, so that
+                            unchanged rates are answered with an empty
+                            ``304 Not Modified``.
+        :type conditional: bool
+        :param instrumentation: hooks to call on the timings of requests
+                                and on cache, retry and quota events.
+        :type instrumentation: fixerio.instrumentation.Instrumentation
+        :param snapshot: an offline snapshot to answer from when rates are
+                         neither cached nor stored, and when Fixer.io cannot
+                         be requested.
+        :type snapshot: fixerio.snapshot.Snapshot
+        :param batch_window: seconds to wait for concurrent calls for other
+                             symbols, so that the rates of all of them are
+                             requested at once. By default, the rates of
+                             each call are requested on their own.
+        :type batch_window: float
+        """
+        super(AsyncFixerio, self).__init__(access_key, symbols=symbols,
+                                           base=base, session=session,
+                                           timeout=timeout,
+                                           cache=cache, store=store,
+                                           coalesce=coalesce,
+                                           rate_limiter=rate_limiter,
+                                           retry=retry,
+                                           circuit_breaker=circuit_breaker,
+                                           result_type=result_type,
+                                           conditional=conditional,
+                                           instrumentation=instrumentation,
+                                           snapshot=snapshot,
+                                           batch_window=batch_window)
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.concurrency = concurrency
+        self.keep_alive = keep_alive
+
+        self._semaphore = None
+        self._flights = AsyncSingleFlight()
+        self._batcher = None
+        if batch_window is not None:
+            self._batcher = AsyncBatcher(batch_window)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def _config(self):
+        config = super(AsyncFixerio, self)._config()
+        config.update(limit=self.limit, limit_per_host=self.limit_per_host,
+                      concurrency=self.concurrency,
+                      keep_alive=self.keep_alive)
+        return config
+
+    def _after_fork(self):
+        super(AsyncFixerio, self)._after_fork()
+        self._semaphore = None
+        self._flights = AsyncSingleFlight()
+        if self._batcher is not None:
+            self._batcher = AsyncBatcher(self.batch_window)
+
+    @property
+    def session(self):
+        """ The session used to send requests, created on first use. """
+        self._check_fork()
+        if self._session is None:
+            self._session = self._create_session()
+        return self._session
+
+    def _create_session(self):
+        """ Creates a session backed by a pool of persistent connections.
+
+        :return: a new session.
+        :rtype: aiohttp.ClientSession
+        """
+        if aiohttp is None:
+            raise ImportError('AsyncFixerio requires aiohttp')
+
+        connector = aiohttp.TCPConnector(limit=self.limit,
+                                         limit_per_host=self.limit_per_host,
+                                         force_close=not self.keep_alive)
+
+        if isinstance(self.timeout, tuple):
+            connect, read = self.timeout
+            timeout = aiohttp.ClientTimeout(sock_connect=connect,
+                                            sock_read=read)
+        else:
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        trace_configs = None
+        if self.instrumentation is not None:
+            trace_configs = [_trace_config()]
+
+        return aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                     trace_configs=trace_configs)
+
+    async def close(self):
+        """ Stops the refresher and closes the pooled connections.
+
+        A session passed to the constructor is left open, as it is owned by
+        the caller.
+        """
+        await self.stop_refresher()
+        if self._session is not None and self._owns_session:
+            await self._session.close()
+            self._session = None
+
+    def _slots(self):
+        """ The semaphore bounding concurrent requests, created on first use
+        so that it belongs to the running event loop. """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
+
+    async def _get(self, url, payload):
+        """ Sends a GET request through the pooled session.
+
+        :param url: the URL to request.
+        :type url: str or unicode
+        :param payload: the query string parameters.
+        :type payload: dict
+        :return: the decoded response.
+        :rtype: dict
+        """
+        async with self._slots():
+            validators = self._validators_of(url, payload)
+            headers = None if validators is None else validators.headers
+            async with self.session.get(url, params=payload,
+                                        headers=headers) as response:
+                if (response.status == NOT_MODIFIED and
+                        validators is not None):
+                    return self.validators.not_modified(validators)
+
+                response.raise_for_status()
+
+                return self._decode(url, payload, response.headers,
+                                    await response.read())
+
+    async def _get_timed(self, url, payload, attempt, queued):
+        """ Sends a GET request like :meth:`_get`, timing each of its phases
+        for the instrumentation. DNS and connection timings are only known
+        for the session the client creates. """
+        timings = {'dns': None, 'connect': None}
+        trace = {'trace_request_ctx': timings} if self._owns_session else {}
+        start = timer()
+        status = None
+        async with self._slots():
+            started_at, sent = time.time(), timer()
+            try:
+                validators = self._validators_of(url, payload)
+                headers = None if validators is None else validators.headers
+                async with self.session.get(url, params=payload,
+                                            headers=headers,
+                                            **trace) as response:
+                    status = response.status
+                    first_byte = timer()
+                    content = await response.read()
+                    downloaded = timer()
+
+                    if status == NOT_MODIFIED and validators is not None:
+                        decoded = self.validators.not_modified(validators)
+                    else:
+                        response.raise_for_status()
+                        decoded = self._decode(url, payload,
+                                               response.headers, content)
+            except _ERRORS + (FixerioException,) as ex:
+                self.instrumentation.emit(
+                    REQUEST_ERROR, url=url, status=status, attempt=attempt,
+                    started_at=started_at, duration=timer() - sent, error=ex)
+                raise
+
+        end = timer()
+        self.instrumentation.emit(REQUEST, url=url, status=status,
+                                  bytes=len(content), attempt=attempt,
+                                  started_at=started_at,
+                                  queue=queued + sent - start,
+                                  dns=timings['dns'],
+                                  connect=timings['connect'],
+                                  ttfb=first_byte - sent,
+                                  download=downloaded - first_byte,
+                                  decode=end - downloaded,
+                                  duration=end - sent)
+        return decoded
+
+    async def _admit(self):
+        """ Waits until a request may be sent.
+
+        :return: the seconds waited for the rate limiter.
+        :rtype: float
+        """
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_request()
+        try:
+            return await self._acquire()
+        except BaseException:
+            self._release()
+            raise
+
+    async def _acquire(self):
+        """ Waits for the rate limiter. """
+        if self.rate_limiter is None:
+            return 0
+
+        wait = await self._blocking(self.rate_limiter.reserve,
+                                    self.access_key)
+        if wait:
+            await asyncio.sleep(wait)
+        if self.instrumentation is not None:
+            await self._blocking(self._quota_used)
+
+        return wait or 0
+
+    @property
+    def _blocks(self):
+        """ Whether the cache, the store or the quota of the client do I/O
+        which would block the event loop. """
+        quota = getattr(self.rate_limiter, 'quota', None)
+        return (isinstance(self.cache, SharedCache) or
+                self.store is not None or
+                getattr(quota, 'path', None) is not None)
+
+    async def _blocking(self, function, *args, **kwargs):
+        """ Calls `function` in the default executor of the loop if the
+        client does blocking I/O, or at once otherwise. """
+        if not self._blocks:
+            return function(*args, **kwargs)
+        return await asyncio.get_event_loop().run_in_executor(
+            None, functools.partial(function, *args, **kwargs))
+
+    async def _send(self, url, payload):
+        """ Sends a request within the rate limit, retrying it on transient
+        failures.
+
+        :return: the decoded response.
+        :rtype: dict
+        """
+        attempt = 0
+        while True:
+            queued = await self._admit()
+
+            attempt += 1
+            try:
+                if self.instrumentation is None:
+                    response = await self._get(url, payload)
+                else:
+                    response = await self._get_timed(url, payload, attempt,
+                                                     queued)
+            except _ERRORS as ex:
+                status = getattr(ex, 'status', None)
+                if not self._failed(attempt, status, _unavailable(ex)):
+                    raise
+                delay = self.retry.backoff(attempt)
+                self._emit(RETRY, url=url, attempt=attempt, status=status,
+                           delay=delay)
+                await asyncio.sleep(delay)
+            except BaseException:
+                self._release()
+                raise
+            else:
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_success()
+                return response
+
+    async def _fetch(self, endpoint, url, symbols, date=None):
+        """ Gets rates from the cache, or from Fixer.io on a cache miss. """
+        self._check_fork()
+        response = await self._blocking(self._lookup, endpoint, symbols,
+                                        date=date)
+        if response is not None:
+            return response
+        if self.snapshot is not None and self.snapshot.offline:
+            return self._offline(endpoint, symbols, date=date)
+
+        if self._batcher is not None and symbols is not None:
+            return await self._batcher.do((url, self.base), symbols,
+                                          self._fetch_missing, endpoint, url,
+                                          date=date)
+        return await self._fetch_missing(endpoint, url, symbols, date=date)
+
+    async def _fetch_missing(self, endpoint, url, symbols, date=None):
+        """ Requests rates missing from the cache, or serves them stale
+        if Fixer.io cannot be requested. """
+        payload = self._create_payload(symbols)
+        try:
+            if not self.coalesce:
+                return await self._fill(endpoint, url, payload, symbols,
+                                        date)
+
+            return await self._flights.do(flight_key(url, payload),
+                                          self._fill, endpoint, url,
+                                          payload, symbols, date)
+        except (RateLimitExceeded, CircuitOpenError):
+            response = await self._blocking(self._stale, endpoint, symbols,
+                                            date=date)
+            if response is None:
+                raise
+            return response
+        except _ERRORS as ex:
+            response = None
+            if _unavailable(ex):
+                response = await self._blocking(self._stale, endpoint,
+                                                symbols, date=date,
+                                                cached=False)
+            if response is None:
+                raise
+            return response
+
+    async def _fill(self, endpoint, url, payload, symbols, date):
+        """ Requests rates missing from the cache, unless another client of
+        a shared cache requests them meanwhile. """
+        lock = self._fill_lock(endpoint, symbols, date=date)
+        if lock is None:
+            return await self._request(endpoint, url, payload, symbols, date)
+
+        while not await self._blocking(lock.acquire) and not lock.timed_out:
+            await asyncio.sleep(lock.poll_interval)
+            response = await self._blocking(self._lookup, endpoint, symbols,
+                                            date=date)
+            if response is not None:
+                return response
+
+        try:
+            response = await self._blocking(self._lookup, endpoint, symbols,
+                                            date=date)
+            if response is not None:
+                return response
+            return await self._request(endpoint, url, payload, symbols, date)
+        finally:
+            await self._blocking(lock.release)
+
+    async def _request(self, endpoint, url, payload, symbols, date):
+        """ Requests rates from Fixer.io and saves them. """
+        response = await self._send(url, payload)
+
+        await self._blocking(self._save, endpoint, response, symbols,
+                             date=date,
+                             validated_at=self._not_modified_at(url, payload))
+
+        return response
+
+    async def _refresh(self, endpoint, symbols):
+        """ Requests the latest rates, bypassing the cache. """
+        self._check_fork()
+        try:
+            url = self.base_url + LATEST_PATH
+            payload = self._create_payload(symbols)
+
+            return await self._flights.do(flight_key(url, payload),
+                                          self._request, endpoint, url,
+                                          payload, symbols, None)
+        except _ERRORS as ex:
+            raise FixerioException(str(ex))
+
+    async def start_refresher(self, symbols=None, **kwargs):
+        """ Starts refreshing the latest rates in an asyncio task.
+
+        Once started, :meth:`latest` serves the rates the refresher holds
+        without sending any request.
+
+        :param symbols: currency symbols to keep, the ones of the client by
+                        default.
+        :type symbols: list or tuple
+        :param kwargs: further arguments of :class:`AsyncRefresher`.
+        :return: the running refresher.
+        :rtype: AsyncRefresher
+        """
+        await self.stop_refresher()
+        refresher = AsyncRefresher(self, symbols, **kwargs)
+        await refresher.start()
+        self.refresher = refresher
+
+        return refresher
+
+    async def stop_refresher(self):
+        """ Stops refreshing the latest rates. """
+        refresher, self.refresher = self.refresher, None
+        if refresher is not None:
+            await refresher.stop()
+
+    async def latest(self, symbols=None):
+        """ Get the latest foreign exchange reference rates.
+
+        :param symbols: currency symbols to request specific exchange rates.
+        :type symbols: list or tuple
+        :return: the latest foreign exchange reference rates.
+        :rtype: dict
+        :raises FixerioException: if any error making a request.
+        """
+        self._check_fork()
+        try:
+            symbols = SymbolSet.of(symbols) or self.symbols
+
+            response = self._refreshed(symbols)
+            if response is not None:
+                return self._result(response)
+
+            url = self.base_url + LATEST_PATH
+
+            return self._result(await self._fetch(LATEST, url, symbols))
+        except _ERRORS as ex:
+            raise FixerioException(str(ex))
+
+    async def historical_rates(self, date, symbols=None):
+        """
+        Get historical rates for any day since `date`.
+
+        :param date: a date
+        :type date: date or str
+        :param symbols: currency symbols to request specific exchange rates.
+        :type symbols: list or tuple
+        :return: the historical rates for any day since `date`.
+        :rtype: dict
+        :raises FixerioException: if any error making a request.
+        """
+        self._check_fork()
+        try:
+            date = _iso_date(date)
+
+            symbols = SymbolSet.of(symbols) or self.symbols
+
+            url = self.base_url + date
+
+            response = await self._fetch(HISTORICAL, url, symbols,
+                                         date=date)
+            return self._result(response)
+        except _ERRORS as ex:
+            raise FixerioException(str(ex))
@@ -0,0 +1,406 @@
+from __future__ import unicode_literals
+
+import contextlib
+import errno
+import hashlib
+import os
+import socket
+import struct
+import threading
+import time
+from collections import OrderedDict
+
+from .exceptions import CacheBackendError
+from .locking import FileLock, reset_after_fork
+
+DEFAULT_MAXSIZE = 4096
+
+DEFAULT_REDIS_HOST = 'localhost'
+DEFAULT_REDIS_PORT = 6379
+
+_EXPIRES_AT = struct.Struct('<d')
+
+#: The Lua script :meth:`RedisBackend.delete_if` runs on the server.
+DELETE_IF_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class CacheBackend(object):
+    """ A key-value store shared by the clients of a :class:`SharedCache`.
+
+    Keys are text and values are bytes. Entries may expire after `ttl`
+    seconds, and :meth:`add` sets a key only if it is absent, atomically for
+    every client of the backend.
+    """
+
+    def get(self, key):
+        """ Gets the value of a key.
+
+        :param key: the key.
+        :type key: str or unicode
+        :return: the value, or ``None`` if the key is absent or expired.
+        :rtype: bytes
+        """
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        """ Sets the value of a key.
+
+        :param key: the key.
+        :type key: str or unicode
+        :param value: the value.
+        :type value: bytes
+        :param ttl: seconds the key expires after, ``None`` for never.
+        :type ttl: int or float
+        """
+        raise NotImplementedError
+
+    def add(self, key, value, ttl=None):
+        """ Sets the value of a key only if it is absent or expired.
+
+        :return: whether the key was set.
+        :rtype: bool
+        """
+        raise NotImplementedError
+
+    def delete(self, key):
+        """ Removes a key if it is present.
+
+        :param key: the key.
+        :type key: str or unicode
+        """
+        raise NotImplementedError
+
+    def delete_if(self, key, value):
+        """ Removes a key only if it holds `value`, atomically for every
+        client of the backend if the backend supports it.
+
+        :param key: the key.
+        :type key: str or unicode
+        :param value: the value the key must hold.
+        :type value: bytes
+        :return: whether the key was removed.
+        :rtype: bool
+        """
+        if self.get(key) != value:
+            return False
+        self.delete(key)
+        return True
+
+    def close(self):
+        """ Releases the resources held by the backend. """
+        pass
+
+
+def _expires_at(ttl, clock):
+    return None if ttl is None else clock() + ttl
+
+
+class MemoryBackend(CacheBackend):
+    """ A backend shared by the threads of a single process, keeping at most
+    `maxsize` entries and evicting the least recently set ones. """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, clock=time.time):
+        """
+        :param maxsize: maximum number of entries to keep.
+        :type maxsize: int
+        :param clock: a function returning the current POSIX time.
+        :type clock: callable
+        """
+        self.maxsize = maxsize
+        self.clock = clock
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        reset_after_fork(self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, key):
+        """ Gets an unexpired entry, holding the lock. """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at = entry[1]
+        if expires_at is not None and self.clock() >= expires_at:
+            del self._entries[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._get(key)
+            return None if entry is None else entry[0]
+
+    def _set(self, key, value, ttl):
+        """ Sets an entry and evicts the oldest ones, holding the lock. """
+        self._entries.pop(key, None)
+        self._entries[key] = (value, _expires_at(ttl, self.clock))
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._set(key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        with self._lock:
+            if self._get(key) is not None:
+                return False
+            self._set(key, value, ttl)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_if(self, key, value):
+        with self._lock:
+            entry = self._get(key)
+            if entry is None or entry[0] != value:
+                return False
+            del self._entries[key]
+            return True
+
+
+class FileBackend(CacheBackend):
+    """ A backend shared by the processes of a host through a directory.
+
+    Every key is stored in its own file, replaced atomically on writes so
+    that reads need no lock. Writes are serialized by a lock file, which
+    makes :meth:`add` atomic across processes.
+    """
+
+    def __init__(self, path, clock=time.time):
+        """
+        :param path: the directory to keep the files in.
+        :type path: str or unicode
+        :param clock: a function returning the current POSIX time.
+        :type clock: callable
+        """
+        self.path = path
+        self.clock = clock
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def _path(self, key):
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.path, name + '.entry')
+
+    def _read(self, path):
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except (IOError, OSError):
+            return None
+
+        expires_at, = _EXPIRES_AT.unpack_from(data)
+        if expires_at and self.clock() >= expires_at:
+            return None
+        return data[_EXPIRES_AT.size:]
+
+    def _write(self, path, value, ttl):
+        expires_at = _expires_at(ttl, self.clock) or 0
+        tmp_path = '{0}.{1}.{2}.tmp'.format(path, os.getpid(),
+                                            threading.current_thread().ident)
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(_EXPIRES_AT.pack(expires_at))
+                f.write(value)
+            os.rename(tmp_path, path)
+        except (IOError, OSError):
+            self._remove(tmp_path)
+            raise
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """ Holds the lock file of the directory, raising errors of the file
+        system as :class:`CacheBackendError`. """
+        try:
+            fd = os.open(os.path.join(self.path, '.lock'),
+                         os.O_RDWR | os.O_CREAT, 0o644)
+            with os.fdopen(fd, 'r+b') as f:
+                with FileLock(f.fileno()):
+                    yield
+        except (IOError, OSError) as ex:
+            raise CacheBackendError(str(ex))
+
+    def get(self, key):
+        return self._read(self._path(key))
+
+    def set(self, key, value, ttl=None):
+        path = self._path(key)
+        with self._locked():
+            self._write(path, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        path = self._path(key)
+        with self._locked():
+            if self._read(path) is not None:
+                return False
+            self._write(path, value, ttl)
+            return True
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError as ex:
+            if ex.errno != errno.ENOENT:
+                raise
+
+    def delete(self, key):
+        path = self._path(key)
+        with self._locked():
+            self._remove(path)
+
+    def delete_if(self, key, value):
+        path = self._path(key)
+        with self._locked():
+            if self._read(path) != value:
+                return False
+            self._remove(path)
+            return True
+
+
+def _encode(arg):
+    if not isinstance(arg, bytes):
+        arg = '{0}'.format(arg).encode('utf-8')
+    return b'$' + str(len(arg)).encode('ascii') + b'\r\n' + arg + b'\r\n'
+
+
+class RedisBackend(CacheBackend):
+    """ A backend shared by a whole fleet through a Redis server.
+
+    It speaks the Redis protocol (RESP) over a single connection per process,
+    needing no client library, so any server implementing ``GET``, ``SET``
+    with the ``NX`` and ``PX`` options, ``DEL`` and ``EVAL`` will do. The
+    connection is opened on first use, and again after an error or a fork.
+    """
+
+    def __init__(self, host=DEFAULT_REDIS_HOST, port=DEFAULT_REDIS_PORT,
+                 db=0, password=None, socket_timeout=None):
+        """
+        :param host: the host of the server.
+        :type host: str or unicode
+        :param port: the port of the server.
+        :type port: int
+        :param db: the number of the database to use.
+        :type db: int
+        :param password: the password to authenticate with, if any.
+        :type password: str or unicode
+        :param socket_timeout: seconds to wait for the server.
+        :type socket_timeout: float
+        """
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.socket_timeout = socket_timeout
+
+        self._lock = threading.Lock()
+        reset_after_fork(self)
+        self._socket = None
+        self._reader = None
+        self._pid = None
+
+    def _connect(self):
+        """ Opens the connection and selects the database. """
+        self._socket = socket.create_connection((self.host, self.port),
+                                                self.socket_timeout)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._socket.makefile('rb')
+        self._pid = os.getpid()
+
+        if self.password is not None:
+            self._call('AUTH', self.password)
+        if self.db:
+            self._call('SELECT', self.db)
+
+    def _disconnect(self):
+        if self._socket is not None:
+            self._reader.close()
+            self._socket.close()
+        self._socket = self._reader = None
+
+    def _call(self, *args):
+        """ Sends a command and reads its reply. """
+        command = b'*' + str(len(args)).encode('ascii') + b'\r\n'
+        self._socket.sendall(command + b''.join(_encode(a) for a in args))
+        return self._reply()
+
+    def _reply(self):
+        line = self._reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise CacheBackendError('Connection closed by the Redis server')
+
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest
+        if kind == b'-':
+            raise CacheBackendError(rest.decode('utf-8', 'replace'))
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            size = int(rest)
+            if size < 0:
+                return None
+            return self._reader.read(size + 2)[:-2]
+        if kind == b'*':
+            size = int(rest)
+            return None if size < 0 else [self._reply() for _ in range(size)]
+
+        raise CacheBackendError('Unexpected reply: {0!r}'.format(line))
+
+    def execute(self, *args):
+        """ Sends a command to the server.
+
+        :param args: the command and its arguments.
+        :return: the reply of the server.
+        :raises CacheBackendError: if the server cannot be reached or replies
+                                   with an error.
+        """
+        with self._lock:
+            try:
+                if self._socket is None or self._pid != os.getpid():
+                    # Never share the connection of a parent process.
+                    self._socket = None
+                    self._connect()
+                return self._call(*args)
+            except (socket.error, ValueError) as ex:
+                self._disconnect()
+                raise CacheBackendError(str(ex))
+            except CacheBackendError:
+                self._disconnect()
+                raise
+
+    def get(self, key):
+        return self.execute('GET', key)
+
+    def _set(self, key, value, ttl, *options):
+        args = ['SET', key, value]
+        if ttl is not None:
+            args += ['PX', max(1, int(ttl * 1000))]
+        return self.execute(*(args + list(options)))
+
+    def set(self, key, value, ttl=None):
+        self._set(key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        return self._set(key, value, ttl, 'NX') is not None
+
+    def delete(self, key):
+        self.execute('DEL', key)
+
+    def delete_if(self, key, value):
+        return bool(self.execute('EVAL', DELETE_IF_SCRIPT, 1, key, value))
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
@@ -0,0 +1,95 @@
+from __future__ import unicode_literals
+
+import threading
+import time
+
+from .cache import _copy
+from .symbols import SymbolSet
+
+#: Seconds a batch waits for further calls before it is requested.
+DEFAULT_WINDOW = 0.005
+
+
+class _Batch(object):
+    __slots__ = ('codes', 'done', 'result', 'error')
+
+    def __init__(self):
+        self.codes = set()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class Batcher(object):
+    """ Merges calls for some symbols into a single call for all of them.
+
+    The first call with a key opens a batch and waits `window` seconds, while
+    further calls with the key join it with their own symbols. It then makes
+    a single call for the union of their symbols, and each caller gets the
+    rates of its own symbols only.
+    """
+
+    def __init__(self, window=DEFAULT_WINDOW, sleep=time.sleep):
+        """
+        :param window: seconds to wait for further calls.
+        :type window: float
+        :param sleep: a function sleeping for a number of seconds.
+        :type sleep: callable
+        """
+        self.window = window
+        self.sleep = sleep
+
+        self.calls = 0
+        self.batches = 0
+
+        self._batches = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._batches)
+
+    def do(self, key, symbols, function, *args, **kwargs):
+        """ Calls `function` for `symbols` and the symbols of the calls
+        joining it, unless a batch with `key` is open.
+
+        :param key: a hashable key identifying the batch.
+        :param symbols: the currency symbols of the call.
+        :type symbols: fixerio.symbols.SymbolSet
+        :param function: the function to call, with the union of the symbols
+                         as its ``symbols`` keyword argument. It returns a
+                         response holding the rates of all of them.
+        :type function: callable
+        :return: a copy of the response, with the rates of `symbols` only.
+        :rtype: dict
+        :raises: what `function` raises.
+        """
+        with self._lock:
+            self.calls += 1
+            batch = self._batches.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._batches[key] = _Batch()
+                self.batches += 1
+            batch.codes.update(symbols)
+
+        if not leader:
+            batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+            return _copy(batch.result, symbols)
+
+        try:
+            try:
+                self.sleep(self.window)
+            finally:
+                with self._lock:
+                    del self._batches[key]
+            batch.result = function(*args, symbols=SymbolSet(batch.codes),
+                                    **kwargs)
+        except BaseException as ex:
+            batch.error = ex
+            raise
+        finally:
+            batch.done.set()
+
+        return _copy(batch.result, symbols)
@@ -0,0 +1,102 @@
+"""
+Fetches historical rates of long ranges of dates in a pool of processes, so
+that parsing and decoding the responses runs on every core.
+"""
+from __future__ import unicode_literals
+
+import collections
+import itertools
+import multiprocessing
+import pickle
+
+from .dates import date_range
+from .symbols import SymbolSet
+
+#: Days of rates requested by a worker process at a time.
+DEFAULT_CHUNK_SIZE = 16
+
+# The clients unpickled in a worker process, by pickled state.
+_clients = {}
+
+
+def _client(state):
+    """ Unpickles a client once per worker process, so that its session and
+    caches serve every chunk the process fetches. """
+    client = _clients.get(state)
+    if client is None:
+        client = _clients[state] = pickle.loads(state)
+    return client
+
+
+def _fetch_chunk(state, dates, symbols):
+    """ Gets the historical rates of `dates` in a worker process. """
+    client = _client(state)
+    return [client.historical_rates(date, symbols) for date in dates]
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def historical_rates_range(client, start, end, symbols=None, processes=None,
+                           chunk_size=DEFAULT_CHUNK_SIZE, skip_weekends=False,
+                           skip_holidays=False):
+    """
+    Get historical rates for every day from `start` to `end`, requested and
+    decoded by a pool of `processes` worker processes.
+
+    Each worker unpickles its own copy of `client`, as described in
+    :meth:`fixerio.client.BaseFixerio.__getstate__`: it opens its own
+    connections and shares the historical store of the client through the
+    files of the store. Rates are yielded in date order, holding a bounded
+    number of chunks in memory however long the range is.
+
+    :param client: the client to configure the workers like.
+    :type client: fixerio.client.Fixerio
+    :param start: the first date.
+    :type start: date or str
+    :param end: the last date.
+    :type end: date or str
+    :param symbols: currency symbols to request specific exchange rates.
+    :type symbols: list or tuple
+    :param processes: number of worker processes, one per CPU by default.
+    :type processes: int
+    :param chunk_size: number of days a worker requests at a time.
+    :type chunk_size: int
+    :param skip_weekends: whether to leave out Saturdays and Sundays.
+    :type skip_weekends: bool
+    :param skip_holidays: whether to leave out TARGET closing days, when the
+                          ECB publishes no rates.
+    :type skip_holidays: bool
+    :return: the historical rates of each day, as the result type of the
+             client.
+    :rtype: generator
+    :raises FixerioException: if any error making a request.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    processes = processes or multiprocessing.cpu_count()
+    state = pickle.dumps(client, pickle.HIGHEST_PROTOCOL)
+    symbols = SymbolSet.of(symbols)
+    dates = (date.isoformat()
+             for date in date_range(start, end, skip_weekends, skip_holidays))
+
+    pending = collections.deque()
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        for chunk in _chunks(dates, chunk_size):
+            pending.append(executor.submit(_fetch_chunk, state, chunk,
+                                           symbols))
+
+            # Bound the chunks held in memory to a few per process.
+            while len(pending) > 2 * processes:
+                for result in pending.popleft().result():
+                    yield result
+
+        while pending:
+            for result in pending.popleft().result():
+                yield result
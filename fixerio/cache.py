@@ -0,0 +1,460 @@
+from __future__ import unicode_literals
+
+import binascii
+import calendar
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .decoding import loads
+from .exceptions import CacheBackendError
+from .locking import reset_after_fork
+
+logger = logging.getLogger(__name__)
+
+LATEST = 'latest'
+HISTORICAL = 'historical'
+
+DEFAULT_MAXSIZE = 256
+DEFAULT_LATEST_TTL = 60 * 60
+#: Seconds expired latest rates are kept for, as a fallback.
+DEFAULT_STALE_TTL = 24 * 60 * 60
+DEFAULT_PREFIX = 'fixerio'
+DEFAULT_LOCK_TIMEOUT = 10
+DEFAULT_POLL_INTERVAL = 0.05
+
+
+def _copy(response, symbols=None):
+    """ Copies a response, keeping only the rates of `symbols` if any. """
+    rates = response.get('rates', {})
+    if symbols is None:
+        rates = dict(rates)
+    else:
+        rates = dict((code, rates[code]) for code in symbols if code in rates)
+
+    copy = dict(response)
+    copy['rates'] = rates
+
+    return copy
+
+
+def _published_at(response, clock):
+    """ Returns the POSIX time the rates in `response` were published at. """
+    timestamp = response.get('timestamp')
+    if timestamp is not None:
+        return timestamp
+
+    date = response.get('date')
+    if date is not None:
+        date = datetime.datetime.strptime(date, '%Y-%m-%d')
+        return calendar.timegm(date.timetuple())
+
+    return clock()
+
+
+def _expires_at(response, ttl, validated_at, clock):
+    """ Returns the POSIX time the latest rates in `response` expire at. """
+    fresh_since = _published_at(response, clock)
+    if validated_at is not None:
+        fresh_since = max(fresh_since, validated_at)
+    return fresh_since + ttl
+
+
+class RateCache(object):
+    """ A thread-safe, size bounded LRU cache of rates responses.
+
+    Entries are keyed on ``(endpoint, date, base, symbols)``. Latest rates
+    expire `latest_ttl` seconds after the time they were published at, or
+    were last found not modified at, while historical rates never expire. A
+    request for some symbols is served from any cached response holding a
+    superset of them.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, latest_ttl=DEFAULT_LATEST_TTL,
+                 clock=time.time):
+        """
+        :param maxsize: maximum number of responses to keep.
+        :type maxsize: int
+        :param latest_ttl: seconds the latest rates are fresh for after they
+                           were published.
+        :type latest_ttl: int or float
+        :param clock: a function returning the current POSIX time.
+        :type clock: callable
+        """
+        self.maxsize = maxsize
+        self.latest_ttl = latest_ttl
+        self.clock = clock
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_hits = 0
+
+        self._entries = OrderedDict()
+        self._groups = {}
+        self._lock = threading.Lock()
+        reset_after_fork(self)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(endpoint, date=None, base=None, symbols=None):
+        """ Creates a cache key.
+
+        :param endpoint: either :data:`LATEST` or :data:`HISTORICAL`.
+        :type endpoint: str or unicode
+        :param date: the date of historical rates in ISO 8601 format.
+        :type date: str or unicode
+        :param base: the base currency.
+        :type base: str or unicode
+        :param symbols: currency symbols, ``None`` for all of them.
+        :type symbols: list or tuple
+        :return: a hashable key.
+        :rtype: tuple
+        """
+        if symbols is not None:
+            symbols = getattr(symbols, 'codes', None) or frozenset(symbols)
+
+        return endpoint, date, base, symbols
+
+    def _is_fresh(self, entry):
+        expires_at = entry[1]
+        return expires_at is None or self.clock() < expires_at
+
+    def _lookup(self, key, allow_stale=False):
+        """ Finds an entry covering `key`, holding the lock. """
+        def is_fresh(entry):
+            return allow_stale or self._is_fresh(entry)
+
+        entry = self._entries.get(key)
+        if entry is not None and is_fresh(entry):
+            return key, entry
+
+        symbols = key[3]
+        for other in self._groups.get(key[:3], ()):
+            other_symbols = other[3]
+            if other_symbols is None or (symbols is not None and
+                                         symbols <= other_symbols):
+                entry = self._entries[other]
+                if is_fresh(entry):
+                    return other, entry
+
+        return None, None
+
+    def get(self, endpoint, date=None, base=None, symbols=None,
+            allow_stale=False):
+        """ Gets a cached response.
+
+        :param allow_stale: whether to return expired responses too, as a
+                            fallback when Fixer.io cannot be requested.
+        :type allow_stale: bool
+        :return: a copy of the cached response or ``None`` if there is no
+                 fresh response covering the requested symbols.
+        :rtype: dict
+        """
+        key = self.make_key(endpoint, date, base, symbols)
+        with self._lock:
+            found, entry = self._lookup(key, allow_stale)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            if allow_stale and not self._is_fresh(entry):
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+            self._entries[found] = self._entries.pop(found)
+
+        return _copy(entry[0], symbols)
+
+    def set(self, endpoint, response, date=None, base=None, symbols=None,
+            validated_at=None):
+        """ Caches a response.
+
+        :param response: the decoded response.
+        :type response: dict
+        :param validated_at: the POSIX time Fixer.io last confirmed the
+                             rates unchanged at, which extends their expiry.
+        :type validated_at: float
+        """
+        if endpoint == LATEST:
+            expires_at = _expires_at(response, self.latest_ttl, validated_at,
+                                     self.clock)
+        else:
+            expires_at = None
+
+        key = self.make_key(endpoint, date, base, symbols)
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (_copy(response), expires_at)
+            self._groups.setdefault(key[:3], set()).add(key)
+
+            while len(self._entries) > self.maxsize:
+                evicted, _ = self._entries.popitem(last=False)
+                self._discard(evicted)
+                self.evictions += 1
+
+    def items(self):
+        """ Lists every cached response, expired ones included.
+
+        :return: ``(key, response)`` tuples, least recently used first, with
+                 keys as made by :meth:`make_key`.
+        :rtype: list
+        """
+        with self._lock:
+            return [(key, _copy(entry[0]))
+                    for key, entry in self._entries.items()]
+
+    def _discard(self, key):
+        group = self._groups[key[:3]]
+        group.discard(key)
+        if not group:
+            del self._groups[key[:3]]
+
+    def clear(self):
+        """ Removes every cached response and resets the counters. """
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+            self.hits = self.misses = self.evictions = self.stale_hits = 0
+
+    @property
+    def stats(self):
+        """ The hit, miss and eviction counters.
+
+        :rtype: dict
+        """
+        return {'hits': self.hits, 'misses': self.misses,
+                'stale_hits': self.stale_hits, 'evictions': self.evictions,
+                'size': len(self._entries)}
+
+
+class FillLock(object):
+    """ A lock on requesting some rates, shared by every client of a
+    :class:`SharedCache`.
+
+    Only the client holding it requests the rates, while the others wait for
+    them to show up in the cache. It expires after `timeout` seconds so that
+    a client dying while holding it does not block the others for long.
+    """
+
+    def __init__(self, backend, key, timeout=DEFAULT_LOCK_TIMEOUT,
+                 poll_interval=DEFAULT_POLL_INTERVAL, clock=time.time):
+        """
+        :param backend: the backend of the cache.
+        :type backend: fixerio.backends.CacheBackend
+        :param key: the key of the lock.
+        :type key: str or unicode
+        :param timeout: seconds to hold the lock, and to wait for it, at
+                        most.
+        :type timeout: int or float
+        :param poll_interval: seconds between checks of the cache while
+                              waiting.
+        :type poll_interval: float
+        :param clock: a function returning the current POSIX time.
+        :type clock: callable
+        """
+        self.backend = backend
+        self.key = key
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.held = False
+
+        self._token = binascii.hexlify(os.urandom(16))
+        self._deadline = clock() + timeout
+
+    @property
+    def timed_out(self):
+        """ Whether waiting for the lock took too long. """
+        return self.clock() >= self._deadline
+
+    def acquire(self):
+        """ Tries to take the lock without waiting.
+
+        :return: whether the lock was taken, or the backend cannot be
+                 reached and the rates must be requested anyway.
+        :rtype: bool
+        """
+        try:
+            self.held = self.backend.add(self.key, self._token,
+                                         ttl=self.timeout)
+        except CacheBackendError as ex:
+            logger.warning('Cannot lock %s: %s', self.key, ex)
+            return True
+        return self.held
+
+    def release(self):
+        """ Releases the lock if it is held. """
+        if not self.held:
+            return
+
+        self.held = False
+        try:
+            # The lock may have expired and been taken by another client.
+            self.backend.delete_if(self.key, self._token)
+        except CacheBackendError as ex:
+            logger.warning('Cannot unlock %s: %s', self.key, ex)
+
+
+class SharedCache(object):
+    """ A cache of rates responses shared by many processes or hosts
+    through a :class:`fixerio.backends.CacheBackend`.
+
+    It expires entries like :class:`RateCache` does and serves requests for
+    some symbols from the cached response of all symbols. Expired latest
+    rates are kept for `stale_ttl` more seconds as a fallback. A client
+    missing the cache takes a :class:`FillLock` before requesting the rates,
+    so that a single client of the whole fleet requests them at a time.
+
+    Errors of the backend are logged and handled as cache misses.
+    """
+
+    def __init__(self, backend, latest_ttl=DEFAULT_LATEST_TTL,
+                 stale_ttl=DEFAULT_STALE_TTL, prefix=DEFAULT_PREFIX,
+                 lock_timeout=DEFAULT_LOCK_TIMEOUT,
+                 poll_interval=DEFAULT_POLL_INTERVAL, clock=time.time):
+        """
+        :param backend: the backend to keep responses in.
+        :type backend: fixerio.backends.CacheBackend
+        :param latest_ttl: seconds the latest rates are fresh for after they
+                           were published.
+        :type latest_ttl: int or float
+        :param stale_ttl: seconds expired latest rates are kept for.
+        :type stale_ttl: int or float
+        :param prefix: the prefix of the keys.
+        :type prefix: str or unicode
+        :param lock_timeout: seconds to hold a fill lock, and to wait for
+                             one, at most.
+        :type lock_timeout: int or float
+        :param poll_interval: seconds between checks of the cache while
+                              waiting for a fill lock.
+        :type poll_interval: float
+        :param clock: a function returning the current POSIX time.
+        :type clock: callable
+        """
+        self.backend = backend
+        self.latest_ttl = latest_ttl
+        self.stale_ttl = stale_ttl
+        self.prefix = prefix
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+        self.clock = clock
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.errors = 0
+
+    def make_key(self, endpoint, date=None, base=None, symbols=None):
+        """ Creates a key of the backend.
+
+        :return: a key such as ``'fixerio:latest::EUR:GBP,USD'``.
+        :rtype: str or unicode
+        """
+        if symbols is None:
+            symbols = '*'
+        else:
+            symbols = getattr(symbols, 'query', None) or \
+                ','.join(sorted(set(symbols)))
+        return ':'.join((self.prefix, endpoint, date or '', base or '',
+                         symbols))
+
+    def _read(self, key):
+        try:
+            data = self.backend.get(key)
+        except CacheBackendError as ex:
+            self.errors += 1
+            logger.warning('Cannot read %s: %s', key, ex)
+            return None
+        if data is None:
+            return None
+
+        try:
+            return loads(data)
+        except ValueError as ex:
+            self.errors += 1
+            logger.warning('Cannot decode %s: %s', key, ex)
+            return None
+
+    def _find(self, endpoint, date, base, symbols):
+        """ Finds the entry of `symbols`, or of all symbols. """
+        entry = self._read(self.make_key(endpoint, date, base, symbols))
+        if entry is None and symbols is not None:
+            entry = self._read(self.make_key(endpoint, date, base))
+        return entry
+
+    def get(self, endpoint, date=None, base=None, symbols=None,
+            allow_stale=False):
+        """ Gets a cached response.
+
+        :param allow_stale: whether to return expired responses too, as a
+                            fallback when Fixer.io cannot be requested.
+        :type allow_stale: bool
+        :return: the cached response or ``None`` if there is no fresh
+                 response covering the requested symbols.
+        :rtype: dict
+        """
+        entry = self._find(endpoint, date, base, symbols)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at = entry['expires_at']
+        if expires_at is not None and self.clock() >= expires_at:
+            if not allow_stale:
+                self.misses += 1
+                return None
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+
+        return _copy(entry['response'], symbols)
+
+    def set(self, endpoint, response, date=None, base=None, symbols=None,
+            validated_at=None):
+        """ Caches a response.
+
+        :param response: the decoded response.
+        :type response: dict
+        :param validated_at: the POSIX time Fixer.io last confirmed the
+                             rates unchanged at, which extends their expiry.
+        :type validated_at: float
+        """
+        expires_at = ttl = None
+        if endpoint == LATEST:
+            expires_at = _expires_at(response, self.latest_ttl, validated_at,
+                                     self.clock)
+            ttl = max(1, expires_at + self.stale_ttl - self.clock())
+
+        key = self.make_key(endpoint, date, base, symbols)
+        data = json.dumps({'expires_at': expires_at, 'response': response})
+        try:
+            self.backend.set(key, data.encode('utf-8'), ttl=ttl)
+        except CacheBackendError as ex:
+            self.errors += 1
+            logger.warning('Cannot write %s: %s', key, ex)
+
+    def lock(self, endpoint, date=None, base=None, symbols=None):
+        """ Creates a lock on requesting a response.
+
+        :return: a lock, not taken yet.
+        :rtype: FillLock
+        """
+        key = self.make_key(endpoint, date, base, symbols) + ':lock'
+        return FillLock(self.backend, key, timeout=self.lock_timeout,
+                        poll_interval=self.poll_interval, clock=self.clock)
+
+    @property
+    def stats(self):
+        """ The hit, miss and error counters.
+
+        :rtype: dict
+        """
+        return {'hits': self.hits, 'misses': self.misses,
+                'stale_hits': self.stale_hits, 'errors': self.errors}
@@ -0,0 +1,412 @@
+"""
+The ``fixerio`` command.
+
+Rates are written to standard output as JSON, one object per line::
+
+    $ fixerio latest --symbols USD,GBP
+    $ fixerio historical 2000-01-03
+    $ fixerio range 2018-01-01 2018-01-31 --skip-weekends
+    $ printf 'latest\\nhistorical 2000-01-03\\n' | fixerio batch
+
+A daemon keeps a warm connection pool and cache for repeated invocations,
+which send it their queries when ``--socket`` or ``$FIXERIO_SOCKET`` names
+its socket::
+
+    $ fixerio --socket ~/.fixerio.sock daemon &
+    $ FIXERIO_SOCKET=~/.fixerio.sock fixerio latest
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import json
+import os
+import shlex
+import signal
+import socket
+import sys
+import threading
+
+try:
+    import socketserver
+except ImportError:  # For Python 2
+    import SocketServer as socketserver
+
+try:
+    from shlex import quote
+except ImportError:  # For Python 2
+    from pipes import quote
+
+from .exceptions import FixerioException
+
+ENV_ACCESS_KEY = 'FIXERIO_ACCESS_KEY'
+ENV_SOCKET = 'FIXERIO_SOCKET'
+
+_ERROR_PREFIX = '{"error": '
+
+
+class QueryError(Exception):
+    """ Raised for a query which cannot be parsed. """
+    pass
+
+
+class _QueryParser(argparse.ArgumentParser):
+    """ Raises errors instead of exiting, to answer bad queries of a batch
+    or of a daemon. """
+
+    def error(self, message):
+        raise QueryError(message)
+
+
+def _symbols(value):
+    return [code.strip().upper() for code in value.split(',')]
+
+
+def add_query_commands(commands):
+    """ Adds the commands querying rates to a set of subcommands. """
+    latest = commands.add_parser('latest', help='get the latest rates')
+
+    historical = commands.add_parser('historical',
+                                     help='get the rates of a date')
+    historical.add_argument('date', help='the date, as YYYY-MM-DD')
+
+    range_ = commands.add_parser('range',
+                                 help='get the rates of a range of dates')
+    range_.add_argument('start', help='the first date, as YYYY-MM-DD')
+    range_.add_argument('end', help='the last date, as YYYY-MM-DD')
+    range_.add_argument('--skip-weekends', action='store_true')
+    range_.add_argument('--skip-holidays', action='store_true')
+
+    for parser in (latest, historical, range_):
+        parser.add_argument('--symbols', type=_symbols,
+                            help='comma-separated currency symbols')
+        parser.add_argument('--base', help='the base currency')
+
+
+def query_parser():
+    """ Creates the parser of single queries, such as the lines of a batch.
+
+    :rtype: argparse.ArgumentParser
+    """
+    parser = _QueryParser(prog='fixerio', add_help=False)
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+    add_query_commands(commands)
+
+    return parser
+
+
+def to_line(query):
+    """ Formats a parsed query back into a line of a batch.
+
+    :rtype: str or unicode
+    """
+    args = [query.command]
+    if query.command == 'historical':
+        args.append(query.date)
+    elif query.command == 'range':
+        args += [query.start, query.end]
+        if query.skip_weekends:
+            args.append('--skip-weekends')
+        if query.skip_holidays:
+            args.append('--skip-holidays')
+    if query.symbols:
+        args += ['--symbols', ','.join(query.symbols)]
+    if query.base:
+        args += ['--base', query.base]
+
+    return ' '.join(quote(arg) for arg in args)
+
+
+def failed(line):
+    """ Whether a line of output reports an error. """
+    return line.startswith(_ERROR_PREFIX)
+
+
+class Runner(object):
+    """ Answers queries with clients sharing a cache, one per base
+    currency, kept open between queries. """
+
+    def __init__(self, access_key, **kwargs):
+        """
+        :param access_key: your API Key.
+        :type access_key: str or unicode
+        :param kwargs: further arguments of the clients.
+        """
+        from .cache import RateCache
+
+        self.access_key = access_key
+        self.cache = RateCache()
+        self.parser = query_parser()
+        self.kwargs = kwargs
+
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def client(self, base=None):
+        """ Gets the client of a base currency, created on first use.
+
+        :rtype: fixerio.client.Fixerio
+        """
+        from .client import Fixerio
+
+        with self._lock:
+            client = self._clients.get(base)
+            if client is None:
+                client = Fixerio(self.access_key, base=base,
+                                 cache=self.cache, **self.kwargs)
+                self._clients[base] = client
+            return client
+
+    def _results(self, query):
+        client = self.client(query.base)
+        if query.command == 'latest':
+            return [client.latest(symbols=query.symbols)]
+        if query.command == 'historical':
+            return [client.historical_rates(query.date,
+                                            symbols=query.symbols)]
+        return client.historical_rates_range(
+            query.start, query.end, symbols=query.symbols,
+            skip_weekends=query.skip_weekends,
+            skip_holidays=query.skip_holidays)
+
+    def answer(self, query):
+        """ Answers a parsed query.
+
+        :return: the lines of JSON to write, one per response, or a single
+                 one describing an error.
+        :rtype: generator
+        """
+        try:
+            for response in self._results(query):
+                yield json.dumps(response, sort_keys=True)
+        except (FixerioException, ValueError) as ex:
+            yield json.dumps({'error': str(ex)})
+
+    def answer_line(self, line):
+        """ Answers a query given as a line of a batch. """
+        try:
+            query = self.parser.parse_args(shlex.split(line))
+        except (QueryError, ValueError) as ex:
+            return iter([json.dumps({'error': str(ex)})])
+        return self.answer(query)
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients.clear()
+
+
+class _DaemonHandler(socketserver.StreamRequestHandler):
+    """ Answers each line received with lines of JSON, followed by an empty
+    line. Blank lines get an empty answer, and unexpected errors a line
+    describing them, so that every line sent gets its answer. """
+
+    def handle(self):
+        for line in iter(self.rfile.readline, b''):
+            try:
+                line = line.decode('utf-8').strip()
+                if line:
+                    for output in self.server.runner.answer_line(line):
+                        self.wfile.write(output.encode('utf-8') + b'\n')
+            except Exception as ex:
+                self.wfile.write(json.dumps({'error': str(ex)})
+                                 .encode('utf-8') + b'\n')
+            self.wfile.write(b'\n')
+            self.wfile.flush()
+
+
+class Daemon(socketserver.ThreadingUnixStreamServer):
+    """ Serves queries on a Unix socket, only accessible to its user. """
+
+    daemon_threads = True
+
+    def __init__(self, path, runner):
+        """
+        :param path: the path of the socket.
+        :type path: str or unicode
+        :param runner: the runner to answer queries with.
+        :type runner: Runner
+        :raises RuntimeError: if a daemon already listens on the socket.
+        """
+        if os.path.exists(path):
+            if _listening(path):
+                raise RuntimeError('A daemon listens on {0}'.format(path))
+            os.remove(path)
+
+        umask = os.umask(0o177)
+        try:
+            socketserver.ThreadingUnixStreamServer.__init__(
+                self, path, _DaemonHandler)
+        finally:
+            os.umask(umask)
+        self.runner = runner
+
+    def server_close(self):
+        socketserver.ThreadingUnixStreamServer.server_close(self)
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def _listening(path):
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+        return True
+    except socket.error:
+        return False
+    finally:
+        client.close()
+
+
+def forward(path, lines, write):
+    """ Sends queries to a daemon and writes its answers.
+
+    :param path: the socket of the daemon.
+    :type path: str or unicode
+    :param lines: the queries, as lines of a batch.
+    :type lines: iterable
+    :param write: a function writing a line of output.
+    :type write: callable
+    :return: whether every query succeeded.
+    :rtype: bool
+    :raises socket.error: if the daemon cannot be reached.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.connect(path)
+    ok = True
+    try:
+        reader = client.makefile('rb')
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            client.sendall(line.encode('utf-8') + b'\n')
+            for output in iter(reader.readline, b'\n'):
+                if not output:
+                    raise socket.error('The daemon closed the connection')
+                output = output.decode('utf-8').rstrip('\n')
+                ok = ok and not failed(output)
+                write(output)
+        reader.close()
+    finally:
+        client.close()
+    return ok
+
+
+def _run(runner, lines, write):
+    """ Answers queries in-process.
+
+    :return: whether every query succeeded.
+    :rtype: bool
+    """
+    ok = True
+    for line in lines:
+        if not line.strip():
+            continue
+        for output in runner.answer_line(line):
+            ok = ok and not failed(output)
+            write(output)
+    return ok
+
+
+def parser():
+    """ Creates the parser of the command-line arguments. """
+    parser = argparse.ArgumentParser(
+        prog='fixerio', description='Get foreign exchange rates from '
+                                    'Fixer.io.')
+    parser.add_argument('--access-key',
+                        default=os.environ.get(ENV_ACCESS_KEY),
+                        help='your API key, ${0} by default'.format(
+                            ENV_ACCESS_KEY))
+    parser.add_argument('--socket', default=os.environ.get(ENV_SOCKET),
+                        help='the socket of a daemon, ${0} by default. '
+                             'Queries are sent to the daemon if it is '
+                             'listening'.format(ENV_SOCKET))
+
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+    add_query_commands(commands)
+    commands.add_parser('batch', help='answer queries read from standard '
+                                      'input, one per line')
+    commands.add_parser('daemon', help='answer queries on the --socket '
+                                       'until interrupted')
+    export = commands.add_parser('export', add_help=False,
+                                 help='export a range of rates to a file, '
+                                      'see fixerio export --help')
+    export.add_argument('args', nargs=argparse.REMAINDER)
+
+    return parser
+
+
+def _serve(options):
+    runner = Runner(options.access_key)
+    daemon = Daemon(os.path.expanduser(options.socket), runner)
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        daemon.server_close()
+        runner.close()
+    return 0
+
+
+def _export(options, args):
+    from .export import main as export
+
+    args = options.args + args
+    if options.access_key and '--access-key' not in args:
+        args += ['--access-key', options.access_key]
+    export(args)
+    return 0
+
+
+def _print(line):
+    print(line)
+
+
+def main(args=None):
+    """ Runs the ``fixerio`` command.
+
+    :return: the exit status.
+    :rtype: int
+    """
+    cli = parser()
+    options, unknown = cli.parse_known_args(args)
+    if options.command == 'export':
+        return _export(options, unknown)
+    if unknown:
+        cli.error('unrecognized arguments: {0}'.format(' '.join(unknown)))
+
+    if options.command == 'batch':
+        lines = (line.rstrip('\n') for line in sys.stdin)
+    else:
+        lines = [to_line(options)]
+
+    socket_path = options.socket and os.path.expanduser(options.socket)
+    if options.command == 'daemon':
+        if not socket_path:
+            cli.error('the daemon requires --socket')
+    elif socket_path and _listening(socket_path):
+        return 0 if forward(socket_path, lines, _print) else 1
+
+    if not options.access_key:
+        cli.error('an access key is required')
+    if options.command == 'daemon':
+        return _serve(options)
+
+    runner = Runner(options.access_key)
+    try:
+        return 0 if _run(runner, lines, _print) else 1
+    finally:
+        runner.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,48 +1,861 @@
 from __future__ import unicode_literals
 
+import collections
 import datetime
+import os
+import threading
+import time
 
 try:
     from urllib.parse import urljoin
 except ImportError:  # For Python 2
     from urlparse import urljoin  # noqa
 
-import requests
-
-from .exceptions import FixerioException
+from .batching import Batcher
+from .cache import HISTORICAL, LATEST
+from .conditional import NOT_MODIFIED, ValidatorCache
+from .dates import date_range
+from .decoding import DICT, RESULT_TYPES, decode, loads
+from .exceptions import (CircuitOpenError, FixerioException,
+                         RateLimitExceeded)
+from .instrumentation import (CACHE_HIT, CACHE_MISS, QUOTA, REQUEST,
+                              REQUEST_ERROR, RETRY, STALE_HIT, timer)
+from .lazy import LazyModule
+from .refresh import Refresher
+from .singleflight import SingleFlight, flight_key
+from .symbols import SymbolSet
 
 BASE_URL = 'http://data.fixer.io/api/'
 
 LATEST_PATH = 'latest'
+TIMESERIES_PATH = 'timeseries'
 
+#: The longest range of dates the timeseries endpoint accepts.
+TIMESERIES_MAX_DAYS = 365
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_WORKERS = 4
+
+#: Number of snapshots to keep precomputed cross rates of.
+CROSS_RATES_SIZE = 8
+
+#: Number of query payloads to keep before they are built again.
+PAYLOADS_SIZE = 64
+
+# Imported on the first request, as it takes longer than the rest of the
+# package.
+requests = LazyModule('requests')
+
+
+def _transient_errors():
+    return (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
 
-class Fixerio(object):
-    """ A client for Fixer.io. """
 
-    def __init__(self, access_key, symbols=None):
+def _iso_date(date):
+    """ Converts a date to ISO 8601 format. """
+    if isinstance(date, datetime.date):
+        return date.isoformat()
+    return date
+
+
+class BaseFixerio(object):
+    """ Configuration and payload construction shared by the clients. """
+
+    #: The root of the Fixer.io API, which may be overridden to point the
+    #: client at a proxy or a stub server.
+    base_url = BASE_URL
+
+    def __init__(self, access_key, symbols=None, base=None, session=None,
+                 timeout=None, cache=None, store=None, coalesce=True,
+                 rate_limiter=None, retry=None, circuit_breaker=None,
+                 result_type=DICT, conditional=True, instrumentation=None,
+                 snapshot=None, batch_window=None):
         """
         :param access_key: your API Key.
         :type access_key: str or unicode
         :param symbols: currency symbols to request specific exchange rates.
+                        They are kept as a :class:`fixerio.symbols.SymbolSet`.
         :type symbols: list or tuple
+        :param base: the base currency to request rates against. The Free
+                     Plan only supports EUR, the default.
+        :type base: str or unicode
+        :param session: a session to send requests with. If it is not
+                        passed, the client creates and owns its own
+                        connection-pooled session.
+        :param timeout: seconds to wait for the server, as a single value or
+                        as a ``(connect, read)`` tuple.
+        :type timeout: float or tuple
+        :param cache: a cache to serve repeated requests from, either
+                      in-process or shared with other processes.
+        :type cache: fixerio.cache.RateCache or fixerio.cache.SharedCache
+        :param store: a persistent store to read historical rates from and
+                      write them through to.
+        :type store: fixerio.store.HistoricalStore
+        :param coalesce: whether concurrent identical requests share a single
+                         request to Fixer.io.
+        :type coalesce: bool
+        :param rate_limiter: a scheduler keeping requests within the rate
+                             limit and the quota of your plan.
+        :type rate_limiter: fixerio.ratelimit.RateLimiter
+        :param retry: the policy to retry failed requests with.
+        :type retry: fixerio.retry.RetryPolicy
+        :param circuit_breaker: a circuit breaker failing requests fast
+                                while Fixer.io is failing.
+        :type circuit_breaker: fixerio.retry.CircuitBreaker
+        :param result_type: what rates are returned as, either ``'dict'``
+                            for plain dicts as decoded from Fixer.io, or
+                            ``'snapshot'`` for compact
+                            :class:`fixerio.decoding.RateSnapshot` objects.
+        :type result_type: str or unicode
+        :param conditional: whether to request rates again with the
+                            validators of the last response, so that
+                            unchanged rates are answered with an empty
+                            ``304 Not Modified``.
+        :type conditional: bool
+        :param instrumentation: hooks to call on the timings of requests
+                                and on cache, retry and quota events.
+        :type instrumentation: fixerio.instrumentation.Instrumentation
+        :param snapshot: an offline snapshot to answer from when rates are
+                         neither cached nor stored, and when Fixer.io cannot
+                         be requested.
+        :type snapshot: fixerio.snapshot.Snapshot
+        :param batch_window: seconds to wait for concurrent calls for other
+                             symbols, so that the rates of all of them are
+                             requested at once. By default, the rates of
+                             each call are requested on their own.
+        :type batch_window: float
+        :raises ValueError: if the result type or any symbol is unknown.
         """
+        if result_type not in RESULT_TYPES:
+            raise ValueError('Unknown result type: {0}'.format(result_type))
+
         self.access_key = access_key
-        self.symbols = symbols
+        self.symbols = SymbolSet.of(symbols)
+        self.base = base
+        self.timeout = timeout
+        self.cache = cache
+        self.store = store
+        self.coalesce = coalesce
+        self.rate_limiter = rate_limiter
+        self.retry = retry
+        self.circuit_breaker = circuit_breaker
+        self.result_type = result_type
+        self.validators = ValidatorCache() if conditional else None
+        self.instrumentation = instrumentation
+        self.snapshot = snapshot
+        self.batch_window = batch_window
+        self.refresher = None
+        self._payloads = {}
+
+        self._session = session
+        self._owns_session = session is None
+        self._pid = os.getpid()
+
+    def __getstate__(self):
+        """ Pickles the configuration of the client only.
+
+        Sessions, caches, rate limiters, instrumentation and refreshers
+        belong to the process they were created in, so an unpickled client
+        opens its own session and has none of the others. Stores and
+        snapshots are pickled by path and opened again.
+        """
+        state = self._config()
+        state['base_url'] = self.base_url
+        return state
+
+    def __setstate__(self, state):
+        state = dict(state)
+        base_url = state.pop('base_url')
+        self.__init__(**state)
+        self.base_url = base_url
+
+    def _config(self):
+        """ The arguments to create a client configured like this one
+        with, leaving out the ones bound to this process. """
+        return {'access_key': self.access_key, 'symbols': self.symbols,
+                'base': self.base, 'timeout': self.timeout,
+                'store': self.store, 'coalesce': self.coalesce,
+                'retry': self.retry, 'circuit_breaker': self.circuit_breaker,
+                'result_type': self.result_type,
+                'conditional': self.validators is not None,
+                'snapshot': self.snapshot, 'batch_window': self.batch_window}
+
+    def _check_fork(self):
+        """ Resets the client the first time it is used in a forked
+        process. """
+        if self._pid != os.getpid():
+            self._after_fork()
+
+    def _after_fork(self):
+        """ Drops what the client shares with the process it was forked
+        from: its connections, its locks and the calls in flight there. """
+        self._pid = os.getpid()
+        self.refresher = None
+        if self._owns_session:
+            self._session = None
+        if self.validators is not None:
+            self.validators = ValidatorCache()
 
     def _create_payload(self, symbols):
-        """ Creates a payload with no none values.
+        """ Creates a payload with no none values, or reuses the one
+        created last time for the same symbols. The session still encodes
+        it into the query string of each request.
 
         :param symbols: currency symbols to request specific exchange rates.
-        :type symbols: list or tuple
-        :return: a payload.
+        :type symbols: fixerio.symbols.SymbolSet
+        :return: a payload, which must not be modified.
         :rtype: dict
         """
+        key = self.access_key, self.base, symbols
+        payload = self._payloads.get(key)
+        if payload is not None:
+            return payload
+
         payload = {'access_key': self.access_key}
+        if self.base is not None:
+            payload['base'] = self.base
         if symbols is not None:
-            payload['symbols'] = ','.join(symbols)
+            payload['symbols'] = symbols.query
 
+        if len(self._payloads) >= PAYLOADS_SIZE:
+            self._payloads.clear()
+        self._payloads[key] = payload
         return payload
 
+    def _result(self, response):
+        """ Converts a response to the result type of the client. """
+        return decode(response, self.result_type)
+
+    def _refreshed(self, symbols):
+        """ Gets the latest rates from the refresher, if any. """
+        if self.refresher is None:
+            return None
+
+        response = self.refresher.get(symbols)
+        if response is not None and self.instrumentation is not None:
+            self.instrumentation.emit(CACHE_HIT, endpoint=LATEST, date=None,
+                                      source='refresher')
+        return response
+
+    def _emit(self, event, **data):
+        """ Calls the instrumentation hooks of an event, if any. """
+        if self.instrumentation is not None:
+            self.instrumentation.emit(event, **data)
+
+    def _lookup(self, endpoint, symbols, date=None):
+        """ Gets rates from the cache or the store without any request.
+
+        :param endpoint: either ``LATEST`` or ``HISTORICAL``.
+        :type endpoint: str or unicode
+        :param symbols: currency symbols to request specific exchange rates.
+        :type symbols: list or tuple
+        :param date: the date of historical rates in ISO 8601 format.
+        :type date: str or unicode
+        :return: the rates or ``None`` if they must be requested.
+        :rtype: dict
+        """
+        response, source = self._find(endpoint, symbols, date)
+        if self.instrumentation is not None:
+            if response is None:
+                self.instrumentation.emit(CACHE_MISS, endpoint=endpoint,
+                                          date=date)
+            else:
+                self.instrumentation.emit(CACHE_HIT, endpoint=endpoint,
+                                          date=date, source=source)
+        return response
+
+    def _find(self, endpoint, symbols, date):
+        """ Gets rates from the cache or the store.
+
+        :return: the rates and where they were found, or ``None`` for both.
+        :rtype: tuple
+        """
+        if self.cache is not None:
+            response = self.cache.get(endpoint, date=date, base=self.base,
+                                      symbols=symbols)
+            if response is not None:
+                return response, 'cache'
+
+        if endpoint == HISTORICAL and self.store is not None:
+            response = self.store.get(date, base=self.base, symbols=symbols)
+            if response is not None:
+                if self.cache is not None:
+                    self.cache.set(endpoint, response, date=date,
+                                   base=self.base, symbols=symbols)
+                return response, 'store'
+
+        if self.snapshot is not None:
+            response = self.snapshot.get(endpoint, date=date, base=self.base,
+                                         symbols=symbols)
+            if response is not None:
+                return response, 'snapshot'
+
+        return None, None
+
+    def _stale(self, endpoint, symbols, date=None, cached=True):
+        """ Gets cached rates even if they expired, or rates from the
+        snapshot however old it allows, as a fallback when Fixer.io cannot be
+        requested.
+
+        :param cached: whether to look for expired rates in the cache. They
+                       are only served while requests are held back by the
+                       rate limiter or the circuit breaker.
+        :type cached: bool
+        :return: the rates or ``None`` if there are none.
+        :rtype: dict
+        """
+        response = None
+        if cached and self.cache is not None:
+            response = self.cache.get(endpoint, date=date, base=self.base,
+                                      symbols=symbols, allow_stale=True)
+        if response is None and self.snapshot is not None:
+            response = self.snapshot.get(endpoint, date=date, base=self.base,
+                                         symbols=symbols, allow_stale=True)
+        if response is not None:
+            self._emit(STALE_HIT, endpoint=endpoint, date=date)
+        return response
+
+    def _offline(self, endpoint, symbols, date=None):
+        """ Gets rates without requesting Fixer.io, when the snapshot is
+        offline.
+
+        :rtype: dict
+        :raises FixerioException: if the rates are not in the snapshot.
+        """
+        response = self._stale(endpoint, symbols, date=date)
+        if response is None:
+            raise FixerioException('No {0} rates{1} in the offline '
+                                   'snapshot'.format(
+                                       endpoint,
+                                       '' if date is None else ' of ' + date))
+        return response
+
+    def _quota_used(self):
+        """ Emits the quota consumed by a request, if it is tracked. """
+        quota = self.rate_limiter.quota
+        if self.instrumentation is not None and quota is not None:
+            used = quota.used
+            self.instrumentation.emit(QUOTA, used=used,
+                                      remaining=max(0, quota.limit - used))
+
+    def _validators_of(self, url, payload):
+        """ Gets the validators to make a request conditional with.
+
+        :return: the validators, or ``None`` if there are none.
+        :rtype: fixerio.conditional.Validators
+        """
+        if self.validators is None:
+            return None
+        return self.validators.get(url, payload)
+
+    def _validated(self, url, payload, headers, response):
+        """ Keeps the validators of a full response. """
+        if self.validators is not None:
+            self.validators.update(url, payload, headers, response)
+
+    def _decode(self, url, payload, headers, content):
+        """ Decodes a full response and keeps its validators.
+
+        :raises FixerioException: if the response is not valid JSON.
+        """
+        try:
+            decoded = loads(content)
+        except ValueError as ex:
+            raise FixerioException('Invalid JSON response: {0}'.format(ex))
+        self._validated(url, payload, headers, decoded)
+
+        return decoded
+
+    def _not_modified_at(self, url, payload):
+        """ Gets the time the last response to a request was found not
+        modified at, if it was. """
+        if self.validators is None:
+            return None
+        return self.validators.not_modified_at(url, payload)
+
+    def _fill_lock(self, endpoint, symbols, date=None):
+        """ Creates a lock on requesting rates missing from the cache.
+
+        :return: a lock shared by every client of the cache, or ``None`` if
+                 the cache is not shared.
+        :rtype: fixerio.cache.FillLock
+        """
+        lock = getattr(self.cache, 'lock', None)
+        if lock is None:
+            return None
+        return lock(endpoint, date=date, base=self.base, symbols=symbols)
+
+    def _failed(self, attempt, status, transient):
+        """ Counts a failed attempt of a request.
+
+        :param attempt: number of attempts so far.
+        :type attempt: int
+        :param status: the HTTP status of the response, or ``None`` if there
+                       was no response.
+        :type status: int
+        :param transient: whether the failure was a connection error, a
+                          timeout or a server error.
+        :type transient: bool
+        :return: whether to retry the request.
+        :rtype: bool
+        """
+        if self.circuit_breaker is not None:
+            if transient:
+                self.circuit_breaker.record_failure()
+            else:
+                # Fixer.io is up, the request itself is wrong.
+                self.circuit_breaker.record_success()
+
+        if self.retry is None or (status is None and not transient):
+            return False
+        return self.retry.should_retry(attempt, status)
+
+    def _release(self):
+        """ Ends the trial of a half-open circuit breaker when a request
+        fails with an error which says nothing about Fixer.io, such as a
+        response which is not JSON or the rate limit. """
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.release()
+
+    def _save(self, endpoint, response, symbols, date=None,
+              validated_at=None):
+        """ Writes requested rates to the cache and the store. """
+        if not response.get('success', True):
+            return
+
+        if endpoint == HISTORICAL and self.store is not None:
+            self.store.put(response, complete=symbols is None,
+                           symbols=symbols)
+        if self.cache is not None:
+            self.cache.set(endpoint, response, date=date, base=self.base,
+                           symbols=symbols, validated_at=validated_at)
+
+
+class Fixerio(BaseFixerio):
+    """ A client for Fixer.io. """
+
+    def __init__(self, access_key, symbols=None, base=None, session=None,
+                 pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_block=False,
+                 keep_alive=True, timeout=None, cache=None, store=None,
+                 coalesce=True, rate_limiter=None, retry=None,
+                 circuit_breaker=None, result_type=DICT,
+                 conditional=True, instrumentation=None,
+                 snapshot=None, batch_window=None):
+        """
+        :param access_key: your API Key.
+        :type access_key: str or unicode
+        :param symbols: currency symbols to request specific exchange rates.
+        :type symbols: list or tuple
+        :param base: the base currency to request rates against. The Free
+                     Plan only supports EUR, the default.
+        :type base: str or unicode
+        :param session: a session to send requests with. If it is not
+                        passed, the client creates and owns its own
+                        connection-pooled session.
+        :type session: requests.Session
+        :param pool_connections: number of connection pools (hosts) to
+                                 cache.
+        :type pool_connections: int
+        :param pool_maxsize: maximum number of connections kept alive per
+                             host.
+        :type pool_maxsize: int
+        :param pool_block: whether to block when no free connections are
+                           available instead of opening a new one.
+        :type pool_block: bool
+        :param keep_alive: whether to reuse connections between requests.
+        :type keep_alive: bool
+        :param timeout: seconds to wait for the server, as a single value or
+                        as a ``(connect, read)`` tuple.
+        :type timeout: float or tuple
+        :param cache: a cache to serve repeated requests from, either
+                      in-process or shared with other processes.
+        :type cache: fixerio.cache.RateCache or fixerio.cache.SharedCache
+        :param store: a persistent store to read historical rates from and
+                      write them through to.
+        :type store: fixerio.store.HistoricalStore
+        :param coalesce: whether concurrent identical requests share a single
+                         request to Fixer.io.
+        :type coalesce: bool
+        :param rate_limiter: a scheduler keeping requests within the rate
+                             limit and the quota of your plan.
+        :type rate_limiter: fixerio.ratelimit.RateLimiter
+        :param retry: the policy to retry failed requests with.
+        :type retry: fixerio.retry.RetryPolicy
+        :param circuit_breaker: a circuit breaker failing requests fast
+                                while Fixer.io is failing.
+        :type circuit_breaker: fixerio.retry.CircuitBreaker
+        :param result_type: what rates are returned as, either ``'dict'``
+                            for plain dicts as decoded from Fixer.io, or
+                            ``'snapshot'`` for compact
+                            :class:`fixerio.decoding.RateSnapshot` objects.
+        :type result_type: str or unicode
+        :param conditional: whether to request rates again with the
+                            validators of the last response, so that
+                            unchanged rates are answered with an empty
+                            ``304 Not Modified``.
+        :type conditional: bool
+        :param instrumentation: hooks to call on the timings of requests
+                                and on cache, retry and quota events.
+        :type instrumentation: fixerio.instrumentation.Instrumentation
+        :param snapshot: an offline snapshot to answer from when rates are
+                         neither cached nor stored, and when Fixer.io cannot
+                         be requested.
+        :type snapshot: fixerio.snapshot.Snapshot
+        :param batch_window: seconds to wait for concurrent calls for other
+                             symbols, so that the rates of all of them are
+                             requested at once. By default, the rates of
+                             each call are requested on their own.
+        :type batch_window: float
+        """
+        super(Fixerio, self).__init__(access_key, symbols=symbols,
+                                      base=base, session=session,
+                                      timeout=timeout,
+                                      cache=cache, store=store,
+                                      coalesce=coalesce,
+                                      rate_limiter=rate_limiter,
+                                      retry=retry,
+                                      circuit_breaker=circuit_breaker,
+                                      result_type=result_type,
+                                      conditional=conditional,
+                                      instrumentation=instrumentation,
+                                      snapshot=snapshot,
+                                      batch_window=batch_window)
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.keep_alive = keep_alive
+
+        self._flights = SingleFlight()
+        self._batcher = None
+        if batch_window is not None:
+            self._batcher = Batcher(batch_window)
+        self._cross_rates = collections.OrderedDict()
+        self._cross_rates_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _config(self):
+        config = super(Fixerio, self)._config()
+        config.update(pool_connections=self.pool_connections,
+                      pool_maxsize=self.pool_maxsize,
+                      pool_block=self.pool_block, keep_alive=self.keep_alive)
+        return config
+
+    def _after_fork(self):
+        super(Fixerio, self)._after_fork()
+        self._flights = SingleFlight()
+        if self._batcher is not None:
+            self._batcher = Batcher(self.batch_window)
+        self._cross_rates = collections.OrderedDict()
+        self._cross_rates_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """ The session used to send requests, created on first use. """
+        self._check_fork()
+        if self._session is None:
+            self._session = self._create_session()
+        return self._session
+
+    def _create_session(self):
+        """ Creates a session backed by a pool of persistent connections.
+
+        :return: a new session.
+        :rtype: requests.Session
+        """
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize, pool_block=self.pool_block)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+
+        return session
+
+    def close(self):
+        """ Stops the refresher and closes the pooled connections.
+
+        A session passed to the constructor is left open, as it is owned by
+        the caller.
+        """
+        self.stop_refresher()
+        if self._session is not None and self._owns_session:
+            self._session.close()
+            self._session = None
+
+    def _open(self, url, payload, validators, stream=False):
+        """ Sends a GET request, conditional if there are validators.
+
+        :return: the response, with its body not read yet if `stream`.
+        :rtype: requests.Response
+        """
+        headers = None if validators is None else validators.headers
+        return self.session.get(url, params=payload, timeout=self.timeout,
+                                headers=headers, stream=stream)
+
+    def _get(self, url, payload):
+        """ Sends a GET request through the pooled session.
+
+        :param url: the URL to request.
+        :type url: str or unicode
+        :param payload: the query string parameters.
+        :type payload: dict
+        :return: the decoded response.
+        :rtype: dict
+        :raises requests.exceptions.RequestException: if the request fails.
+        """
+        validators = self._validators_of(url, payload)
+        response = self._open(url, payload, validators)
+        if response.status_code == NOT_MODIFIED and validators is not None:
+            return self.validators.not_modified(validators)
+
+        response.raise_for_status()
+
+        return self._decode(url, payload, response.headers, response.content)
+
+    def _get_timed(self, url, payload, attempt, queued):
+        """ Sends a GET request like :meth:`_get`, timing each of its phases
+        for the instrumentation.
+
+        :param attempt: number of attempts so far, this one included.
+        :type attempt: int
+        :param queued: seconds spent waiting for the rate limiter.
+        :type queued: float
+        """
+        started_at, start = time.time(), timer()
+        status = None
+        try:
+            validators = self._validators_of(url, payload)
+            response = self._open(url, payload, validators, stream=True)
+            status = response.status_code
+            first_byte = timer()
+            content = response.content
+            downloaded = timer()
+
+            if status == NOT_MODIFIED and validators is not None:
+                decoded = self.validators.not_modified(validators)
+            else:
+                response.raise_for_status()
+                decoded = self._decode(url, payload, response.headers,
+                                       content)
+        except (requests.exceptions.RequestException,
+                FixerioException) as ex:
+            self.instrumentation.emit(REQUEST_ERROR, url=url, status=status,
+                                      attempt=attempt, started_at=started_at,
+                                      duration=timer() - start, error=ex)
+            raise
+
+        end = timer()
+        self.instrumentation.emit(REQUEST, url=url, status=status,
+                                  bytes=len(content), attempt=attempt,
+                                  started_at=started_at, queue=queued,
+                                  dns=None, connect=None,
+                                  ttfb=first_byte - start,
+                                  download=downloaded - first_byte,
+                                  decode=end - downloaded,
+                                  duration=end - start)
+        return decoded
+
+    def _admit(self):
+        """ Waits until a request may be sent.
+
+        :return: the seconds waited for the rate limiter, only measured for
+                 the instrumentation.
+        :rtype: float
+        :raises RateLimitExceeded: if the request is beyond the rate limit.
+        :raises CircuitOpenError: if Fixer.io is failing.
+        """
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.before_request()
+        try:
+            return self._acquire()
+        except BaseException:
+            self._release()
+            raise
+
+    def _acquire(self):
+        """ Waits for the rate limiter. """
+        if self.rate_limiter is None:
+            return 0
+        if self.instrumentation is None:
+            self.rate_limiter.acquire(self.access_key)
+            return 0
+
+        start = timer()
+        self.rate_limiter.acquire(self.access_key)
+        queued = timer() - start
+        self._quota_used()
+
+        return queued
+
+    def _send(self, url, payload):
+        """ Sends a request within the rate limit, retrying it on transient
+        failures.
+
+        :param url: the URL to request.
+        :type url: str or unicode
+        :param payload: the query string parameters.
+        :type payload: dict
+        :return: the decoded response.
+        :rtype: dict
+        :raises requests.exceptions.RequestException: if the request fails.
+        :raises RateLimitExceeded: if the request is beyond the rate limit.
+        :raises CircuitOpenError: if Fixer.io is failing.
+        """
+        attempt = 0
+        while True:
+            queued = self._admit()
+
+            attempt += 1
+            try:
+                if self.instrumentation is None:
+                    response = self._get(url, payload)
+                else:
+                    response = self._get_timed(url, payload, attempt, queued)
+            except requests.exceptions.RequestException as ex:
+                status = _status(ex)
+                if not self._failed(attempt, status, _unavailable(ex)):
+                    raise
+                delay = self.retry.backoff(attempt)
+                self._emit(RETRY, url=url, attempt=attempt, status=status,
+                           delay=delay)
+                time.sleep(delay)
+            except BaseException:
+                self._release()
+                raise
+            else:
+                if self.circuit_breaker is not None:
+                    self.circuit_breaker.record_success()
+                return response
+
+    def _fetch(self, endpoint, url, symbols, date=None):
+        """ Gets rates from the cache, or from Fixer.io on a cache miss.
+
+        :param endpoint: either ``LATEST`` or ``HISTORICAL``.
+        :type endpoint: str or unicode
+        :param url: the URL to request.
+        :type url: str or unicode
+        :param symbols: currency symbols to request specific exchange rates.
+        :type symbols: list or tuple
+        :param date: the date of historical rates in ISO 8601 format.
+        :type date: str or unicode
+        :return: the decoded response.
+        :rtype: dict
+        """
+        self._check_fork()
+        response = self._lookup(endpoint, symbols, date=date)
+        if response is not None:
+            return response
+        if self.snapshot is not None and self.snapshot.offline:
+            return self._offline(endpoint, symbols, date=date)
+
+        if self._batcher is not None and symbols is not None:
+            return self._batcher.do((url, self.base), symbols,
+                                    self._fetch_missing, endpoint, url,
+                                    date=date)
+        return self._fetch_missing(endpoint, url, symbols, date=date)
+
+    def _fetch_missing(self, endpoint, url, symbols, date=None):
+        """ Requests rates missing from the cache, or serves them stale
+        if Fixer.io cannot be requested. """
+        payload = self._create_payload(symbols)
+        try:
+            if not self.coalesce:
+                return self._fill(endpoint, url, payload, symbols, date)
+
+            return self._flights.do(flight_key(url, payload), self._fill,
+                                    endpoint, url, payload, symbols, date)
+        except (RateLimitExceeded, CircuitOpenError):
+            response = self._stale(endpoint, symbols, date=date)
+            if response is None:
+                raise
+            return response
+        except requests.exceptions.RequestException as ex:
+            response = None
+            if _unavailable(ex):
+                response = self._stale(endpoint, symbols, date=date,
+                                       cached=False)
+            if response is None:
+                raise
+            return response
+
+    def _fill(self, endpoint, url, payload, symbols, date):
+        """ Requests rates missing from the cache, unless another client of
+        a shared cache requests them meanwhile. """
+        lock = self._fill_lock(endpoint, symbols, date=date)
+        if lock is None:
+            return self._request(endpoint, url, payload, symbols, date)
+
+        while not lock.acquire() and not lock.timed_out:
+            time.sleep(lock.poll_interval)
+            response = self._lookup(endpoint, symbols, date=date)
+            if response is not None:
+                return response
+
+        try:
+            response = self._lookup(endpoint, symbols, date=date)
+            if response is not None:
+                return response
+            return self._request(endpoint, url, payload, symbols, date)
+        finally:
+            lock.release()
+
+    def _request(self, endpoint, url, payload, symbols, date):
+        """ Requests rates from Fixer.io and saves them. """
+        response = self._send(url, payload)
+
+        self._save(endpoint, response, symbols, date=date,
+                   validated_at=self._not_modified_at(url, payload))
+
+        return response
+
+    def _refresh(self, endpoint, symbols):
+        """ Requests the latest rates, bypassing the cache. """
+        self._check_fork()
+        try:
+            url = self.base_url + LATEST_PATH
+            payload = self._create_payload(symbols)
+
+            return self._flights.do(flight_key(url, payload), self._request,
+                                    endpoint, url, payload, symbols, None)
+        except requests.exceptions.RequestException as ex:
+            raise FixerioException(str(ex))
+
+    def start_refresher(self, symbols=None, **kwargs):
+        """ Starts refreshing the latest rates in a background thread.
+
+        Once started, :meth:`latest` serves the rates the refresher holds
+        without sending any request.
+
+        :param symbols: currency symbols to keep, the ones of the client by
+                        default.
+        :type symbols: list or tuple
+        :param kwargs: further arguments of
+                       :class:`fixerio.refresh.Refresher`.
+        :return: the running refresher.
+        :rtype: fixerio.refresh.Refresher
+        """
+        self.stop_refresher()
+        refresher = Refresher(self, symbols, **kwargs)
+        refresher.start()
+        self.refresher = refresher
+
+        return refresher
+
+    def stop_refresher(self):
+        """ Stops refreshing the latest rates in the background. """
+        refresher, self.refresher = self.refresher, None
+        if refresher is not None:
+            refresher.stop()
+
     def latest(self, symbols=None):
         """ Get the latest foreign exchange reference rates.
 
@@ -52,17 +865,17 @@ class Fixerio(object):
         :rtype: dict
         :raises FixerioException: if any error making a request.
         """
+        self._check_fork()
         try:
-            symbols = symbols or self.symbols
-            payload = self._create_payload(symbols)
-
-            url = BASE_URL + LATEST_PATH
+            symbols = SymbolSet.of(symbols) or self.symbols
 
-            response = requests.get(url, params=payload)
+            response = self._refreshed(symbols)
+            if response is not None:
+                return self._result(response)
 
-            response.raise_for_status()
+            url = self.base_url + LATEST_PATH
 
-            return response.json()
+            return self._result(self._fetch(LATEST, url, symbols))
         except requests.exceptions.RequestException as ex:
             raise FixerioException(str(ex))
 
@@ -78,20 +891,367 @@ class Fixerio(object):
         :rtype: dict
         :raises FixerioException: if any error making a request.
         """
+        return self._result(self._historical_rates(date, symbols))
+
+    def _historical_rates(self, date, symbols):
+        """ Gets historical rates as a decoded response. """
+        self._check_fork()
         try:
-            if isinstance(date, datetime.date):
-                # Convert date to ISO 8601 format.
-                date = date.isoformat()
+            date = _iso_date(date)
 
-            symbols = symbols or self.symbols
-            payload = self._create_payload(symbols)
+            symbols = SymbolSet.of(symbols) or self.symbols
+
+            url = self.base_url + date
 
-            url = BASE_URL + date
+            return self._fetch(HISTORICAL, url, symbols, date=date)
+        except requests.exceptions.RequestException as ex:
+            raise FixerioException(str(ex))
 
-            response = requests.get(url, params=payload)
+    def cross_rates(self, date=None):
+        """
+        Get the cross rates between every pair of currencies, computed from
+        a single snapshot of every rate against the base currency.
 
-            response.raise_for_status()
+        The snapshot is the latest rates, or the historical rates of `date`,
+        and is served from the cache or the store when possible.
 
-            return response.json()
+        :param date: a date, or ``None`` for the latest rates.
+        :type date: date or str
+        :rtype: fixerio.conversion.CrossRates
+        :raises FixerioException: if any error making a request.
+        """
+        from .conversion import CrossRates
+
+        try:
+            if date is None:
+                endpoint, url = LATEST, self.base_url + LATEST_PATH
+            else:
+                date = _iso_date(date)
+                endpoint, url = HISTORICAL, self.base_url + date
+
+            response = self._fetch(endpoint, url, None, date=date)
         except requests.exceptions.RequestException as ex:
             raise FixerioException(str(ex))
+        if not response.get('success', True):
+            raise FixerioException('No rates for {0}: {1}'.format(
+                date or LATEST, response.get('error')))
+
+        key = (date, response.get('date'), response.get('timestamp'),
+               response.get('base'))
+        with self._cross_rates_lock:
+            cross_rates = self._cross_rates.pop(key, None)
+            if cross_rates is None:
+                cross_rates = CrossRates(response)
+            self._cross_rates[key] = cross_rates
+            while len(self._cross_rates) > CROSS_RATES_SIZE:
+                self._cross_rates.popitem(last=False)
+
+        return cross_rates
+
+    def convert(self, amount, from_currency, to_currency, date=None):
+        """
+        Convert an amount, or an array of amounts, between two currencies.
+
+        Cross rates are computed locally, so any pair of currencies can be
+        converted whatever the base currency is.
+
+        :param amount: the amount or amounts to convert.
+        :type amount: float or list or tuple or numpy.ndarray
+        :param from_currency: the currency code to convert from.
+        :type from_currency: str or unicode
+        :param to_currency: the currency code to convert to.
+        :type to_currency: str or unicode
+        :param date: a date to convert at its historical rates, or ``None``
+                     for the latest rates.
+        :type date: date or str
+        :return: the converted amount or amounts.
+        :raises FixerioException: if any error making a request.
+        :raises KeyError: if any currency is not available.
+        """
+        return self.cross_rates(date).convert(amount, from_currency,
+                                              to_currency)
+
+    def historical_rates_range(self, start, end, symbols=None,
+                               workers=DEFAULT_WORKERS, skip_weekends=False,
+                               skip_holidays=False, timeseries=False):
+        """
+        Get historical rates for every day from `start` to `end`.
+
+        Dates which are cached or stored are not requested again, and the
+        rest are requested by a pool of `workers` threads. Rates are yielded
+        in date order as they arrive, holding a bounded number of responses
+        in memory however long the range is.
+
+        :param start: the first date.
+        :type start: date or str
+        :param end: the last date.
+        :type end: date or str
+        :param symbols: currency symbols to request specific exchange rates.
+        :type symbols: list or tuple
+        :param workers: number of requests to send in parallel.
+        :type workers: int
+        :param skip_weekends: whether to leave out Saturdays and Sundays.
+        :type skip_weekends: bool
+        :param skip_holidays: whether to leave out TARGET closing days, when
+                              the ECB publishes no rates.
+        :type skip_holidays: bool
+        :param timeseries: whether to request up to a year of rates at once
+                           from the timeseries endpoint, when your plan
+                           allows it.
+        :type timeseries: bool
+        :return: the historical rates of each day.
+        :rtype: generator
+        :raises FixerioException: if any error making a request.
+        """
+        responses = self._range(start, end, symbols, workers, skip_weekends,
+                                skip_holidays, timeseries)
+        if self.result_type == DICT:
+            return responses
+        return (self._result(response) for response in responses)
+
+    def _range(self, start, end, symbols=None, workers=DEFAULT_WORKERS,
+               skip_weekends=False, skip_holidays=False, timeseries=False):
+        """ Yields the decoded historical rates responses of a range. """
+        symbols = SymbolSet.of(symbols) or self.symbols
+        dates = (date.isoformat()
+                 for date in date_range(start, end, skip_weekends,
+                                        skip_holidays))
+
+        if timeseries:
+            return self._range_timeseries(dates, symbols)
+        return self._range_parallel(dates, symbols, workers)
+
+    def _range_parallel(self, dates, symbols, workers):
+        """ Yields the rates of `dates`, requesting them in parallel. """
+        from concurrent.futures import ThreadPoolExecutor
+
+        pending = collections.deque()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for date in dates:
+                response = self._lookup(HISTORICAL, symbols, date=date)
+                if response is None:
+                    response = executor.submit(self._historical_missing,
+                                               date, symbols)
+                pending.append(response)
+
+                # Bound the responses held in memory to a few per worker.
+                while len(pending) > 2 * workers:
+                    yield _result(pending.popleft())
+
+            while pending:
+                yield _result(pending.popleft())
+
+    def _historical_missing(self, date, symbols):
+        """ Gets historical rates already looked up in the cache and the
+        store, without looking them up again.
+
+        :param date: the date in ISO 8601 format.
+        :type date: str or unicode
+        :return: the decoded response.
+        :rtype: dict
+        :raises FixerioException: if any error making a request.
+        """
+        self._check_fork()
+        if self.snapshot is not None and self.snapshot.offline:
+            return self._offline(HISTORICAL, symbols, date=date)
+        try:
+            return self._fetch_missing(HISTORICAL, self.base_url + date,
+                                       symbols, date=date)
+        except requests.exceptions.RequestException as ex:
+            raise FixerioException(str(ex))
+
+    def _range_timeseries(self, dates, symbols):
+        """ Yields the rates of `dates`, requesting a year at a time. """
+        chunk = []
+        for date in dates:
+            if chunk and _days_between(chunk[0], date) >= TIMESERIES_MAX_DAYS:
+                for response in self._timeseries_chunk(chunk, symbols):
+                    yield response
+                chunk = []
+            chunk.append(date)
+
+        for response in self._timeseries_chunk(chunk, symbols):
+            yield response
+
+    def _timeseries_chunk(self, dates, symbols):
+        """ Gets the rates of `dates` with a single timeseries request.
+
+        Falls back to requesting each date if the timeseries endpoint fails,
+        as it is not available on every plan.
+        """
+        responses = [self._lookup(HISTORICAL, symbols, date=date)
+                     for date in dates]
+        missing = [date for date, response in zip(dates, responses)
+                   if response is None]
+
+        rates = {}
+        if missing:
+            try:
+                rates = self._timeseries(missing[0], missing[-1], symbols)
+            except requests.exceptions.RequestException as ex:
+                raise FixerioException(str(ex))
+
+        for date, response in zip(dates, responses):
+            if response is None:
+                response = rates.get(date)
+                if response is None:
+                    response = self._historical_missing(date, symbols)
+                else:
+                    self._save(HISTORICAL, response, symbols, date=date)
+            yield response
+
+    def _timeseries(self, start_date, end_date, symbols):
+        """ Requests the rates of a range of dates from the timeseries
+        endpoint.
+
+        :return: the historical rates response of each date, by date. It is
+                 empty if the endpoint is not available on your plan.
+        :rtype: dict
+        """
+        payload = dict(self._create_payload(symbols))
+        payload['start_date'] = start_date
+        payload['end_date'] = end_date
+
+        response = self._send(self.base_url + TIMESERIES_PATH, payload)
+        if not response.get('success', True):
+            return {}
+
+        base = response.get('base')
+        return dict(
+            (date, {'success': True, 'historical': True, 'date': date,
+                    'base': base, 'rates': rates})
+            for date, rates in response.get('rates', {}).items())
+
+    def sync(self, start, end, symbols=None, store=None,
+             workers=DEFAULT_WORKERS, skip_weekends=False,
+             skip_holidays=False):
+        """
+        Fetch the historical rates a store lacks from `start` to `end`.
+
+        Only the days missing from the store are requested, and for days
+        holding some of `symbols`, only the symbols they lack. Nothing is
+        written until every day has been fetched, and the rates are then
+        committed at once, under a single lock of each file of the store.
+
+        :param start: the first date.
+        :type start: date or str
+        :param end: the last date.
+        :type end: date or str
+        :param symbols: currency symbols to keep, ``None`` for all of them.
+        :type symbols: list or tuple
+        :param store: the store to fill, the store of the client by default.
+        :type store: fixerio.store.HistoricalStore
+        :param workers: number of requests to send in parallel.
+        :type workers: int
+        :param skip_weekends: whether to leave out Saturdays and Sundays.
+        :type skip_weekends: bool
+        :param skip_holidays: whether to leave out TARGET closing days, when
+                              the ECB publishes no rates.
+        :type skip_holidays: bool
+        :return: the number of days fetched.
+        :rtype: int
+        :raises ValueError: if there is no store to fill.
+        :raises FixerioException: if any error making a request, or if
+                                  Fixer.io has no rates for a day.
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        store = store or self.store
+        if store is None:
+            raise ValueError('No store to sync')
+        symbols = SymbolSet.of(symbols) or self.symbols
+
+        dates = date_range(start, end, skip_weekends, skip_holidays)
+        missing = store.missing(dates, base=self.base, symbols=symbols)
+        if not missing:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            responses = list(executor.map(self._sync_day, missing))
+        store.put_all(responses)
+
+        return len(responses)
+
+    def _sync_day(self, missing):
+        """ Requests the rates a stored day lacks.
+
+        :return: the response, whether it holds every currency and the
+                 symbols requested, as the store takes them.
+        :rtype: tuple
+        """
+        date, symbols = missing
+        date = date.isoformat()
+        symbols = SymbolSet.of(symbols)
+        try:
+            response = self._send(self.base_url + date,
+                                  self._create_payload(symbols))
+        except requests.exceptions.RequestException as ex:
+            raise FixerioException(str(ex))
+
+        if not response.get('success', True):
+            raise FixerioException('No rates for {0}: {1}'.format(
+                date, response.get('error')))
+        return response, symbols is None, symbols
+
+    def historical_rates_matrix(self, start, end, symbols=None, index=None,
+                                as_frame=False, **kwargs):
+        """
+        Get historical rates for every day from `start` to `end`, as a date
+        x currency matrix. It requires NumPy, and pandas if `as_frame`.
+
+        :param start: the first date.
+        :type start: date or str
+        :param end: the last date.
+        :type end: date or str
+        :param symbols: currency symbols to request specific exchange rates.
+        :type symbols: list or tuple
+        :param index: the currencies of the columns. By default, `symbols`
+                      or every currency.
+        :type index: fixerio.columnar.CurrencyIndex
+        :param as_frame: whether to return a DataFrame.
+        :type as_frame: bool
+        :param kwargs: further arguments of :meth:`historical_rates_range`.
+        :return: the historical rates of each day.
+        :rtype: fixerio.columnar.RateMatrix or pandas.DataFrame
+        :raises FixerioException: if any error making a request.
+        """
+        from .columnar import CurrencyIndex, RateMatrix
+
+        symbols = SymbolSet.of(symbols) or self.symbols
+        if index is None:
+            index = CurrencyIndex.for_symbols(symbols)
+
+        matrix = RateMatrix(index)
+        for response in self._range(start, end, symbols, **kwargs):
+            matrix.append_response(response)
+
+        if as_frame:
+            return matrix.to_frame()
+        return matrix
+
+
+def _status(ex):
+    """ Returns the HTTP status of a failed request, if there was a
+    response. """
+    response = getattr(ex, 'response', None)
+    if response is None:
+        return None
+    return response.status_code
+
+
+def _unavailable(ex):
+    """ Whether a request failed as Fixer.io could not be reached or
+    failed itself, rather than for being wrong. """
+    return isinstance(ex, _transient_errors()) or (_status(ex) or 0) >= 500
+
+
+def _result(pending):
+    """ Returns the response of a pending range request. """
+    if isinstance(pending, dict):
+        return pending
+    return pending.result()
+
+
+def _days_between(start, end):
+    return (datetime.datetime.strptime(end, '%Y-%m-%d') -
+            datetime.datetime.strptime(start, '%Y-%m-%d')).days
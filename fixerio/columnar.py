@@ -0,0 +1,397 @@
+"""
+Columnar results backed by NumPy arrays.
+
+This module requires NumPy, and :meth:`RateMatrix.to_frame` requires pandas.
+"""
+from __future__ import unicode_literals
+
+import datetime
+import numbers
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+from .currencies import CURRENCIES
+from .dates import to_date
+from .store import DEFAULT_BASE
+
+#: The proleptic Gregorian ordinal of the NumPy datetime64 epoch.
+_UNIX_EPOCH_ORDINAL = 719163
+
+_SECONDS_PER_DAY = 86400
+
+DEFAULT_CAPACITY = 256
+
+
+def _of_base(responses, base):
+    """ Filters the responses against `base`, EUR by default. """
+    base = base or DEFAULT_BASE
+    return (response for response in responses
+            if (response.get('base') or DEFAULT_BASE) == base)
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('Columnar results require numpy')
+
+
+class CurrencyIndex(object):
+    """ A fixed mapping of currency codes to array positions.
+
+    Indexes are interned, so every index of the same codes is the same
+    object and arrays aligned to it can be compared by identity.
+    """
+
+    _interned = {}
+    _lock = threading.Lock()
+
+    def __new__(cls, codes=CURRENCIES):
+        codes = tuple(codes)
+        with cls._lock:
+            index = cls._interned.get(codes)
+            if index is None:
+                index = super(CurrencyIndex, cls).__new__(cls)
+                index.codes = codes
+                index.positions = dict(
+                    (code, i) for i, code in enumerate(codes))
+                cls._interned[codes] = index
+        return index
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        return iter(self.codes)
+
+    def __contains__(self, code):
+        return code in self.positions
+
+    def __getitem__(self, code):
+        return self.positions[code]
+
+    def __repr__(self):
+        return 'CurrencyIndex({0!r})'.format(self.codes)
+
+    @classmethod
+    def for_symbols(cls, symbols=None):
+        """ Gets the index of `symbols`, or of every currency.
+
+        :param symbols: currency symbols.
+        :type symbols: list or tuple
+        :rtype: CurrencyIndex
+        """
+        if symbols is None:
+            return cls()
+        return cls(sorted(set(symbols)))
+
+    def fill(self, out, rates):
+        """ Writes `rates` into `out`, leaving unknown rates as ``NaN``.
+
+        Rates of codes out of the index are left out.
+
+        :param out: an array as long as the index.
+        :type out: numpy.ndarray
+        :param rates: rates by currency code.
+        :type rates: dict
+        """
+        out.fill(np.nan)
+        positions = self.positions
+        for code, rate in rates.items():
+            position = positions.get(code)
+            if position is not None:
+                out[position] = rate
+
+
+def rates_vector(response, index=None):
+    """ Converts the rates of a response to an array.
+
+    :param response: the decoded latest or historical rates response.
+    :type response: dict
+    :param index: the currencies to align the rates to, all of them by
+                  default.
+    :type index: CurrencyIndex
+    :return: a float64 array aligned to `index`, with ``NaN`` for the rates
+             missing in the response.
+    :rtype: numpy.ndarray
+    """
+    _require_numpy()
+    index = index or CurrencyIndex()
+
+    vector = np.empty(len(index), dtype=np.float64)
+    index.fill(vector, response.get('rates', {}))
+
+    return vector
+
+
+class RateMatrix(object):
+    """ A date x currency matrix of float64 rates, built a row at a time.
+
+    Rows are written straight into a preallocated array which grows
+    geometrically, so appending a day costs no intermediate containers.
+    """
+
+    def __init__(self, index=None, capacity=DEFAULT_CAPACITY):
+        """
+        :param index: the currencies of the columns, all of them by default.
+        :type index: CurrencyIndex
+        :param capacity: number of rows to preallocate.
+        :type capacity: int
+        """
+        _require_numpy()
+        self.index = index or CurrencyIndex()
+
+        self._values = np.empty((max(capacity, 1), len(self.index)),
+                                dtype=np.float64)
+        self._ordinals = np.empty(max(capacity, 1), dtype=np.int64)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self):
+        capacity = 2 * len(self._ordinals)
+        values = np.empty((capacity, len(self.index)), dtype=np.float64)
+        values[:self._size] = self._values[:self._size]
+        ordinals = np.empty(capacity, dtype=np.int64)
+        ordinals[:self._size] = self._ordinals[:self._size]
+
+        self._values, self._ordinals = values, ordinals
+
+    def append(self, date, rates):
+        """ Appends the rates of a day.
+
+        :param date: a date
+        :type date: date or str
+        :param rates: rates by currency code.
+        :type rates: dict
+        """
+        if self._size == len(self._ordinals):
+            self._grow()
+
+        self._ordinals[self._size] = to_date(date).toordinal()
+        self.index.fill(self._values[self._size], rates)
+        self._size += 1
+
+    def append_response(self, response):
+        """ Appends the rates of a historical rates response.
+
+        :param response: the decoded historical rates response.
+        :type response: dict
+        """
+        self.append(response['date'], response.get('rates', {}))
+
+    @property
+    def values(self):
+        """ The rates, as a ``(dates, currencies)`` float64 array. """
+        return self._values[:self._size]
+
+    @property
+    def dates(self):
+        """ The dates of the rows, as a ``datetime64[D]`` array. """
+        days = self._ordinals[:self._size] - _UNIX_EPOCH_ORDINAL
+        return days.astype('datetime64[D]')
+
+    @property
+    def currencies(self):
+        """ The currency codes of the columns. """
+        return self.index.codes
+
+    def as_of(self):
+        """ Indexes the rates by day, to look up the rates in force at any
+        time.
+
+        :rtype: AsOfIndex
+        """
+        return AsOfIndex(self)
+
+    def to_frame(self):
+        """ Converts the matrix to a DataFrame indexed by date.
+
+        :rtype: pandas.DataFrame
+        """
+        if pd is None:
+            raise ImportError('RateMatrix.to_frame() requires pandas')
+
+        return pd.DataFrame(self.values, index=pd.DatetimeIndex(self.dates),
+                            columns=list(self.currencies))
+
+
+def _ordinal(when):
+    """ Converts a POSIX time or a date to the ordinal of its UTC day. """
+    if isinstance(when, numbers.Real):
+        return int(when // _SECONDS_PER_DAY) + _UNIX_EPOCH_ORDINAL
+    return to_date(when).toordinal()
+
+
+class AsOfIndex(object):
+    """ The rates in force on every day from the first to the last day of a
+    history, for lookups of the rates as of any time without any I/O.
+
+    Rates are kept in one row per calendar day, so a lookup is an array
+    index rather than a search. Days without rates, such as weekends and
+    holidays, and rates missing from a day are filled forward from the last
+    day publishing them. Times after the last day get the rates of the last
+    day, and times before the first day get ``NaN``.
+    """
+
+    def __init__(self, matrix):
+        """
+        :param matrix: the rates of the history, in any order. Rates of the
+                       same day are merged.
+        :type matrix: RateMatrix
+        :raises ValueError: if the matrix is empty.
+        """
+        _require_numpy()
+        if not len(matrix):
+            raise ValueError('Cannot index an empty history')
+        self.index = matrix.index
+
+        ordinals = matrix._ordinals[:len(matrix)]
+        self.first = int(ordinals.min())
+        days = int(ordinals.max()) - self.first + 1
+
+        values = np.full((days, len(self.index)), np.nan)
+        for ordinal, row in zip(ordinals, matrix.values):
+            known = ~np.isnan(row)
+            values[ordinal - self.first, known] = row[known]
+
+        # The row each rate is filled forward from, per day and currency.
+        known = ~np.isnan(values)
+        rows = np.where(known, np.arange(days)[:, None], 0)
+        np.maximum.accumulate(rows, axis=0, out=rows)
+        # Columns are laid out contiguously, as lookups read one currency.
+        self._values = np.asfortranarray(
+            values[rows, np.arange(len(self.index))])
+
+        published = np.where(known.any(axis=1), np.arange(days), 0)
+        np.maximum.accumulate(published, out=published)
+        self._published = published + self.first
+
+    @classmethod
+    def from_responses(cls, responses, index=None):
+        """ Indexes historical rates responses against the same base
+        currency, such as the ones a client yields for a range of dates.
+        Use :meth:`from_store` and :meth:`from_snapshot` for the rates of a
+        store or a snapshot.
+
+        :param responses: the decoded historical rates responses.
+        :type responses: iterable
+        :param index: the currencies to index, all of them by default.
+        :type index: CurrencyIndex
+        :rtype: AsOfIndex
+        """
+        matrix = RateMatrix(index)
+        for response in responses:
+            matrix.append_response(response)
+        return cls(matrix)
+
+    @classmethod
+    def from_store(cls, store, base=None, index=None):
+        """ Indexes the rates of a historical store.
+
+        :param store: the store to read.
+        :type store: fixerio.store.HistoricalStore
+        :param base: the base currency, EUR by default.
+        :type base: str or unicode
+        :param index: the currencies to index, all of them by default.
+        :type index: CurrencyIndex
+        :rtype: AsOfIndex
+        """
+        return cls.from_responses(
+            _of_base((response for response, _ in store.responses()), base),
+            index)
+
+    @classmethod
+    def from_snapshot(cls, snapshot, base=None, index=None):
+        """ Indexes the latest and historical rates of a snapshot.
+
+        :param snapshot: the snapshot to read.
+        :type snapshot: fixerio.snapshot.Snapshot
+        :param base: the base currency, EUR by default.
+        :type base: str or unicode
+        :param index: the currencies to index, all of them by default.
+        :type index: CurrencyIndex
+        :rtype: AsOfIndex
+        """
+        return cls.from_responses(
+            _of_base((response for _, response, _ in snapshot.responses()),
+                     base),
+            index)
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def last(self):
+        """ The last day of the history. """
+        return datetime.date.fromordinal(self.first + len(self) - 1)
+
+    def _row(self, when):
+        """ The row of the day of `when`, or ``None`` before the first. """
+        row = _ordinal(when) - self.first
+        if row < 0:
+            return None
+        return min(row, len(self) - 1)
+
+    def date_as_of(self, when):
+        """ Gets the last day publishing rates on or before `when`.
+
+        :param when: a POSIX time, or a date.
+        :type when: float or date or str
+        :return: the day, or ``None`` if `when` is before the history.
+        :rtype: date
+        """
+        row = self._row(when)
+        if row is None:
+            return None
+        return datetime.date.fromordinal(int(self._published[row]))
+
+    def rate_as_of(self, when, code):
+        """ Gets the rate of a currency in force at `when`.
+
+        :param when: a POSIX time, or a date.
+        :type when: float or date or str
+        :param code: the currency code.
+        :type code: str or unicode
+        :return: the rate, or ``None`` if it is not known by then.
+        :rtype: float
+        :raises KeyError: if the currency is not indexed.
+        """
+        column = self.index[code]
+        row = self._row(when)
+        if row is None:
+            return None
+        rate = float(self._values[row, column])
+        return None if rate != rate else rate
+
+    def rates_as_of(self, when, code):
+        """ Gets the rates of a currency in force at many times at once.
+
+        :param when: POSIX times, or ``datetime64`` values.
+        :type when: numpy.ndarray
+        :param code: the currency code.
+        :type code: str or unicode
+        :return: a float64 array of the rates, ``NaN`` where they are not
+                 known by then.
+        :rtype: numpy.ndarray
+        :raises KeyError: if the currency is not indexed.
+        """
+        column = self._values[:, self.index[code]]
+        when = np.asarray(when)
+        if when.dtype.kind == 'M':
+            days = when.astype('datetime64[D]').astype(np.int64)
+        else:
+            days = np.floor_divide(when, _SECONDS_PER_DAY).astype(np.int64)
+        rows = days + (_UNIX_EPOCH_ORDINAL - self.first)
+
+        rates = column.take(np.clip(rows, 0, len(self) - 1))
+        rates[rows < 0] = np.nan
+        return rates
@@ -0,0 +1,129 @@
+from __future__ import unicode_literals
+
+import threading
+import time
+from collections import OrderedDict
+
+from .cache import _copy
+from .singleflight import flight_key
+
+DEFAULT_MAXSIZE = 256
+
+NOT_MODIFIED = 304
+
+
+class Validators(object):
+    """ The validators of the last response to a request, with the response
+    itself to answer a ``304 Not Modified`` with. """
+
+    __slots__ = ('etag', 'last_modified', 'response', 'not_modified_at')
+
+    def __init__(self, etag, last_modified, response):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.response = response
+        self.not_modified_at = None
+
+    @property
+    def headers(self):
+        """ The headers making a request conditional.
+
+        :rtype: dict
+        """
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified is not None:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ValidatorCache(object):
+    """ A thread-safe, size bounded LRU cache of the validators of the last
+    responses to requests.
+
+    Only responses carrying an ``ETag`` or a ``Last-Modified`` header are
+    kept, so that requesting them again can be made conditional and be
+    answered with an empty ``304 Not Modified``.
+    """
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, clock=time.time):
+        """
+        :param maxsize: maximum number of responses to keep.
+        :type maxsize: int
+        :param clock: a function returning the current POSIX time.
+        :type clock: callable
+        """
+        self.maxsize = maxsize
+        self.clock = clock
+
+        self.not_modified_count = 0
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, url, payload):
+        """ Gets the validators of the last response to a request.
+
+        :param url: the requested URL.
+        :type url: str or unicode
+        :param payload: the query string parameters.
+        :type payload: dict
+        :return: the validators, or ``None`` if there are none.
+        :rtype: Validators
+        """
+        key = flight_key(url, payload)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+            return entry
+
+    def update(self, url, payload, headers, response):
+        """ Keeps the validators of a response, if it has any, with a copy
+        of the response, as the caller gets the response itself.
+
+        :param headers: the headers of the response.
+        :type headers: dict
+        :param response: the decoded response.
+        :type response: dict
+        """
+        key = flight_key(url, payload)
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        with self._lock:
+            self._entries.pop(key, None)
+            if etag is None and last_modified is None:
+                return
+
+            self._entries[key] = Validators(etag, last_modified,
+                                            _copy(response))
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def not_modified(self, entry):
+        """ Answers a request from the response it was validated against.
+
+        :param entry: the validators the request was sent with.
+        :type entry: Validators
+        :return: a copy of the response.
+        :rtype: dict
+        """
+        entry.not_modified_at = self.clock()
+        with self._lock:
+            self.not_modified_count += 1
+        return _copy(entry.response)
+
+    def not_modified_at(self, url, payload):
+        """ Gets the time the last response to a request was found not
+        modified at.
+
+        :return: a POSIX time, or ``None`` if the last response was a full
+                 one.
+        :rtype: float
+        """
+        entry = self._entries.get(flight_key(url, payload))
+        return None if entry is None else entry.not_modified_at
@@ -0,0 +1,116 @@
+from __future__ import unicode_literals
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class CrossRates(object):
+    """ Cross rates between every pair of currencies of one rates snapshot.
+
+    The rate from a currency to another is computed locally as the rate of
+    the target divided by the rate of the source, both against the base of
+    the snapshot. Reciprocals are computed once, so a conversion costs a
+    multiplication and no requests.
+    """
+
+    def __init__(self, response):
+        """
+        :param response: the decoded latest or historical rates response.
+        :type response: dict
+        """
+        self.base = response['base']
+        self.date = response.get('date')
+        self.timestamp = response.get('timestamp')
+
+        rates = dict(response.get('rates', {}))
+        rates[self.base] = 1.0
+        self.rates = rates
+        self.reciprocals = dict(
+            (code, 1.0 / rate) for code, rate in rates.items() if rate)
+
+        if np is not None:
+            self.codes = tuple(sorted(rates))
+            self.positions = dict(
+                (code, i) for i, code in enumerate(self.codes))
+            self.vector = np.array([rates[code] for code in self.codes],
+                                   dtype=np.float64)
+            with np.errstate(divide='ignore'):
+                self.reciprocal_vector = 1.0 / self.vector
+
+    def rate(self, from_currency, to_currency):
+        """ Gets the rate to convert from a currency to another.
+
+        :param from_currency: the currency code to convert from.
+        :type from_currency: str or unicode
+        :param to_currency: the currency code to convert to.
+        :type to_currency: str or unicode
+        :rtype: float
+        :raises KeyError: if any currency is not in the snapshot.
+        """
+        if from_currency not in self.rates:
+            raise KeyError(from_currency)
+        if from_currency not in self.reciprocals:
+            raise ZeroDivisionError(
+                'The rate of {0} is zero'.format(from_currency))
+        return self.rates[to_currency] * self.reciprocals[from_currency]
+
+    def convert(self, amount, from_currency, to_currency):
+        """ Converts an amount, or an array of amounts, to another currency.
+
+        :param amount: the amount or amounts to convert.
+        :type amount: float or list or tuple or numpy.ndarray
+        :param from_currency: the currency code to convert from.
+        :type from_currency: str or unicode
+        :param to_currency: the currency code to convert to.
+        :type to_currency: str or unicode
+        :return: the converted amount, or amounts in the same type of
+                 container.
+        :raises KeyError: if any currency is not in the snapshot.
+        """
+        rate = self.rate(from_currency, to_currency)
+        if np is not None and isinstance(amount, np.ndarray):
+            return amount * rate
+        if isinstance(amount, (list, tuple)):
+            return type(amount)(value * rate for value in amount)
+        return amount * rate
+
+    def rebase(self, new_base):
+        """ Computes every rate against another base currency.
+
+        :param new_base: the currency code of the new base.
+        :type new_base: str or unicode
+        :return: a rates response against `new_base`.
+        :rtype: dict
+        :raises KeyError: if `new_base` is not in the snapshot.
+        """
+        if np is not None:
+            factor = self.reciprocal_vector[self.positions[new_base]]
+            rates = dict(zip(self.codes, (self.vector * factor).tolist()))
+        else:
+            factor = self.reciprocals[new_base]
+            rates = dict((code, rate * factor)
+                         for code, rate in self.rates.items())
+
+        response = {'success': True, 'base': new_base, 'rates': rates}
+        if self.date is not None:
+            response['date'] = self.date
+        if self.timestamp is not None:
+            response['timestamp'] = self.timestamp
+
+        return response
+
+
+def rebase(response, new_base):
+    """ Computes the rates of a response against another base currency.
+
+    :param response: the decoded latest or historical rates response.
+    :type response: dict
+    :param new_base: the currency code of the new base.
+    :type new_base: str or unicode
+    :return: a rates response against `new_base`.
+    :rtype: dict
+    :raises KeyError: if `new_base` is not in the response.
+    """
+    return CrossRates(response).rebase(new_base)
@@ -0,0 +1,95 @@
+from __future__ import unicode_literals
+
+import datetime
+
+ONE_DAY = datetime.timedelta(days=1)
+
+
+def to_date(value):
+    """ Converts a date in ISO 8601 format to a date.
+
+    :param value: a date
+    :type value: date or str
+    :rtype: date
+    """
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def easter_sunday(year):
+    """ Computes the date of Easter Sunday in the Gregorian calendar.
+
+    :param year: a year
+    :type year: int
+    :rtype: date
+    """
+    # Anonymous Gregorian algorithm (Meeus/Jones/Butcher).
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7  # noqa: E741
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+
+    return datetime.date(year, month, day + 1)
+
+
+def is_target_holiday(date):
+    """ Whether `date` is a TARGET closing day, when the ECB publishes no
+    reference rates.
+
+    :param date: a date
+    :type date: date
+    :rtype: bool
+    """
+    month_day = (date.month, date.day)
+    if month_day in ((1, 1), (12, 25)):
+        return True
+    if date.year < 2000:
+        return month_day == (12, 31)
+    if month_day in ((5, 1), (12, 26)):
+        return True
+    if date.year < 2002 and month_day == (12, 31):
+        return True
+
+    easter = easter_sunday(date.year)
+    return date in (easter - 2 * ONE_DAY, easter + ONE_DAY)
+
+
+def is_business_day(date):
+    """ Whether the ECB publishes reference rates on `date`.
+
+    :param date: a date
+    :type date: date
+    :rtype: bool
+    """
+    return date.weekday() < 5 and not is_target_holiday(date)
+
+
+def date_range(start, end, skip_weekends=False, skip_holidays=False):
+    """ Yields every date from `start` to `end`, both included.
+
+    :param start: the first date.
+    :type start: date or str
+    :param end: the last date.
+    :type end: date or str
+    :param skip_weekends: whether to leave out Saturdays and Sundays.
+    :type skip_weekends: bool
+    :param skip_holidays: whether to leave out TARGET closing days.
+    :type skip_holidays: bool
+    :rtype: generator
+    """
+    date = to_date(start)
+    end = to_date(end)
+    while date <= end:
+        if not ((skip_weekends and date.weekday() >= 5) or
+                (skip_holidays and is_target_holiday(date))):
+            yield date
+        date += ONE_DAY
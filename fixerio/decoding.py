@@ -0,0 +1,176 @@
+from __future__ import unicode_literals
+
+import json
+import threading
+from array import array
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+DICT = 'dict'
+SNAPSHOT = 'snapshot'
+
+RESULT_TYPES = (DICT, SNAPSHOT)
+
+
+def loads(data):
+    """ Decodes a JSON document, with ``orjson`` if it is installed.
+
+    :param data: a JSON document encoded in UTF-8.
+    :type data: bytes or str or unicode
+    :return: the decoded document.
+    :raises ValueError: if `data` is not valid JSON.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, bytes):
+        data = data.decode('utf-8')
+    return json.loads(data)
+
+
+_codes = {}
+_codes_lock = threading.Lock()
+
+
+def _intern_codes(codes):
+    """ Returns the canonical tuple of `codes` and the position of each
+    code, shared by every snapshot of the same currencies. """
+    codes = tuple(codes)
+    interned = _codes.get(codes)
+    if interned is None:
+        with _codes_lock:
+            positions = dict((code, i) for i, code in enumerate(codes))
+            interned = _codes.setdefault(codes, (codes, positions))
+    return interned
+
+
+class RateSnapshot(object):
+    """ A compact snapshot of rates against a base currency.
+
+    Rates are kept in a float64 array next to a tuple of their currency
+    codes, which is shared by every snapshot of the same currencies.
+    Snapshots are read like a mapping of codes to rates.
+
+    Snapshots are built from the decoded response, so they take longer to
+    create than the response dict and are slower to read rate by rate.
+    They are meant for keeping many responses in a fraction of the memory,
+    and for passing all the rates on as an array at once.
+    """
+
+    __slots__ = ('base', 'date', 'timestamp', 'historical', 'codes',
+                 'values', '_positions')
+
+    def __init__(self, base, date, rates, timestamp=None, historical=False):
+        """
+        :param base: the base currency.
+        :type base: str or unicode
+        :param date: the date of the rates in ISO 8601 format.
+        :type date: str or unicode
+        :param rates: rates by currency code.
+        :type rates: dict
+        :param timestamp: the POSIX time the rates were published at.
+        :type timestamp: int
+        :param historical: whether these are historical rates.
+        :type historical: bool
+        """
+        self.base = base
+        self.date = date
+        self.timestamp = timestamp
+        self.historical = historical
+        self.codes, self._positions = _intern_codes(rates)
+        self.values = array('d', rates.values())
+
+    @classmethod
+    def from_response(cls, response):
+        """ Creates a snapshot from a decoded response.
+
+        :param response: the decoded latest or historical rates response.
+        :type response: dict
+        :rtype: RateSnapshot
+        """
+        return cls(response.get('base'), response.get('date'),
+                   response.get('rates', {}),
+                   timestamp=response.get('timestamp'),
+                   historical=response.get('historical', False))
+
+    def __reduce__(self):
+        """ Pickles the rates, so that unpickled snapshots share the codes
+        of the process they are unpickled in. """
+        return RateSnapshot, (self.base, self.date, self.rates,
+                              self.timestamp, self.historical)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __iter__(self):
+        return iter(self.codes)
+
+    def __contains__(self, code):
+        return code in self._positions
+
+    def __getitem__(self, code):
+        return self.values[self._positions[code]]
+
+    def get(self, code, default=None):
+        """ Gets the rate of a currency, or `default` if it is missing. """
+        position = self._positions.get(code)
+        if position is None:
+            return default
+        return self.values[position]
+
+    def items(self):
+        """ Returns the ``(code, rate)`` pairs of the snapshot. """
+        return list(zip(self.codes, self.values))
+
+    @property
+    def rates(self):
+        """ The rates by currency code, as a new dict. """
+        return dict(zip(self.codes, self.values))
+
+    def to_dict(self):
+        """ Converts the snapshot to a response dict.
+
+        :rtype: dict
+        """
+        response = {'success': True, 'base': self.base, 'date': self.date,
+                    'rates': self.rates}
+        if self.timestamp is not None:
+            response['timestamp'] = self.timestamp
+        if self.historical:
+            response['historical'] = True
+        return response
+
+    def __eq__(self, other):
+        if not isinstance(other, RateSnapshot):
+            return NotImplemented
+        return (self.base == other.base and self.date == other.date and
+                self.timestamp == other.timestamp and
+                self.rates == other.rates)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'RateSnapshot(base={0!r}, date={1!r}, {2} rates)'.format(
+            self.base, self.date, len(self))
+
+
+def decode(response, result_type=DICT):
+    """ Converts a decoded response to the requested result type.
+
+    :param response: the decoded response.
+    :type response: dict
+    :param result_type: either :data:`DICT` or :data:`SNAPSHOT`.
+    :type result_type: str or unicode
+    :rtype: dict or RateSnapshot
+    """
+    if result_type == SNAPSHOT and 'rates' in response:
+        return RateSnapshot.from_response(response)
+    return response
@@ -1,3 +1,19 @@
 class FixerioException(BaseException):
     """ Common base class for all fixerio exceptions. """
     pass
+
+
+class RateLimitExceeded(FixerioException):
+    """ Raised instead of sending a request beyond the rate limit or the
+    quota. """
+    pass
+
+
+class CircuitOpenError(FixerioException):
+    """ Raised instead of sending a request while Fixer.io is failing. """
+    pass
+
+
+class CacheBackendError(FixerioException):
+    """ Raised when a shared cache backend cannot be reached. """
+    pass
@@ -0,0 +1,348 @@
+"""
+Streams historical rates of a range of dates to CSV, Arrow IPC or Parquet.
+
+Run it with ``python -m fixerio.export START END PATH``.
+"""
+from __future__ import print_function, unicode_literals
+
+import argparse
+import io
+import os
+import sys
+
+try:
+    import pyarrow as pa
+    from pyarrow import ipc, parquet
+except ImportError:
+    pa = ipc = parquet = None
+
+from .client import DEFAULT_WORKERS, Fixerio
+from .currencies import CURRENCIES
+from .dates import ONE_DAY, to_date
+from .exceptions import FixerioException
+from .symbols import SymbolSet
+
+CSV = 'csv'
+ARROW = 'arrow'
+PARQUET = 'parquet'
+FORMATS = (CSV, ARROW, PARQUET)
+
+EXTENSIONS = {'.csv': CSV, '.arrow': ARROW, '.feather': ARROW,
+              '.ipc': ARROW, '.parquet': PARQUET}
+
+#: Days of rates written at once, and held in memory until then.
+DEFAULT_ROW_GROUP_SIZE = 128
+
+# The last line of a CSV file is searched for in this many trailing bytes.
+_TAIL_SIZE = 64 * 1024
+
+
+def guess_format(path):
+    """ Guesses the format to export to from the extension of a path.
+
+    :rtype: str or unicode
+    :raises ValueError: if the extension is unknown.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXTENSIONS:
+        raise ValueError('Unknown export format: {0}'.format(path))
+    return EXTENSIONS[extension]
+
+
+class CsvWriter(object):
+    """ Appends rows to a CSV file, one line per day.
+
+    Each group of rows is flushed to disk once written. A line cut short by
+    an interrupted export is dropped when resuming.
+    """
+
+    def __init__(self, path, columns):
+        """
+        :param path: the file to write.
+        :type path: str or unicode
+        :param columns: the currency codes to write a column for.
+        :type columns: list or tuple
+        """
+        self.path = path
+        self.header = ','.join(('date', 'base') + tuple(columns))
+        self._file = None
+
+    def last_date(self):
+        """ Returns the date of the last line written, dropping any
+        incomplete line after it.
+
+        :return: the date in ISO 8601 format, or ``None`` if there is none.
+        :rtype: str or unicode
+        :raises ValueError: if the file has other columns.
+        """
+        if not os.path.exists(self.path):
+            return None
+
+        with io.open(self.path, 'r+b') as f:
+            header = f.readline().rstrip(b'\r\n').decode('ascii')
+            if header and header != self.header:
+                raise ValueError('{0} has other columns'.format(self.path))
+
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - _TAIL_SIZE))
+            tail = f.read()
+            end = tail.rfind(b'\n') + 1
+            f.truncate(size - len(tail) + end)
+
+        lines = tail[:end].splitlines()
+        if not lines or lines[-1].decode('ascii') == self.header:
+            return None
+        return lines[-1].split(b',', 1)[0].decode('ascii')
+
+    def write(self, rows):
+        """ Appends rows and flushes them to disk.
+
+        :param rows: tuples of a date, a base currency and the rate of each
+                     column, ``None`` where unknown.
+        :type rows: list
+        """
+        if self._file is None:
+            self._file = io.open(self.path, 'ab')
+            if self._file.tell() == 0:
+                self._file.write(self.header.encode('ascii') + b'\n')
+
+        lines = []
+        for date, base, values in rows:
+            cells = [date.isoformat(), base]
+            cells.extend('' if value is None else repr(value)
+                         for value in values)
+            lines.append(','.join(cells))
+        self._file.write('\n'.join(lines).encode('ascii') + b'\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class PartsWriter(object):
+    """ Writes each group of rows to its own Arrow IPC or Parquet file, in a
+    directory readable as a single dataset.
+
+    Parts are named after their first date and replaced atomically, so an
+    interrupted export leaves no partial part behind.
+    """
+
+    def __init__(self, path, columns, format=PARQUET):
+        """
+        :param path: the directory to write the parts in.
+        :type path: str or unicode
+        :param columns: the currency codes to write a column for.
+        :type columns: list or tuple
+        :param format: either :data:`ARROW` or :data:`PARQUET`.
+        :type format: str or unicode
+        """
+        if pa is None:
+            raise ImportError('Exporting to {0} requires pyarrow'.format(
+                format))
+
+        self.path = path
+        self.columns = tuple(columns)
+        self.format = format
+        self.schema = pa.schema(
+            [('date', pa.date32()), ('base', pa.string())] +
+            [(code, pa.float64()) for code in self.columns])
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def _parts(self):
+        return sorted(name for name in os.listdir(self.path)
+                      if name.startswith('part-') and
+                      name.endswith('.' + self.format))
+
+    def _read(self, path):
+        if self.format == PARQUET:
+            return parquet.read_table(path)
+        with pa.memory_map(path) as source:
+            return ipc.open_file(source).read_all()
+
+    def last_date(self):
+        """ Returns the last date written.
+
+        :return: the date in ISO 8601 format, or ``None`` if there is none.
+        :rtype: str or unicode
+        :raises ValueError: if the parts have other columns.
+        """
+        parts = self._parts()
+        if not parts:
+            return None
+
+        table = self._read(os.path.join(self.path, parts[-1]))
+        if not table.schema.equals(self.schema):
+            raise ValueError('{0} has other columns'.format(self.path))
+        return table.column('date')[-1].as_py().isoformat()
+
+    def write(self, rows):
+        """ Writes rows as a new part.
+
+        :param rows: tuples of a date, a base currency and the rate of each
+                     column, ``None`` where unknown.
+        :type rows: list
+        """
+        dates, bases, values = zip(*rows)
+        arrays = [pa.array(dates, pa.date32()), pa.array(bases, pa.string())]
+        arrays.extend(pa.array(column, pa.float64())
+                      for column in zip(*values))
+        table = pa.Table.from_arrays(arrays, schema=self.schema)
+
+        path = os.path.join(self.path, 'part-{0}.{1}'.format(
+            dates[0].isoformat(), self.format))
+        tmp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+        if self.format == PARQUET:
+            parquet.write_table(table, tmp_path)
+        else:
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with ipc.new_file(sink, self.schema) as writer:
+                    writer.write_table(table)
+        os.rename(tmp_path, path)
+
+    def close(self):
+        pass
+
+
+def _row(response, columns):
+    """ Converts a historical rates response to a row. """
+    if not response.get('success', True):
+        raise FixerioException('No rates for {0}: {1}'.format(
+            response.get('date'), response.get('error')))
+
+    rates = response['rates']
+    return (to_date(response['date']), response['base'],
+            [rates.get(code) for code in columns])
+
+
+def export(client, path, start, end, symbols=None, format=None,
+           resume=True, row_group_size=DEFAULT_ROW_GROUP_SIZE,
+           workers=DEFAULT_WORKERS, **kwargs):
+    """ Streams the historical rates of every day from `start` to `end` to a
+    file.
+
+    Rates are requested in parallel and written in date order, a group of
+    `row_group_size` days at a time, so memory use does not grow with the
+    range. An interrupted export resumes after the last date written.
+
+    :param client: the client to request rates with.
+    :type client: fixerio.client.Fixerio
+    :param path: the CSV file to write, or the directory to write Arrow IPC
+                 or Parquet parts in.
+    :type path: str or unicode
+    :param start: the first date.
+    :type start: date or str
+    :param end: the last date.
+    :type end: date or str
+    :param symbols: currency symbols to export, those of the client or all
+                    of them by default.
+    :type symbols: list or tuple
+    :param format: one of :data:`FORMATS`, guessed from the extension of
+                   `path` by default.
+    :type format: str or unicode
+    :param resume: whether to skip the dates already written, instead of
+                   refusing to write over them.
+    :type resume: bool
+    :param row_group_size: days written at once.
+    :type row_group_size: int
+    :param workers: number of requests to send in parallel.
+    :type workers: int
+    :param kwargs: further arguments of
+                   :meth:`fixerio.client.Fixerio.historical_rates_range`.
+    :return: the number of days written.
+    :rtype: int
+    :raises FixerioException: if any error making a request.
+    :raises ValueError: if `path` holds other columns, or holds dates and
+                        `resume` is false.
+    """
+    format = format or guess_format(path)
+    symbols = SymbolSet.of(symbols)
+    columns = tuple(symbols or client.symbols or CURRENCIES)
+    if format == CSV:
+        writer = CsvWriter(path, columns)
+    else:
+        writer = PartsWriter(path, columns, format)
+
+    start = to_date(start)
+    last_date = writer.last_date()
+    if last_date is not None:
+        if not resume:
+            raise ValueError('{0} already holds rates'.format(path))
+        start = max(start, to_date(last_date) + ONE_DAY)
+    if start > to_date(end):
+        return 0
+
+    written = 0
+    rows = []
+    try:
+        # The responses are read as dicts, whatever the result type of the
+        # client.
+        for response in client._range(start, end, symbols=symbols,
+                                      workers=workers, **kwargs):
+            rows.append(_row(response, columns))
+            if len(rows) >= row_group_size:
+                writer.write(rows)
+                written += len(rows)
+                rows = []
+        if rows:
+            writer.write(rows)
+            written += len(rows)
+    finally:
+        writer.close()
+
+    return written
+
+
+def parser():
+    """ Creates the parser of the command-line arguments. """
+    parser = argparse.ArgumentParser(
+        description='Export historical rates of a range of dates.')
+    parser.add_argument('start', help='the first date, as YYYY-MM-DD')
+    parser.add_argument('end', help='the last date, as YYYY-MM-DD')
+    parser.add_argument('path', help='a .csv file, or a .arrow or .parquet '
+                                     'directory')
+    parser.add_argument('--access-key',
+                        default=os.environ.get('FIXERIO_ACCESS_KEY'),
+                        help='your API key, $FIXERIO_ACCESS_KEY by default')
+    parser.add_argument('--symbols', type=lambda s: s.split(','),
+                        help='comma-separated currency symbols')
+    parser.add_argument('--base', help='the base currency')
+    parser.add_argument('--format', choices=FORMATS)
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS)
+    parser.add_argument('--row-group-size', type=int,
+                        default=DEFAULT_ROW_GROUP_SIZE)
+    parser.add_argument('--skip-weekends', action='store_true')
+    parser.add_argument('--skip-holidays', action='store_true')
+    parser.add_argument('--timeseries', action='store_true',
+                        help='request a year at a time, if your plan '
+                             'allows it')
+    parser.add_argument('--no-resume', dest='resume', action='store_false',
+                        help='fail instead of resuming an export')
+    return parser
+
+
+def main(args=None):
+    options = parser().parse_args(args)
+    if not options.access_key:
+        parser().error('an access key is required')
+
+    with Fixerio(options.access_key, base=options.base) as client:
+        written = export(client, options.path, options.start, options.end,
+                         symbols=options.symbols, format=options.format,
+                         resume=options.resume,
+                         row_group_size=options.row_group_size,
+                         workers=options.workers,
+                         skip_weekends=options.skip_weekends,
+                         skip_holidays=options.skip_holidays,
+                         timeseries=options.timeseries)
+    print('{0} days written to {1}'.format(written, options.path),
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+from __future__ import unicode_literals
+
+import logging
+import re
+import threading
+import time
+import traceback
+
+from .lazy import optional_import
+
+logger = logging.getLogger(__name__)
+
+timer = getattr(time, 'perf_counter', time.time)
+
+#: A response was received, with the timings of each of its phases.
+REQUEST = 'request'
+#: A request failed, before or after a response was received.
+REQUEST_ERROR = 'request_error'
+#: A failed request is about to be retried.
+RETRY = 'retry'
+#: Rates were served from the cache, the store or the refresher.
+CACHE_HIT = 'cache_hit'
+#: Rates had to be requested.
+CACHE_MISS = 'cache_miss'
+#: Expired rates were served as Fixer.io could not be requested.
+STALE_HIT = 'stale_hit'
+#: A request was counted against the quota.
+QUOTA = 'quota'
+
+EVENTS = (REQUEST, REQUEST_ERROR, RETRY, CACHE_HIT, CACHE_MISS, STALE_HIT,
+          QUOTA)
+
+#: The timed phases of a request, in seconds.
+PHASES = ('queue', 'dns', 'connect', 'ttfb', 'download', 'decode',
+          'duration')
+
+_LOOKUP_RESULTS = {CACHE_HIT: 'hit', CACHE_MISS: 'miss', STALE_HIT: 'stale'}
+
+# The access key in the URLs quoted by request errors.
+_ACCESS_KEY = re.compile(r'(access_key=)[^&\s\'"]+')
+
+
+def _redact(text):
+    """ Hides the access key in a text, such as the message of an error
+    quoting the URL requested. """
+    return _ACCESS_KEY.sub(r'\1REDACTED', text)
+
+
+class Instrumentation(object):
+    """ Dispatches the events of a client to subscribed callbacks.
+
+    Callbacks are called in the thread, or the task, the event happened in,
+    with the name of the event and a dict of its fields. A client without
+    instrumentation neither times nor builds any event.
+
+    The fields of :data:`REQUEST` events are ``url``, ``status``, ``bytes``,
+    ``attempt``, ``started_at`` (a POSIX time) and the seconds spent in each
+    of the :data:`PHASES`: waiting for the rate limiter or a free slot,
+    resolving the host and connecting (``None`` where they cannot be told
+    apart from the time to first byte), up to the first byte of the
+    response, downloading and decoding the body, and overall.
+    :data:`REQUEST_ERROR` events have ``url``, ``status``, ``attempt``,
+    ``started_at``, ``duration`` and ``error``, whose message may quote the
+    URL requested, access key included.
+
+    :data:`RETRY` events have ``url``, ``attempt``, ``status`` and
+    ``delay``. :data:`CACHE_HIT` events have ``endpoint``, ``date`` and
+    ``source``, one of ``'cache'``, ``'store'``, ``'snapshot'`` or
+    ``'refresher'``, while :data:`CACHE_MISS` and :data:`STALE_HIT` events
+    have ``endpoint`` and ``date``. :data:`QUOTA` events have ``used`` and
+    ``remaining``.
+    """
+
+    def __init__(self):
+        self._callbacks = dict((event, ()) for event in EVENTS)
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback, events=EVENTS):
+        """ Calls `callback` on every one of `events`.
+
+        :param callback: a function taking the name of an event and its
+                         fields.
+        :type callback: callable
+        :param events: names of the events to subscribe to, all of them by
+                       default.
+        :type events: list or tuple
+        """
+        with self._lock:
+            for event in events:
+                self._callbacks[event] += (callback,)
+
+    def unsubscribe(self, callback):
+        """ Stops calling `callback`. """
+        with self._lock:
+            for event, callbacks in self._callbacks.items():
+                self._callbacks[event] = tuple(c for c in callbacks
+                                               if c != callback)
+
+    def emit(self, event, **data):
+        """ Calls the callbacks subscribed to an event.
+
+        Errors of the callbacks are logged, so they never fail a request.
+
+        :param event: the name of the event.
+        :type event: str or unicode
+        """
+        for callback in self._callbacks[event]:
+            try:
+                callback(event, data)
+            except Exception:
+                logger.exception('Instrumentation callback failed')
+
+
+class PrometheusMetrics(object):
+    """ Records the events of a client as Prometheus counters, histograms
+    and gauges. Requires ``prometheus_client``. """
+
+    def __init__(self, instrumentation, registry=None, namespace='fixerio'):
+        """
+        :param instrumentation: the instrumentation of the client.
+        :type instrumentation: Instrumentation
+        :param registry: the registry to register the metrics in, the
+                         default one of ``prometheus_client`` if not passed.
+        :type registry: prometheus_client.CollectorRegistry
+        :param namespace: the prefix of the names of the metrics.
+        :type namespace: str or unicode
+        """
+        prometheus_client = optional_import('prometheus_client')
+        if prometheus_client is None:
+            raise ImportError('PrometheusMetrics requires prometheus_client')
+
+        options = {'namespace': namespace,
+                   'registry': registry or prometheus_client.REGISTRY}
+        self.requests = prometheus_client.Counter(
+            'requests', 'Responses received from Fixer.io.', ['status'],
+            **options)
+        self.errors = prometheus_client.Counter(
+            'request_errors', 'Failed requests to Fixer.io.', **options)
+        self.seconds = prometheus_client.Histogram(
+            'request_phase_seconds', 'Seconds spent in each phase of the '
+            'requests to Fixer.io.', ['phase'], **options)
+        self.bytes = prometheus_client.Counter(
+            'response_bytes', 'Bytes of the bodies of the responses.',
+            **options)
+        self.lookups = prometheus_client.Counter(
+            'cache_lookups', 'Lookups of rates before requesting them.',
+            ['result'], **options)
+        self.retries = prometheus_client.Counter(
+            'retries', 'Retried requests.', **options)
+        self.quota_used = prometheus_client.Gauge(
+            'quota_used', 'Requests counted against the quota.', **options)
+        self.quota_remaining = prometheus_client.Gauge(
+            'quota_remaining', 'Requests left in the quota.', **options)
+
+        instrumentation.subscribe(self.record)
+
+    def record(self, event, data):
+        if event == REQUEST:
+            self.requests.labels(status=str(data['status'])).inc()
+            self.bytes.inc(data['bytes'])
+            for phase in PHASES:
+                if data[phase] is not None:
+                    self.seconds.labels(phase=phase).observe(data[phase])
+        elif event == REQUEST_ERROR:
+            self.errors.inc()
+        elif event == RETRY:
+            self.retries.inc()
+        elif event in _LOOKUP_RESULTS:
+            self.lookups.labels(result=_LOOKUP_RESULTS[event]).inc()
+        elif event == QUOTA:
+            self.quota_used.set(data['used'])
+            self.quota_remaining.set(data['remaining'])
+
+
+class OpenTelemetrySpans(object):
+    """ Records each request of a client as an OpenTelemetry span, a child
+    of the span current when the request was sent. Requires
+    ``opentelemetry-api`` unless a tracer is passed. """
+
+    def __init__(self, instrumentation, tracer=None):
+        """
+        :param instrumentation: the instrumentation of the client.
+        :type instrumentation: Instrumentation
+        :param tracer: the tracer to start spans with, the one of the global
+                       tracer provider if not passed.
+        :type tracer: opentelemetry.trace.Tracer
+        """
+        if tracer is None:
+            trace = optional_import('opentelemetry.trace')
+            if trace is None:
+                raise ImportError('OpenTelemetrySpans requires '
+                                  'opentelemetry-api')
+            tracer = trace.get_tracer(__name__)
+        self.tracer = tracer
+
+        instrumentation.subscribe(self.record, (REQUEST, REQUEST_ERROR))
+
+    def record(self, event, data):
+        start = int(data['started_at'] * 10 ** 9)
+        attributes = {'http.method': 'GET', 'http.url': data['url'],
+                      'fixerio.attempt': data['attempt']}
+        if data['status'] is not None:
+            attributes['http.status_code'] = data['status']
+        if event == REQUEST:
+            attributes['fixerio.response_bytes'] = data['bytes']
+            for phase in PHASES:
+                if data[phase] is not None:
+                    attributes['fixerio.{0}_seconds'.format(phase)] = \
+                        data[phase]
+
+        span = self.tracer.start_span('fixerio GET', start_time=start,
+                                      attributes=attributes)
+        if event == REQUEST_ERROR:
+            error = data['error']
+            message = _redact(str(error))
+            stacktrace = ''.join(traceback.format_exception(
+                type(error), error, getattr(error, '__traceback__', None)))
+            span.record_exception(error, attributes={
+                'exception.message': message,
+                'exception.stacktrace': _redact(stacktrace)})
+            trace = optional_import('opentelemetry.trace')
+            if trace is not None:
+                span.set_status(trace.Status(trace.StatusCode.ERROR,
+                                             message))
+        span.end(end_time=start + int(data['duration'] * 10 ** 9))
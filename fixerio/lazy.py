@@ -0,0 +1,53 @@
+"""
+Imports of dependencies deferred to their first use.
+
+``import fixerio`` only loads the standard library, so processes serving
+rates from a cache or a store never pay for importing ``requests``,
+``aiohttp``, NumPy or the metrics libraries.
+"""
+from __future__ import unicode_literals
+
+import importlib
+import sys
+
+_missing = set()
+
+
+def optional_import(name):
+    """ Imports an optional dependency, trying only once if it is not
+    installed.
+
+    :param name: the absolute name of the module.
+    :type name: str or unicode
+    :return: the module, or ``None`` if it is not installed.
+    """
+    module = sys.modules.get(name)
+    if module is not None or name in _missing:
+        return module
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        _missing.add(name)
+        return None
+
+
+class LazyModule(object):
+    """ Stands for a module, imported on the first access to any of its
+    attributes. """
+
+    def __init__(self, name):
+        """
+        :param name: the absolute name of the module.
+        :type name: str or unicode
+        """
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        # Only called for attributes of the module, missing from this object.
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        return '<LazyModule {0!r}>'.format(self._name)
@@ -0,0 +1,56 @@
+from __future__ import unicode_literals
+
+import os
+import threading
+import weakref
+
+try:
+    import fcntl
+except ImportError:  # For Windows
+    fcntl = None
+
+# The objects whose locks are created again in forked processes.
+_forkable = weakref.WeakSet()
+
+
+def reset_after_fork(obj):
+    """ Creates the ``_lock`` of `obj` again in processes forked from this
+    one, which would otherwise inherit it held if another thread held it at
+    the time of the fork. It is a no-op where ``os.register_at_fork`` is not
+    available (before Python 3.7).
+
+    :param obj: an object with a ``_lock`` attribute.
+    :return: `obj`.
+    """
+    _forkable.add(obj)
+    return obj
+
+
+def _reset_locks():
+    for obj in list(_forkable):
+        obj._lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_locks)
+
+
+class FileLock(object):
+    """ An exclusive advisory lock on an open file, shared between
+    processes. It is a no-op where ``fcntl`` is not available. """
+
+    def __init__(self, fd):
+        """
+        :param fd: the descriptor of the file to lock.
+        :type fd: int
+        """
+        self.fd = fd
+
+    def __enter__(self):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *args):
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
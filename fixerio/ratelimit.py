@@ -0,0 +1,274 @@
+from __future__ import unicode_literals
+
+import errno
+import json
+import os
+import threading
+import time
+
+from .exceptions import FixerioException, RateLimitExceeded
+from .locking import FileLock, reset_after_fork
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+
+def current_month():
+    """ Returns the current calendar month in UTC, as ``YYYY-MM``. """
+    return time.strftime('%Y-%m', time.gmtime())
+
+
+class TokenBucket(object):
+    """ A token bucket refilled at `rate` tokens per second, holding up to
+    `capacity` tokens. """
+
+    def __init__(self, rate, capacity, clock=_monotonic):
+        """
+        :param rate: tokens added per second.
+        :type rate: float
+        :param capacity: maximum number of tokens, which is the size of the
+                         largest burst.
+        :type capacity: int
+        :param clock: a function returning monotonic seconds.
+        :type clock: callable
+        """
+        self.rate = float(rate)
+        self.capacity = capacity
+        self.clock = clock
+
+        self._tokens = float(capacity)
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+        reset_after_fork(self)
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.capacity,
+                           self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    @property
+    def tokens(self):
+        """ The tokens currently available, negative while some are
+        reserved ahead. """
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def reserve(self, max_wait=0):
+        """ Takes a token, now or as soon as one is available.
+
+        :param max_wait: the longest wait, in seconds, acceptable to get a
+                         token.
+        :type max_wait: float
+        :return: seconds to wait before using the token, or ``None`` if no
+                 token will be available within `max_wait`, in which case
+                 nothing is taken.
+        :rtype: float
+        """
+        with self._lock:
+            self._refill()
+            wait = max(0.0, (1 - self._tokens) / self.rate)
+            if wait > max_wait:
+                return None
+
+            self._tokens -= 1
+            return wait
+
+    def refund(self):
+        """ Gives back a token taken by :meth:`reserve` for a request which
+        is not sent after all. """
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+
+class QuotaTracker(object):
+    """ Counts the requests sent in the current period against a quota.
+
+    If a path is given, the count is kept in that file, so it survives
+    restarts and is shared by every process using it. The file is replaced
+    atomically on writes, under a lock file next to it.
+    """
+
+    def __init__(self, limit, path=None, period=current_month):
+        """
+        :param limit: maximum number of requests per period.
+        :type limit: int
+        :param path: the file to keep the count in.
+        :type path: str or unicode
+        :param period: a function returning the current period, which
+                       resets the count whenever it changes. Calendar
+                       months by default.
+        :type period: callable
+        """
+        self.limit = limit
+        self.path = path
+        self.period = period
+
+        self._current = period()
+        self._used = 0
+        self._lock = threading.Lock()
+        reset_after_fork(self)
+
+    def _read(self):
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except (IOError, OSError) as ex:
+            if ex.errno == errno.ENOENT:
+                return 0
+            raise
+
+        try:
+            state = json.loads(data.decode('utf-8')) if data else {}
+            if state.get('period') == self.period():
+                return int(state['used'])
+        except (AttributeError, KeyError, TypeError, ValueError) as ex:
+            raise FixerioException('Cannot read the quota used from '
+                                   '{0}: {1}'.format(self.path, ex))
+        return 0
+
+    def _write(self, used):
+        data = json.dumps({'period': self.period(), 'used': used})
+        tmp_path = '{0}.{1}.tmp'.format(self.path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            f.write(data.encode('utf-8'))
+        os.rename(tmp_path, self.path)
+
+    def _update(self, count):
+        """ Adds `count` requests, if they fit, holding the lock.
+
+        The count is read and added to under the same file lock, so that
+        processes sharing the file never use more than the quota between
+        them.
+
+        :return: the requests used so far, and whether `count` was added.
+        :rtype: tuple
+        :raises FixerioException: if the file holds no valid count.
+        """
+        if self.path is None:
+            period = self.period()
+            if period != self._current:
+                self._current, self._used = period, 0
+            added = self._used + count <= self.limit
+            if count and added:
+                self._used += count
+            return self._used, added
+
+        fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        with os.fdopen(fd, 'r+b') as f:
+            with FileLock(f.fileno()):
+                used = self._read()
+                added = used + count <= self.limit
+                if count and added:
+                    used += count
+                    self._write(used)
+        return used, added
+
+    @property
+    def used(self):
+        """ The requests sent in the current period. """
+        with self._lock:
+            return self._update(0)[0]
+
+    @property
+    def remaining(self):
+        """ The requests left in the current period. """
+        return max(0, self.limit - self.used)
+
+    def consume(self, count=1):
+        """ Counts requests, if they are within the quota.
+
+        :param count: number of requests.
+        :type count: int
+        :return: whether the requests are within the quota.
+        :rtype: bool
+        :raises FixerioException: if the file of the count is unreadable.
+        """
+        with self._lock:
+            return self._update(count)[1]
+
+
+class RateLimiter(object):
+    """ Schedules requests within the rate limit and the quota of a plan.
+
+    Each access key has its own token bucket. A request waits for a token up
+    to `max_wait` seconds, and is rejected at once if it would have to wait
+    longer or if the quota is used up.
+    """
+
+    def __init__(self, rate, burst=1, max_wait=0, quota=None):
+        """
+        :param rate: requests per second allowed.
+        :type rate: float
+        :param burst: maximum number of requests sent at once.
+        :type burst: int
+        :param max_wait: the longest a request may wait for its turn, in
+                         seconds.
+        :type max_wait: float
+        :param quota: the quota of requests to count requests against.
+        :type quota: QuotaTracker
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_wait = max_wait
+        self.quota = quota
+
+        self.rejected = 0
+
+        self._buckets = {}
+        self._lock = threading.Lock()
+        reset_after_fork(self)
+
+    def bucket(self, key):
+        """ Gets the token bucket of an access key.
+
+        :rtype: TokenBucket
+        """
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate,
+                                                          self.burst)
+            return bucket
+
+    def reserve(self, key):
+        """ Reserves the turn of a request.
+
+        :param key: the access key sending the request.
+        :type key: str or unicode
+        :return: seconds to wait before sending the request.
+        :rtype: float
+        :raises RateLimitExceeded: if the request is beyond the rate limit
+                                   or the quota.
+        """
+        if self.quota is not None and self.quota.remaining <= 0:
+            self.rejected += 1
+            raise RateLimitExceeded('Monthly quota of {0} requests used '
+                                    'up'.format(self.quota.limit))
+
+        wait = self.bucket(key).reserve(self.max_wait)
+        if wait is None:
+            self.rejected += 1
+            raise RateLimitExceeded('Rate limit of {0} requests per second '
+                                    'exceeded'.format(self.rate))
+
+        if self.quota is not None and not self.quota.consume():
+            self.bucket(key).refund()
+            self.rejected += 1
+            raise RateLimitExceeded('Monthly quota of {0} requests used '
+                                    'up'.format(self.quota.limit))
+
+        return wait
+
+    def acquire(self, key):
+        """ Waits for the turn of a request.
+
+        :param key: the access key sending the request.
+        :type key: str or unicode
+        :raises RateLimitExceeded: if the request is beyond the rate limit
+                                   or the quota.
+        """
+        wait = self.reserve(key)
+        if wait:
+            time.sleep(wait)
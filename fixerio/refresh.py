@@ -0,0 +1,150 @@
+from __future__ import unicode_literals
+
+import logging
+import threading
+import time
+
+from .cache import LATEST, _copy
+from .symbols import SymbolSet
+
+logger = logging.getLogger(__name__)
+
+#: Fixer.io updates its rates every hour.
+DEFAULT_INTERVAL = 60 * 60
+#: Seconds to wait after each update before requesting the new rates.
+DEFAULT_OFFSET = 60
+DEFAULT_RETRY_INTERVAL = 60
+
+
+class BaseRefresher(object):
+    """ Keeps a snapshot of the latest rates, refreshed on a schedule.
+
+    Refreshes are aligned to the times the rates are published at: every
+    `interval` seconds since the epoch, plus `offset` seconds. Reads are
+    served from the current snapshot, which is only replaced once a new one
+    has been fetched, so they never wait for a request.
+    """
+
+    def __init__(self, client, symbols=None, interval=DEFAULT_INTERVAL,
+                 offset=DEFAULT_OFFSET, retry_interval=DEFAULT_RETRY_INTERVAL,
+                 clock=time.time):
+        """
+        :param client: the client to fetch the rates with.
+        :type client: fixerio.client.BaseFixerio
+        :param symbols: currency symbols to keep, the ones of the client by
+                        default.
+        :type symbols: list or tuple
+        :param interval: seconds between refreshes, for instance ``86400``
+                         to follow the daily ECB reference rates.
+        :type interval: int
+        :param offset: seconds after each interval boundary to refresh at.
+        :type offset: int
+        :param retry_interval: seconds to wait before retrying a failed
+                               refresh.
+        :type retry_interval: int
+        :param clock: a function returning the current POSIX time.
+        :type clock: callable
+        """
+        self.client = client
+        self.symbols = SymbolSet.of(symbols) or client.symbols
+        self.interval = interval
+        self.offset = offset
+        self.retry_interval = retry_interval
+        self.clock = clock
+
+        self.refreshes = 0
+        self.failures = 0
+
+        self._snapshot = None
+
+    @property
+    def snapshot(self):
+        """ The latest rates fetched, or ``None`` before the first fetch. """
+        return self._snapshot
+
+    def next_refresh_at(self, now=None):
+        """ Computes the time of the next refresh.
+
+        :param now: the current POSIX time.
+        :type now: float
+        :rtype: float
+        """
+        if now is None:
+            now = self.clock()
+        boundaries = (now - self.offset) // self.interval + 1
+        return boundaries * self.interval + self.offset
+
+    def _swap(self, response):
+        if response.get('success', True):
+            self._snapshot = response
+            self.refreshes += 1
+
+    def get(self, symbols=None):
+        """ Gets the latest rates of `symbols` from the snapshot.
+
+        :param symbols: currency symbols, ``None`` for every symbol.
+        :type symbols: list or tuple
+        :return: the latest rates, or ``None`` if there is no snapshot yet
+                 or it does not hold every symbol.
+        :rtype: dict
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        if symbols is None:
+            return _copy(snapshot) if self.symbols is None else None
+        if self.symbols is not None and not set(symbols) <= set(self.symbols):
+            return None
+        return _copy(snapshot, symbols)
+
+
+class Refresher(BaseRefresher):
+    """ Refreshes the latest rates of a :class:`fixerio.Fixerio` client in a
+    background thread. """
+
+    def __init__(self, *args, **kwargs):
+        super(Refresher, self).__init__(*args, **kwargs)
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        """ Fetches the latest rates and swaps them in.
+
+        :raises FixerioException: if any error making a request.
+        """
+        self._swap(self.client._refresh(LATEST, self.symbols))
+
+    def start(self, wait=True):
+        """ Starts refreshing in the background.
+
+        :param wait: whether to fetch the rates before returning, so the
+                     first reads are served from the snapshot too.
+        :type wait: bool
+        """
+        if wait:
+            self.refresh()
+
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name='fixerio-refresher')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """ Stops refreshing, waiting for a refresh in progress. """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        delay = self.next_refresh_at() - self.clock()
+        while not self._stopped.wait(max(0, delay)):
+            try:
+                self.refresh()
+            except BaseException:
+                self.failures += 1
+                logger.exception('Failed to refresh the latest rates')
+                delay = self.retry_interval
+            else:
+                delay = self.next_refresh_at() - self.clock()
@@ -0,0 +1,231 @@
+from __future__ import unicode_literals
+
+import random
+import threading
+import time
+
+from .exceptions import CircuitOpenError
+
+DEFAULT_STATUS_FORCELIST = frozenset([500, 502, 503, 504])
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+
+class RetryPolicy(object):
+    """ When and how long to wait before retrying a failed request.
+
+    Connection errors, timeouts and responses with a status in
+    `status_forcelist` are retried, up to `max_attempts` attempts in total,
+    waiting an exponentially growing backoff between attempts. With jitter,
+    each wait is drawn uniformly between zero and the backoff, so clients
+    failing at once do not retry at once.
+    """
+
+    def __init__(self, max_attempts=3, backoff_factor=0.5, max_backoff=30,
+                 jitter=True, status_forcelist=DEFAULT_STATUS_FORCELIST,
+                 random=random.random):
+        """
+        :param max_attempts: maximum number of attempts of a request.
+        :type max_attempts: int
+        :param backoff_factor: seconds to wait after the first attempt,
+                               doubled after every further attempt.
+        :type backoff_factor: float
+        :param max_backoff: longest wait between attempts, in seconds.
+        :type max_backoff: float
+        :param jitter: whether to randomize waits.
+        :type jitter: bool
+        :param status_forcelist: HTTP statuses to retry.
+        :type status_forcelist: set
+        :param random: a function returning a random float in ``[0, 1)``.
+        :type random: callable
+        """
+        self.max_attempts = max_attempts
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.status_forcelist = frozenset(status_forcelist)
+        self.random = random
+
+        self.retries = 0
+        self.exhausted = 0
+
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        """ Pickles the policy, without its counters. The default random
+        function is left out, so that processes do not draw the same waits
+        from copies of one generator. """
+        state = {'max_attempts': self.max_attempts,
+                 'backoff_factor': self.backoff_factor,
+                 'max_backoff': self.max_backoff, 'jitter': self.jitter,
+                 'status_forcelist': self.status_forcelist}
+        if self.random != random.random:
+            state['random'] = self.random
+        return state
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def is_retryable(self, status):
+        """ Whether a failure may be transient.
+
+        :param status: the HTTP status of the response, or ``None`` if there
+                       was no response, as on connection errors and
+                       timeouts.
+        :type status: int
+        :rtype: bool
+        """
+        return status is None or status in self.status_forcelist
+
+    def should_retry(self, attempt, status):
+        """ Whether to retry after a failed attempt, counting the retry.
+
+        :param attempt: number of attempts so far.
+        :type attempt: int
+        :param status: the HTTP status of the response, or ``None`` if there
+                       was no response.
+        :type status: int
+        :rtype: bool
+        """
+        if not self.is_retryable(status):
+            return False
+
+        with self._lock:
+            if attempt >= self.max_attempts:
+                self.exhausted += 1
+                return False
+            self.retries += 1
+            return True
+
+    def backoff(self, attempt):
+        """ Seconds to wait after a failed attempt.
+
+        :param attempt: number of attempts so far.
+        :type attempt: int
+        :rtype: float
+        """
+        backoff = min(self.max_backoff,
+                      self.backoff_factor * 2 ** (attempt - 1))
+        if self.jitter:
+            return backoff * self.random()
+        return backoff
+
+    @property
+    def stats(self):
+        """ The retry counters.
+
+        :rtype: dict
+        """
+        return {'retries': self.retries, 'exhausted': self.exhausted}
+
+
+class CircuitBreaker(object):
+    """ Fails requests fast while Fixer.io is failing.
+
+    The circuit opens after `failure_threshold` consecutive transient
+    failures, and rejects every request for `reset_timeout` seconds. Then
+    it lets a single request through: if it succeeds the circuit closes
+    again, otherwise it stays open for another `reset_timeout` seconds.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30,
+                 clock=_monotonic):
+        """
+        :param failure_threshold: consecutive failures opening the circuit.
+        :type failure_threshold: int
+        :param reset_timeout: seconds to stay open before trying again.
+        :type reset_timeout: float
+        :param clock: a function returning monotonic seconds.
+        :type clock: callable
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+
+        self.failures = 0
+        self.trips = 0
+        self.rejected = 0
+
+        self._state = CLOSED
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        """ Pickles the thresholds, so that unpickled breakers start
+        closed. """
+        return {'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout, 'clock': self.clock}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    @property
+    def state(self):
+        """ Either ``'closed'``, ``'open'`` or ``'half-open'``. """
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if (self._state == OPEN and
+                self.clock() - self._opened_at >= self.reset_timeout):
+            self._state = HALF_OPEN
+            self._probing = False
+        return self._state
+
+    def before_request(self):
+        """ Lets a request through, or rejects it.
+
+        :raises CircuitOpenError: if the circuit is open, or half-open with
+                                  a request already trying it.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+
+            self.rejected += 1
+        raise CircuitOpenError('Circuit open after {0} consecutive '
+                               'failures'.format(self.failure_threshold))
+
+    def record_success(self):
+        """ Counts a successful request, closing the circuit. """
+        with self._lock:
+            self.failures = 0
+            self._state = CLOSED
+            self._probing = False
+
+    def record_failure(self):
+        """ Counts a transient failure, opening the circuit if needed. """
+        with self._lock:
+            self.failures += 1
+            if (self._state == HALF_OPEN or
+                    self.failures >= self.failure_threshold):
+                if self._state != OPEN:
+                    self.trips += 1
+                self._state = OPEN
+                self._opened_at = self.clock()
+                self._probing = False
+
+    def release(self):
+        """ Ends the trial of a half-open circuit without an outcome, for a
+        request which was not sent or failed for a reason other than
+        Fixer.io, so that the next request tries the circuit instead. """
+        with self._lock:
+            self._probing = False
+
+    @property
+    def stats(self):
+        """ The state and the counters of the circuit.
+
+        :rtype: dict
+        """
+        return {'state': self.state, 'failures': self.failures,
+                'trips': self.trips, 'rejected': self.rejected}
@@ -0,0 +1,74 @@
+from __future__ import unicode_literals
+
+import copy
+import threading
+
+
+def flight_key(url, payload):
+    """ Creates a key identifying a request.
+
+    :param url: the URL to request.
+    :type url: str or unicode
+    :param payload: the query string parameters.
+    :type payload: dict
+    :rtype: tuple
+    """
+    return url, frozenset(payload.items())
+
+
+class _Call(object):
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """ Coalesces concurrent calls with the same key.
+
+    While a call is in flight, further calls with its key wait for it and
+    share its result instead of making their own.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._calls)
+
+    def do(self, key, function, *args, **kwargs):
+        """ Calls `function`, unless a call with `key` is in flight.
+
+        :param key: a hashable key identifying the call.
+        :param function: the function to call.
+        :type function: callable
+        :return: what `function` returns. Calls which joined another one get
+                 a deep copy of it, so callers never share mutable results.
+        :raises: what `function` raises.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = function(*args, **kwargs)
+        except BaseException as ex:
+            call.error = ex
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result
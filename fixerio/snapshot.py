@@ -0,0 +1,386 @@
+"""
+Offline snapshots of rates, answering requests where Fixer.io cannot be
+reached and warming up new processes.
+
+A snapshot is a single versioned file bundling the cached and stored rates
+of a client. It is memory mapped when loaded: only its header is read, and
+each lookup binary searches its index and reads a single row, so loading
+costs the same for a day of rates as for twenty years of them.
+"""
+from __future__ import unicode_literals
+
+import datetime
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+from .cache import DEFAULT_LATEST_TTL, HISTORICAL, LATEST, _published_at
+
+MAGIC = b'FXSN'
+VERSION = 1
+
+#: Rows are stored as raw float64 values, read in place from the mapping.
+NONE = 'none'
+#: Rows are compressed with zlib, and decompressed when read.
+ZLIB = 'zlib'
+COMPRESSIONS = (NONE, ZLIB)
+
+DEFAULT_BASE = 'EUR'
+CODE_SIZE = 3
+
+_ENDPOINTS = (LATEST, HISTORICAL)
+
+# Magic, version, compression, creation time, codes and entries.
+_HEADER = struct.Struct('<4sHBdII')
+# Endpoint, base and date ordinal, big-endian so that keys sort as bytes.
+_KEY = struct.Struct('>B3sI')
+# Key, flags, date ordinal, timestamp, offset and size of the row.
+_ENTRY = struct.Struct('<{0}sBIdQI'.format(_KEY.size))
+
+COMPLETE = 1
+
+NAN = float('nan')
+
+
+def _key(endpoint, base, ordinal):
+    # Latest rates are keyed without their date, which is not known ahead.
+    if endpoint == LATEST:
+        ordinal = 0
+    return _KEY.pack(_ENDPOINTS.index(endpoint), base.encode('ascii'),
+                     ordinal)
+
+
+def _merge(entries, endpoint, response, complete):
+    """ Adds a response to the entries of a snapshot being written, merged
+    with any entry of the same rates. """
+    base = response.get('base') or DEFAULT_BASE
+    ordinal = datetime.datetime.strptime(response['date'],
+                                         '%Y-%m-%d').date().toordinal()
+    timestamp = response.get('timestamp')
+    key = _key(endpoint, base, ordinal)
+
+    entry = entries.get(key)
+    if entry is not None and endpoint == LATEST:
+        # Only the newest latest rates are kept.
+        published = (ordinal, timestamp or 0)
+        kept = (entry['ordinal'], entry['timestamp'] or 0)
+        if published < kept:
+            return
+        if published > kept:
+            entry = None
+
+    if entry is None:
+        entry = entries[key] = {'ordinal': ordinal, 'timestamp': timestamp,
+                                'rates': {}, 'complete': False}
+    entry['rates'].update(response.get('rates', {}))
+    entry['complete'] = entry['complete'] or complete
+
+
+def write_snapshot(path, responses, compression=ZLIB, clock=time.time):
+    """ Writes rates to a snapshot file, replacing it atomically.
+
+    :param path: the file to write.
+    :type path: str or unicode
+    :param responses: ``(endpoint, response, complete)`` tuples, where
+                      `endpoint` is either ``LATEST`` or ``HISTORICAL`` and
+                      `complete` tells whether `response` holds every
+                      available currency. Responses of the same day are
+                      merged, and only the newest latest rates are kept.
+    :type responses: iterable
+    :param compression: either :data:`ZLIB` or :data:`NONE`.
+    :type compression: str or unicode
+    :param clock: a function returning the current POSIX time.
+    :type clock: callable
+    :return: the number of entries written.
+    :rtype: int
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError('Unknown compression: {0}'.format(compression))
+
+    entries = {}
+    for endpoint, response, complete in responses:
+        if response.get('success', True) and response.get('date'):
+            _merge(entries, endpoint, response, complete)
+
+    codes = sorted(set(code for entry in entries.values()
+                       for code in entry['rates']))
+    columns = dict((code, i) for i, code in enumerate(codes))
+    row_format = struct.Struct('<{0}d'.format(len(codes)))
+
+    keys = sorted(entries)
+    offset = _HEADER.size + len(codes) * CODE_SIZE + len(keys) * _ENTRY.size
+    index, rows = [], []
+    for key in keys:
+        entry = entries[key]
+        values = [NAN] * len(codes)
+        for code, value in entry['rates'].items():
+            values[columns[code]] = value
+        row = row_format.pack(*values)
+        if compression == ZLIB:
+            row = zlib.compress(row)
+
+        timestamp = entry['timestamp']
+        index.append(_ENTRY.pack(
+            key, COMPLETE if entry['complete'] else 0, entry['ordinal'],
+            NAN if timestamp is None else timestamp, offset, len(row)))
+        rows.append(row)
+        offset += len(row)
+
+    tmp_path = '{0}.{1}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, COMPRESSIONS.index(compression),
+                             clock(), len(codes), len(keys)))
+        f.write(''.join(codes).encode('ascii'))
+        f.write(b''.join(index))
+        f.write(b''.join(rows))
+        f.flush()
+        os.fsync(f.fileno())
+    os.rename(tmp_path, path)
+
+    return len(keys)
+
+
+def save_snapshot(client, path, compression=ZLIB):
+    """ Writes the rates a client holds to a snapshot file: those of its
+    in-process cache, its historical store and its current snapshot.
+
+    :param client: the client whose rates to write.
+    :type client: fixerio.client.BaseFixerio
+    :param path: the file to write.
+    :type path: str or unicode
+    :param compression: either :data:`ZLIB` or :data:`NONE`.
+    :type compression: str or unicode
+    :return: the number of entries written.
+    :rtype: int
+    :raises ValueError: if the cache of the client cannot be listed.
+    """
+    sources = []
+    if client.snapshot is not None:
+        sources.append(client.snapshot.responses())
+    if client.store is not None:
+        sources.append((HISTORICAL, response, complete)
+                       for response, complete in client.store.responses())
+    if client.cache is not None:
+        if not hasattr(client.cache, 'items'):
+            raise ValueError('The cache of the client cannot be listed')
+        sources.append((key[0], response, key[3] is None)
+                       for key, response in client.cache.items())
+
+    def responses():
+        for source in sources:
+            for item in source:
+                yield item
+
+    return write_snapshot(path, responses(), compression=compression)
+
+
+class Snapshot(object):
+    """ Rates read from a snapshot file, with the policy to serve them by.
+
+    Historical rates never go stale. Latest rates are served instead of
+    requesting them while they are younger than `latest_ttl`, and as a
+    fallback when Fixer.io cannot be requested while they are younger than
+    `stale_ttl`. An offline snapshot answers without ever requesting
+    Fixer.io.
+    """
+
+    def __init__(self, path, latest_ttl=DEFAULT_LATEST_TTL, stale_ttl=None,
+                 offline=False, clock=time.time):
+        """
+        :param path: the snapshot file.
+        :type path: str or unicode
+        :param latest_ttl: seconds the latest rates are fresh for after they
+                           were published.
+        :type latest_ttl: int or float
+        :param stale_ttl: seconds the latest rates are served for after they
+                          were published, when Fixer.io cannot be requested.
+                          ``None`` serves them however old they are.
+        :type stale_ttl: int or float
+        :param offline: whether to never request Fixer.io, and fail on rates
+                        missing from the snapshot.
+        :type offline: bool
+        :param clock: a function returning the current POSIX time.
+        :type clock: callable
+        :raises ValueError: if the file is not a snapshot of a known version.
+        """
+        self.path = path
+        self.latest_ttl = latest_ttl
+        self.stale_ttl = stale_ttl
+        self.offline = offline
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._map) < _HEADER.size:
+            raise ValueError('{0} is not a rates snapshot'.format(path))
+        magic, version, compression, self.created_at, count, self._count = \
+            _HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError('{0} is not a rates snapshot'.format(path))
+        if version != VERSION or compression >= len(COMPRESSIONS):
+            raise ValueError('{0} is a snapshot of an unknown version'.format(
+                path))
+        self.compression = COMPRESSIONS[compression]
+
+        data = self._map[_HEADER.size:_HEADER.size + count * CODE_SIZE]
+        self.codes = tuple(data[i:i + CODE_SIZE].decode('ascii')
+                           for i in range(0, len(data), CODE_SIZE))
+        self._columns = dict((code, i) for i, code in enumerate(self.codes))
+        self._row = struct.Struct('<{0}d'.format(count))
+        self._index = _HEADER.size + count * CODE_SIZE
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def __getstate__(self):
+        """ Pickles the path and the policy only, so that each process maps
+        the file on its own. """
+        return {'path': self.path, 'latest_ttl': self.latest_ttl,
+                'stale_ttl': self.stale_ttl, 'offline': self.offline,
+                'clock': self.clock}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def _entry(self, position):
+        return _ENTRY.unpack_from(self._map,
+                                  self._index + position * _ENTRY.size)
+
+    def _search(self, key):
+        """ Binary searches the index for an entry, holding the lock. """
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            start = self._index + middle * _ENTRY.size
+            found = self._map[start:start + _KEY.size]
+            if found < key:
+                low = middle + 1
+            elif found > key:
+                high = middle
+            else:
+                return self._entry(middle)
+        return None
+
+    def _values(self, offset, size):
+        """ Reads the values of a row, holding the lock. """
+        if self.compression == ZLIB:
+            return self._row.unpack(
+                zlib.decompress(self._map[offset:offset + size]))
+        return self._row.unpack_from(self._map, offset)
+
+    def _rates(self, values, symbols, complete):
+        """ Picks the rates of `symbols` out of a row.
+
+        Unknown rates are left out of a complete row, and make the read of a
+        partial row fail, as they might be available upstream.
+        """
+        if symbols is None:
+            if not complete:
+                return None
+            symbols = self.codes
+
+        rates = {}
+        for code in symbols:
+            column = self._columns.get(code)
+            if column is not None and not math.isnan(values[column]):
+                rates[code] = values[column]
+            elif not complete:
+                return None
+        return rates
+
+    def _response(self, endpoint, base, ordinal, timestamp, rates):
+        response = {'success': True, 'base': base, 'rates': rates,
+                    'date': datetime.date.fromordinal(ordinal).isoformat()}
+        if endpoint == HISTORICAL:
+            response['historical'] = True
+        if not math.isnan(timestamp):
+            response['timestamp'] = int(timestamp)
+        return response
+
+    def _is_fresh(self, response, ttl):
+        return ttl is None or \
+            self.clock() < _published_at(response, self.clock) + ttl
+
+    def get(self, endpoint, date=None, base=None, symbols=None,
+            allow_stale=False):
+        """ Gets rates from the snapshot.
+
+        :param endpoint: either ``LATEST`` or ``HISTORICAL``.
+        :type endpoint: str or unicode
+        :param date: the date of historical rates.
+        :type date: date or str
+        :param base: the base currency, EUR by default.
+        :type base: str or unicode
+        :param symbols: currency symbols, ``None`` for all of them.
+        :type symbols: list or tuple
+        :param allow_stale: whether to return latest rates up to
+                            `stale_ttl` old, as a fallback when Fixer.io
+                            cannot be requested.
+        :type allow_stale: bool
+        :return: the rates, or ``None`` if the snapshot lacks any of them,
+                 or they are too old.
+        :rtype: dict
+        """
+        base = base or DEFAULT_BASE
+        ordinal = 0
+        if endpoint == HISTORICAL:
+            if not isinstance(date, datetime.date):
+                date = datetime.datetime.strptime(date, '%Y-%m-%d').date()
+            ordinal = date.toordinal()
+
+        with self._lock:
+            if self._map is None:
+                raise ValueError('The snapshot is closed')
+            entry = self._search(_key(endpoint, base, ordinal))
+            if entry is None:
+                return None
+            _, flags, ordinal, timestamp, offset, size = entry
+            rates = self._rates(self._values(offset, size), symbols,
+                                flags & COMPLETE)
+        if rates is None:
+            return None
+
+        response = self._response(endpoint, base, ordinal, timestamp, rates)
+        if endpoint == LATEST and not self._is_fresh(
+                response, self.stale_ttl if allow_stale else self.latest_ttl):
+            return None
+        return response
+
+    def responses(self):
+        """ Reads every entry of the snapshot.
+
+        :return: ``(endpoint, response, complete)`` tuples, as taken by
+                 :func:`write_snapshot`.
+        :rtype: generator
+        """
+        for position in range(self._count):
+            with self._lock:
+                key, flags, ordinal, timestamp, offset, size = \
+                    self._entry(position)
+                values = self._values(offset, size)
+            endpoint, base, _ = _KEY.unpack(key)
+            endpoint = _ENDPOINTS[endpoint]
+            complete = bool(flags & COMPLETE)
+            rates = self._rates(values, None, True)
+            yield (endpoint, self._response(endpoint, base.decode('ascii'),
+                                            ordinal, timestamp, rates),
+                   complete)
+
+    def close(self):
+        """ Unmaps the file. """
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
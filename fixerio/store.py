@@ -0,0 +1,513 @@
+from __future__ import unicode_literals
+
+import datetime
+import itertools
+import math
+import mmap
+import os
+import struct
+import threading
+
+from .dates import to_date
+from .locking import FileLock
+
+DEFAULT_BASE = 'EUR'
+
+EPOCH = datetime.date(1999, 1, 1)
+
+MAGIC = b'FXRS'
+VERSION = 1
+CAPACITY = 256
+HEADER_SIZE = 4096
+CODE_SIZE = 3
+
+_HEADER = struct.Struct('<4sHHIH')
+_ROW_HEADER = struct.Struct('<Qd')
+_VALUE = struct.Struct('<d')
+
+ROW_SIZE = _ROW_HEADER.size + CAPACITY * _VALUE.size
+
+PRESENT = 1
+COMPLETE = 2
+
+NAN = float('nan')
+# The value of a rate Fixer.io was asked for and answered without. Rates
+# are positive, so it is never a rate.
+ABSENT = float('-inf')
+
+
+class _Matrix(object):
+    """ A date x currency matrix of float64 rates stored in one file.
+
+    The file starts with a fixed-size header holding the currency codes in
+    column order, followed by one fixed-width row per day since the epoch.
+    Each row holds its flags, the timestamp of the rates and one value per
+    column, ``NaN`` when a rate is unknown and ``-inf`` when Fixer.io has
+    none. Days never written are holes in the file and read back as absent
+    rows.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.epoch = EPOCH.toordinal()
+
+        self._lock = threading.Lock()
+        self._file = None
+        self._writable = False
+        self._map = None
+        self._codes = ()
+        self._columns = {}
+
+    def _create(self):
+        header = _HEADER.pack(MAGIC, VERSION, CAPACITY, self.epoch, 0)
+        tmp_path = '{0}.{1}.tmp'.format(self.path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            f.write(header.ljust(HEADER_SIZE, b'\0'))
+        try:
+            # Never replace a file another process created meanwhile.
+            os.link(tmp_path, self.path)
+        except OSError:
+            pass
+        finally:
+            os.remove(tmp_path)
+
+    def _open(self, write=False):
+        """ Opens the file and maps it read-only, holding the lock. The file
+        is only opened for writing, and created, when `write` is true, so
+        that stores in read-only locations can be read.
+
+        :return: whether the file exists.
+        :rtype: bool
+        """
+        if write and not self._writable:
+            if not os.path.exists(self.path):
+                self._create()
+            if self._file is not None:
+                self._file.close()
+            self._file = open(self.path, 'r+b')
+            self._writable = True
+        elif self._file is None:
+            if not os.path.exists(self.path):
+                return False
+            self._file = open(self.path, 'rb')
+
+        size = os.fstat(self._file.fileno()).st_size
+        if self._map is None or len(self._map) < size:
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(self._file.fileno(), size,
+                                  access=mmap.ACCESS_READ)
+            self._read_header()
+        return True
+
+    def _read_header(self):
+        magic, version, capacity, epoch, count = _HEADER.unpack_from(
+            self._map, 0)
+        if magic != MAGIC or version != VERSION or capacity != CAPACITY:
+            raise ValueError('{0} is not a rates store'.format(self.path))
+        self.epoch = epoch
+
+        if count != len(self._codes):
+            offset = _HEADER.size
+            data = self._map[offset:offset + count * CODE_SIZE]
+            self._codes = tuple(
+                data[i:i + CODE_SIZE].decode('ascii')
+                for i in range(0, len(data), CODE_SIZE))
+            self._columns = dict(
+                (code, i) for i, code in enumerate(self._codes))
+
+    def _offset(self, date):
+        index = date.toordinal() - self.epoch
+        if index < 0:
+            return None
+        return HEADER_SIZE + index * ROW_SIZE
+
+    def _mapped(self, offset):
+        """ Whether the row at `offset` is mapped, holding the lock. """
+        if offset + ROW_SIZE <= len(self._map):
+            return True
+
+        # The file may have grown since it was mapped.
+        self._map.close()
+        self._map = None
+        self._open()
+        return offset + ROW_SIZE <= len(self._map)
+
+    def read(self, date, symbols=None):
+        """ Reads the rates of a day.
+
+        :return: the timestamp and rates of the day, or ``None`` if the day
+                 is not stored or lacks any of `symbols`.
+        :rtype: tuple
+        """
+        with self._lock:
+            if not self._open():
+                return None
+            offset = self._offset(date)
+            if offset is None or not self._mapped(offset):
+                return None
+
+            flags, timestamp = _ROW_HEADER.unpack_from(self._map, offset)
+            if not flags & PRESENT:
+                return None
+            if symbols is None and not flags & COMPLETE:
+                return None
+
+            rates = self._read_rates(offset + _ROW_HEADER.size, symbols,
+                                     flags & COMPLETE)
+
+        if rates is None:
+            return None
+        return timestamp, rates
+
+    def _read_rates(self, offset, symbols, complete):
+        """ Reads the values of a row, holding the lock.
+
+        Unknown rates are left out of a complete row, and make the read of
+        a partial row fail, as they might be available upstream. Rates
+        Fixer.io has none of are left out of any row.
+        """
+        if symbols is None:
+            symbols = self._codes
+        elif any(code not in self._columns for code in symbols):
+            self._read_header()
+
+        rates = {}
+        for code in symbols:
+            value = self._value(offset, code)
+            if value == ABSENT:
+                continue
+            if not math.isnan(value):
+                rates[code] = value
+                continue
+            if not complete:
+                return None
+
+        return rates
+
+    def _value(self, offset, code):
+        """ Reads the value of a currency in a row, holding the lock. """
+        column = self._columns.get(code)
+        if column is None:
+            return NAN
+        value, = _VALUE.unpack_from(self._map, offset + column * _VALUE.size)
+        return value
+
+    def rows(self):
+        """ Reads every stored day.
+
+        :return: the date, timestamp and rates of each day, and whether its
+                 rates are complete.
+        :rtype: list
+        """
+        rows = []
+        with self._lock:
+            if not self._open():
+                return rows
+            self._read_header()
+            for index in range((len(self._map) - HEADER_SIZE) // ROW_SIZE):
+                offset = HEADER_SIZE + index * ROW_SIZE
+                flags, timestamp = _ROW_HEADER.unpack_from(self._map, offset)
+                if flags & PRESENT:
+                    rates = self._read_rates(offset + _ROW_HEADER.size, None,
+                                             True)
+                    rows.append((datetime.date.fromordinal(self.epoch + index),
+                                 timestamp, rates, bool(flags & COMPLETE)))
+        return rows
+
+    def missing(self, dates, symbols=None):
+        """ Finds the days lacking any of `symbols`.
+
+        :return: each day to fetch, with the symbols it lacks, or ``None``
+                 if it lacks every symbol or, when `symbols` is ``None``,
+                 is not complete. Rates a complete day lacks, or which
+                 Fixer.io answered without, are not available upstream
+                 either, so they are not missing.
+        :rtype: list
+        """
+        missing = []
+        with self._lock:
+            if not self._open():
+                return [(date, symbols) for date in dates
+                        if self._offset(date) is not None]
+            self._read_header()
+            for date in dates:
+                offset = self._offset(date)
+                if offset is None:
+                    continue
+                if not self._mapped(offset):
+                    missing.append((date, symbols))
+                    continue
+
+                flags, _ = _ROW_HEADER.unpack_from(self._map, offset)
+                if flags & COMPLETE:
+                    continue
+                if symbols is None or not flags & PRESENT:
+                    missing.append((date, symbols))
+                    continue
+
+                offset += _ROW_HEADER.size
+                lacking = [code for code in symbols
+                           if math.isnan(self._value(offset, code))]
+                if lacking:
+                    missing.append((date, lacking))
+        return missing
+
+    def write_all(self, rows, sync=False):
+        """ Writes the rates of several days under a single lock of the
+        file.
+
+        :param rows: the date, rates, timestamp and completeness of each day,
+                     and the currencies Fixer.io has no rates of that day.
+        :type rows: list
+        :param sync: whether to sync the file to disk before unlocking it.
+        :type sync: bool
+        """
+        with self._lock:
+            self._open(write=True)
+            with FileLock(self._file.fileno()):
+                self._read_header()
+                codes = list(self._codes)
+                for _, rates, _, _, absent in rows:
+                    for code in itertools.chain(rates, absent):
+                        if code not in self._columns and \
+                                code not in codes and len(codes) < CAPACITY:
+                            codes.append(code)
+                if len(codes) != len(self._codes):
+                    self._write_codes(codes)
+
+                for date, rates, timestamp, complete, absent in rows:
+                    offset = self._offset(date)
+                    if offset is not None:
+                        self._write_row(offset, rates, timestamp, complete,
+                                        absent)
+                self._file.flush()
+                if sync:
+                    os.fsync(self._file.fileno())
+
+    def _write_row(self, offset, rates, timestamp, complete, absent):
+        """ Merges the rates of a day with the stored ones, holding the
+        locks. The values are written before the flags, so the row is never
+        marked present with values missing. """
+        row = self._read_row(offset)
+        flags = PRESENT | (row[0] & COMPLETE)
+        if complete and all(code in self._columns for code in rates):
+            flags |= COMPLETE
+        if timestamp is None:
+            timestamp = row[1]
+
+        values = list(row[2])
+        for code in absent:
+            column = self._columns.get(code)
+            if column is not None and math.isnan(values[column]):
+                values[column] = ABSENT
+        for code, value in rates.items():
+            column = self._columns.get(code)
+            if column is not None:
+                values[column] = value
+
+        self._file.seek(offset + _ROW_HEADER.size)
+        self._file.write(struct.pack('<{0}d'.format(CAPACITY), *values))
+        self._file.seek(offset)
+        self._file.write(_ROW_HEADER.pack(flags, timestamp))
+
+    def _read_row(self, offset):
+        self._file.seek(offset)
+        data = self._file.read(ROW_SIZE)
+        if len(data) < ROW_SIZE:
+            return 0, NAN, [NAN] * CAPACITY
+
+        flags, timestamp = _ROW_HEADER.unpack_from(data, 0)
+        if not flags & PRESENT:
+            return 0, NAN, [NAN] * CAPACITY
+
+        values = struct.unpack_from('<{0}d'.format(CAPACITY), data,
+                                    _ROW_HEADER.size)
+        return flags, timestamp, values
+
+    def _write_codes(self, codes):
+        data = ''.join(codes).encode('ascii')
+        self._file.seek(_HEADER.size)
+        self._file.write(data)
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(MAGIC, VERSION, CAPACITY, self.epoch,
+                                      len(codes)))
+        self._file.flush()
+
+        self._codes = tuple(codes)
+        self._columns = dict((code, i) for i, code in enumerate(codes))
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+                self._writable = False
+
+
+class HistoricalStore(object):
+    """ A persistent store of historical rates.
+
+    Rates are kept in one file per base currency, as a fixed-width matrix of
+    float64 values with a row per day and a column per currency. Reads go
+    through ``mmap``, so a new process answers stored dates without parsing
+    any JSON, and several processes can share the same files.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: the directory to keep the files in.
+        :type path: str or unicode
+        """
+        self.path = path
+        self._matrices = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __getstate__(self):
+        """ Pickles the path only, so that each process opens the files on
+        its own. """
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def _after_fork(self):
+        """ Leaves the files to the parent process, as sharing their
+        offsets and locks with it would corrupt them. """
+        self._matrices = {}
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _matrix(self, base):
+        if self._pid != os.getpid():
+            self._after_fork()
+        with self._lock:
+            matrix = self._matrices.get(base)
+            if matrix is None:
+                path = os.path.join(self.path, '{0}.fxr'.format(base))
+                matrix = self._matrices[base] = _Matrix(path)
+            return matrix
+
+    def get(self, date, base=None, symbols=None):
+        """ Gets the stored rates of a day.
+
+        :param date: a date
+        :type date: date or str
+        :param base: the base currency, EUR by default.
+        :type base: str or unicode
+        :param symbols: currency symbols, ``None`` for all of them.
+        :type symbols: list or tuple
+        :return: the historical rates, or ``None`` if they are not stored.
+        :rtype: dict
+        """
+        date = to_date(date)
+        base = base or DEFAULT_BASE
+
+        row = self._matrix(base).read(date, symbols)
+        if row is None:
+            return None
+
+        timestamp, rates = row
+        return _response(date, base, timestamp, rates)
+
+    def responses(self):
+        """ Reads every stored day, of every base currency.
+
+        :return: the historical rates of each day, and whether they hold
+                 every available currency.
+        :rtype: generator
+        """
+        for name in sorted(os.listdir(self.path)):
+            if name.endswith('.fxr'):
+                base = name[:-len('.fxr')]
+                for date, timestamp, rates, complete in \
+                        self._matrix(base).rows():
+                    yield _response(date, base, timestamp, rates), complete
+
+    def put(self, response, complete=True, symbols=None):
+        """ Stores historical rates.
+
+        :param response: the decoded historical rates response.
+        :type response: dict
+        :param complete: whether the response holds every available currency.
+        :type complete: bool
+        :param symbols: the currency symbols requested, if any. Those the
+                        response has no rates of are recorded as such, so
+                        that they are never missing from the store.
+        :type symbols: list or tuple
+        """
+        self.put_all([(response, complete, symbols)], sync=False)
+
+    def missing(self, dates, base=None, symbols=None):
+        """ Finds the days of `dates` lacking stored rates.
+
+        :param dates: the days to look for, in any order.
+        :type dates: list
+        :param base: the base currency, EUR by default.
+        :type base: str or unicode
+        :param symbols: currency symbols, ``None`` for all of them.
+        :type symbols: list or tuple
+        :return: the date of each day to fetch, with the symbols it lacks,
+                 or ``None`` if all of them should be fetched.
+        :rtype: list
+        """
+        dates = [to_date(date) for date in dates]
+        return self._matrix(base or DEFAULT_BASE).missing(dates, symbols)
+
+    def put_all(self, responses, sync=True):
+        """ Stores the historical rates of several days at once. The days of
+        each base currency are written under a single lock of its file and
+        synced to disk together.
+
+        :param responses: the decoded historical rates responses, each with
+                          whether it holds every available currency, as
+                          :meth:`responses` yields them, and optionally the
+                          currency symbols requested, as :meth:`put` takes
+                          them.
+        :type responses: list
+        :param sync: whether to sync the files to disk.
+        :type sync: bool
+        """
+        rows = {}
+        for item in responses:
+            response, complete = item[:2]
+            symbols = item[2] if len(item) > 2 else None
+            rates = response.get('rates', {})
+            absent = [code for code in symbols or () if code not in rates]
+            base = response.get('base') or DEFAULT_BASE
+            rows.setdefault(base, []).append(
+                (to_date(response['date']), rates, response.get('timestamp'),
+                 complete, absent))
+
+        for base, base_rows in rows.items():
+            self._matrix(base).write_all(base_rows, sync=sync)
+
+    def close(self):
+        """ Unmaps and closes every open file. """
+        with self._lock:
+            for matrix in self._matrices.values():
+                matrix.close()
+            self._matrices.clear()
+
+
+def _response(date, base, timestamp, rates):
+    """ Creates the historical rates response of a stored day. """
+    response = {'success': True, 'historical': True,
+                'date': date.isoformat(), 'base': base, 'rates': rates}
+    if not math.isnan(timestamp):
+        response['timestamp'] = int(timestamp)
+
+    return response
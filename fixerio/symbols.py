@@ -0,0 +1,105 @@
+from __future__ import unicode_literals
+
+import threading
+
+from .currencies import CURRENCIES
+
+try:
+    string_types = basestring
+except NameError:  # For Python 3
+    string_types = str
+
+_known = set(CURRENCIES)
+
+#: Spellings of symbol sets remembered before the memo is emptied.
+MAX_INTERNED = 1024
+
+
+class SymbolSet(tuple):
+    """ A canonical set of currency codes: upper-cased, sorted, without
+    duplicates and checked against the codes Fixer.io supports.
+
+    Equal sets are the same object, however they were spelled, so they make
+    cheap and consistent cache keys. Each set carries its ``query``, the
+    value of the ``symbols`` query string parameter, and its ``codes`` as a
+    frozenset.
+    """
+
+    _interned = {}
+    _lock = threading.Lock()
+
+    def __new__(cls, symbols):
+        """
+        :param symbols: currency codes, or a comma-separated string of them.
+        :type symbols: list or tuple or str or unicode
+        :raises ValueError: if any code is unknown, or there is none.
+        """
+        if not isinstance(symbols, string_types):
+            symbols = tuple(symbols)
+        interned = cls._interned.get(symbols)
+        if interned is not None:
+            return interned
+
+        codes = symbols.split(',') if isinstance(symbols, string_types) \
+            else symbols
+        codes = tuple(sorted(set(code.strip().upper() for code in codes)))
+        unknown = [code for code in codes if code not in _known]
+        if unknown:
+            raise ValueError('Unknown currency codes: {0}'.format(
+                ', '.join(unknown)))
+        if not codes:
+            raise ValueError('No currency codes')
+
+        with cls._lock:
+            if len(cls._interned) >= MAX_INTERNED:
+                cls._interned.clear()
+            canonical = cls._interned.get(codes)
+            if canonical is None:
+                canonical = tuple.__new__(cls, codes)
+                canonical.query = ','.join(codes)
+                canonical.codes = frozenset(codes)
+                cls._interned[codes] = canonical
+            cls._interned[symbols] = canonical
+        return canonical
+
+    @classmethod
+    def of(cls, symbols):
+        """ Canonicalizes symbols passed to a client.
+
+        :param symbols: currency codes, a comma-separated string of them, or
+                        ``None`` for all of them.
+        :type symbols: list or tuple or str or unicode
+        :return: the set, or ``None`` if no symbols are passed.
+        :rtype: SymbolSet
+        :raises ValueError: if any code is unknown.
+        """
+        if not symbols:
+            return None
+        if isinstance(symbols, cls):
+            return symbols
+        return cls(symbols)
+
+    def __reduce__(self):
+        return SymbolSet, (tuple(self),)
+
+    def __repr__(self):
+        return 'SymbolSet({0!r})'.format(self.query)
+
+
+def add_currencies(codes):
+    """ Accepts currency codes missing from
+    :data:`fixerio.currencies.CURRENCIES`, such as codes introduced after
+    this release.
+
+    :param codes: three-letter currency codes.
+    :type codes: list or tuple
+    :raises ValueError: if any code is not three letters.
+    """
+    codes = [code.strip().upper() for code in codes]
+    invalid = [code for code in codes
+               if len(code) != 3 or not code.isalpha()]
+    if invalid:
+        raise ValueError('Invalid currency codes: {0}'.format(
+            ', '.join(invalid)))
+    with SymbolSet._lock:
+        _known.update(codes)
@@ -17,7 +17,17 @@ with open('README.rst') as f:
 with open('CHANGELOG.rst') as f:
     changelog = f.read()
 
-requirements = ['requests>=2.0']
+requirements = ['requests>=2.0', 'futures>=3.0; python_version < "3"']
+
+extras_requirements = {
+    'arrow': ['pyarrow'],
+    'async': ['aiohttp>=3.3'],
+    'numpy': ['numpy'],
+    'opentelemetry': ['opentelemetry-api'],
+    'orjson': ['orjson'],
+    'pandas': ['numpy', 'pandas'],
+    'prometheus': ['prometheus_client'],
+}
 
 setup(
     name='fixerio',
@@ -28,10 +38,12 @@ setup(
     author_email='matellanesadrian@gmail.com',
     url='https://github.com/amatellanes/fixerio',
     install_requires=requirements,
+    extras_require=extras_requirements,
     license='MIT License',
     packages=['fixerio'],
     package_dir={'fixerio': 'fixerio'},
     include_package_data=True,
+    entry_points={'console_scripts': ['fixerio = fixerio.cli:main']},
     zip_safe=False,
     classifiers=[
         'Development Status :: 3 - Alpha',
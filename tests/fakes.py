@@ -0,0 +1,183 @@
+from __future__ import unicode_literals
+
+import json
+import threading
+import time
+
+try:
+    import socketserver
+except ImportError:  # For Python 2
+    import SocketServer as socketserver
+
+from fixerio.backends import DELETE_IF_SCRIPT
+
+
+#: The rates :func:`respond` answers with, plus the day of the month.
+RATES = {'GBP': 0.5, 'JPY': 125.0, 'USD': 1.0}
+
+
+class Clock(object):
+    """ A clock which only moves when told to, by setting `now`. """
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def historical(date, rates, base='EUR'):
+    """ Returns a historical rates response. """
+    return {'success': True, 'historical': True, 'date': date,
+            'timestamp': 946943999, 'base': base, 'rates': rates}
+
+
+def respond(url, params):
+    """ Answers a latest or historical rates request like Fixer.io does,
+    with the rates of :data:`RATES` plus the day of the month of the date
+    requested, for the symbols requested or all of them. Latest rates are
+    those of 2000-01-03, published now. """
+    path = url.rsplit('/', 1)[1]
+    params = params or {}
+    symbols = params.get('symbols')
+    codes = symbols.split(',') if symbols else RATES
+    date = '2000-01-03' if path == 'latest' else path
+    rates = dict((code, RATES[code] + int(date[-2:]))
+                 for code in codes if code in RATES)
+    base = params.get('base', 'EUR')
+    if path == 'latest':
+        return {'success': True, 'timestamp': int(time.time()),
+                'base': base, 'date': date, 'rates': rates}
+    return historical(date, rates, base)
+
+
+class FakeResponse(object):
+    def __init__(self, data, status_code=200, headers=None):
+        self.data = data
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+    @property
+    def content(self):
+        return json.dumps(self.data).encode('utf-8')
+
+    def json(self):
+        return self.data
+
+
+class FakeSession(object):
+    """ Answers every request with `data`, or with what `data` returns for
+    the URL and query string parameters if it is callable. Data may be a
+    :class:`FakeResponse` to answer with. """
+
+    def __init__(self, data):
+        self.data = data
+        self.calls = []
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        with self._lock:
+            self.calls.append((url, kwargs))
+        data = self.data
+        if callable(data):
+            data = data(url, kwargs.get('params'))
+        if isinstance(data, FakeResponse):
+            return data
+        return FakeResponse(data)
+
+    def close(self):
+        self.closed = True
+
+
+class _RedisHandler(socketserver.StreamRequestHandler):
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            size = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(size + 2)[:-2])
+        return args
+
+    def handle(self):
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            self.wfile.write(self.server.execute(args))
+
+
+class FakeRedisServer(socketserver.ThreadingTCPServer):
+    """ A local stand-in for a Redis server, implementing the commands the
+    Redis cache backend sends. """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self):
+        socketserver.ThreadingTCPServer.__init__(self, ('127.0.0.1', 0),
+                                                 _RedisHandler)
+        self.data = {}
+        self.commands = []
+        self._lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, args=(0.05,))
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def _get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and time.time() >= expires_at:
+            del self.data[key]
+            return None
+        return value
+
+    def _set(self, key, value, *options):
+        options = [option.upper() for option in options]
+        if b'NX' in options and self._get(key) is not None:
+            return b'$-1\r\n'
+        expires_at = None
+        if b'PX' in options:
+            px = int(options[options.index(b'PX') + 1])
+            expires_at = time.time() + px / 1000.0
+        self.data[key] = (value, expires_at)
+        return b'+OK\r\n'
+
+    def execute(self, args):
+        command = args[0].upper()
+        with self._lock:
+            self.commands.append(command)
+            if command == b'GET':
+                value = self._get(args[1])
+                if value is None:
+                    return b'$-1\r\n'
+                return (b'$' + str(len(value)).encode('ascii') + b'\r\n' +
+                        value + b'\r\n')
+            if command == b'SET':
+                return self._set(*args[1:])
+            if command == b'DEL':
+                count = int(self.data.pop(args[1], None) is not None)
+                return b':' + str(count).encode('ascii') + b'\r\n'
+            if command == b'EVAL' and args[1] == DELETE_IF_SCRIPT.encode():
+                count = int(self._get(args[3]) == args[4])
+                if count:
+                    del self.data[args[3]]
+                return b':' + str(count).encode('ascii') + b'\r\n'
+            if command in (b'AUTH', b'SELECT'):
+                return b'+OK\r\n'
+        return b'-ERR unknown command\r\n'
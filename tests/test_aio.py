@@ -0,0 +1,439 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from fixerio.aio import AsyncBatcher, AsyncFixerio, AsyncSingleFlight
+from fixerio.backends import MemoryBackend
+from fixerio.cache import LATEST, RateCache, SharedCache
+from fixerio.exceptions import FixerioException, RateLimitExceeded
+from fixerio.instrumentation import REQUEST, Instrumentation
+from fixerio.ratelimit import RateLimiter
+from fixerio.retry import HALF_OPEN, CircuitBreaker
+from fixerio.snapshot import Snapshot, write_snapshot
+from fixerio.symbols import SymbolSet
+
+from .fakes import FakeResponse, FakeSession
+
+BASE_URL = 'http://data.fixer.io/api/'
+
+
+class AsyncFakeResponse(FakeResponse):
+    """ A :class:`FakeResponse` read like the responses of aiohttp. """
+
+    @property
+    def status(self):
+        return self.status_code
+
+    async def __aenter__(self):
+        await asyncio.sleep(0)
+        return self
+
+    async def __aexit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise asyncio.TimeoutError('{0} error'.format(self.status))
+
+    async def read(self):
+        return self.content
+
+
+class AsyncFakeSession(FakeSession):
+    """ A :class:`FakeSession` used like an aiohttp session, answering with
+    `status` and `headers` and counting the requests in flight. """
+
+    def __init__(self, data, status=200):
+        super(AsyncFakeSession, self).__init__(data)
+        self.status = status
+        self.headers = {}
+        self.sent_headers = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def get(self, url, params=None, headers=None):
+        self.sent_headers.append(headers)
+        response = super(AsyncFakeSession, self).get(url, params=params)
+        if not isinstance(response, AsyncFakeResponse):
+            response = AsyncFakeResponse(response.data, self.status,
+                                         self.headers)
+        return self._track(response)
+
+    def _track(self, response):
+        session = self
+
+        class Tracked(object):
+            async def __aenter__(self):
+                session.in_flight += 1
+                session.max_in_flight = max(session.max_in_flight,
+                                            session.in_flight)
+                return await response.__aenter__()
+
+            async def __aexit__(self, *args):
+                session.in_flight -= 1
+
+        return Tracked()
+
+    async def close(self):
+        self.closed = True
+
+
+def run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+class AsyncFixerioTestCase(unittest.TestCase):
+    def setUp(self):
+        self.access_key = 'test-access-key'
+        self.expected_response = {'base': 'EUR', 'date': '2000-01-03',
+                                  'rates': {'GBP': 0.6246, 'USD': 1.009}}
+        self.session = AsyncFakeSession(self.expected_response)
+
+    def test_returns_latest_rates(self):
+        client = AsyncFixerio(self.access_key, session=self.session)
+
+        response = run(client.latest(symbols=['USD', 'GBP']))
+
+        self.assertDictEqual(response, self.expected_response)
+        self.assertEqual(self.session.calls[0],
+                         (BASE_URL + 'latest',
+                          {'params': {'access_key': self.access_key,
+                                      'symbols': 'GBP,USD'}}))
+
+    def test_returns_historical_rates(self):
+        client = AsyncFixerio(self.access_key, symbols=['GBP'],
+                              session=self.session)
+
+        response = run(client.historical_rates('2000-01-03'))
+
+        self.assertDictEqual(response, self.expected_response)
+        self.assertEqual(self.session.calls[0],
+                         (BASE_URL + '2000-01-03',
+                          {'params': {'access_key': self.access_key,
+                                      'symbols': 'GBP'}}))
+
+    def test_bounds_concurrent_requests(self):
+        client = AsyncFixerio(self.access_key, session=self.session,
+                              concurrency=3)
+        dates = ['2000-01-{0:02d}'.format(day) for day in range(1, 21)]
+
+        async def fetch_all():
+            return await asyncio.gather(
+                *[client.historical_rates(date) for date in dates])
+
+        responses = run(fetch_all())
+
+        self.assertEqual(len(responses), 20)
+        self.assertEqual(self.session.max_in_flight, 3)
+
+    def test_serves_from_cache(self):
+        client = AsyncFixerio(self.access_key, session=self.session,
+                              cache=RateCache())
+
+        async def fetch_twice():
+            await client.historical_rates('2000-01-03')
+            return await client.historical_rates('2000-01-03', ['USD'])
+
+        response = run(fetch_twice())
+
+        self.assertDictEqual(response['rates'], {'USD': 1.009})
+        self.assertEqual(len(self.session.calls), 1)
+
+    def test_sends_validators_of_last_response(self):
+        self.session.headers = {'ETag': '"v1"'}
+        client = AsyncFixerio(self.access_key, session=self.session)
+
+        async def fetch_twice():
+            first = await client.historical_rates('2000-01-03')
+            self.session.status = 304
+            second = await client.historical_rates('2000-01-03')
+            return first, second
+
+        first, second = run(fetch_twice())
+
+        self.assertDictEqual(first, second)
+        self.assertEqual(self.session.sent_headers,
+                         [None, {'If-None-Match': '"v1"'}])
+
+    def test_times_requests(self):
+        events = []
+        instrumentation = Instrumentation()
+        instrumentation.subscribe(lambda event, data: events.append(data),
+                                  [REQUEST])
+        client = AsyncFixerio(self.access_key, session=self.session,
+                              instrumentation=instrumentation)
+
+        run(client.historical_rates('2000-01-03'))
+
+        data, = events
+        self.assertEqual(data['url'], BASE_URL + '2000-01-03')
+        self.assertEqual(data['status'], 200)
+        self.assertGreater(data['bytes'], 0)
+        self.assertIsNone(data['connect'])
+        self.assertGreaterEqual(data['duration'], data['ttfb'])
+
+    def test_coalesces_identical_requests(self):
+        client = AsyncFixerio(self.access_key, session=self.session)
+
+        async def fetch_all():
+            return await asyncio.gather(
+                *[client.latest(['GBP']) for _ in range(10)])
+
+        responses = run(fetch_all())
+
+        self.assertEqual(len(responses), 10)
+        self.assertEqual(len(self.session.calls), 1)
+
+    def test_batches_latest_rates_of_other_symbols(self):
+        client = AsyncFixerio(self.access_key, session=self.session,
+                              batch_window=0.01)
+
+        async def fetch_all():
+            return await asyncio.gather(client.latest(['GBP']),
+                                        client.latest(['usd']))
+
+        gbp, usd = run(fetch_all())
+
+        self.assertEqual(self.session.calls,
+                         [(BASE_URL + 'latest',
+                           {'params': {'access_key': self.access_key,
+                                       'symbols': 'GBP,USD'}})])
+        self.assertEqual(gbp['rates'], {'GBP': 0.6246})
+        self.assertEqual(usd['rates'], {'USD': 1.009})
+        self.assertEqual(client._batcher.batches, 1)
+
+    def test_does_not_coalesce_if_disabled(self):
+        client = AsyncFixerio(self.access_key, session=self.session,
+                              coalesce=False)
+
+        async def fetch_all():
+            return await asyncio.gather(*[client.latest() for _ in range(3)])
+
+        run(fetch_all())
+
+        self.assertEqual(len(self.session.calls), 3)
+
+    def test_serves_latest_rates_from_refresher(self):
+        client = AsyncFixerio(self.access_key, session=self.session)
+
+        async def refresh_and_read():
+            refresher = await client.start_refresher(interval=0.01, offset=0)
+            while refresher.refreshes < 3:
+                await asyncio.sleep(0.01)
+            response = await client.latest(symbols=['GBP'])
+            await client.stop_refresher()
+            calls = len(self.session.calls)
+            await asyncio.sleep(0.05)
+            await client.close()
+            return calls, refresher.refreshes, response
+
+        calls, refreshes, response = run(refresh_and_read())
+
+        self.assertEqual(response['rates'], {'GBP': 0.6246})
+        # Only the refresher sent requests, the last one maybe cancelled.
+        self.assertIn(calls, (refreshes, refreshes + 1))
+        self.assertEqual(len(self.session.calls), calls)
+        self.assertIsNone(client.refresher)
+
+    def test_raises_exception_if_bad_request(self):
+        session = AsyncFakeSession({'success': False}, status=400)
+        client = AsyncFixerio(self.access_key, session=session)
+
+        with self.assertRaises(FixerioException):
+            run(client.latest())
+
+    def test_raises_exception_if_response_is_not_json(self):
+        class HTMLResponse(AsyncFakeResponse):
+            content = b'<html>Bad gateway</html>'
+
+        client = AsyncFixerio(self.access_key,
+                              session=AsyncFakeSession(HTMLResponse(None)))
+
+        with self.assertRaises(FixerioException):
+            run(client.latest())
+
+    def test_offloads_blocking_cache_backends(self):
+        threads = set()
+
+        class Backend(MemoryBackend):
+            def get(self, key):
+                threads.add(threading.current_thread())
+                return super(Backend, self).get(key)
+
+            def add(self, key, value, ttl=None):
+                threads.add(threading.current_thread())
+                return super(Backend, self).add(key, value, ttl)
+
+        client = AsyncFixerio(self.access_key, session=self.session,
+                              cache=SharedCache(Backend()))
+
+        run(client.historical_rates('2000-01-03'))
+        response = run(client.historical_rates('2000-01-03'))
+
+        self.assertEqual(response['rates'], self.expected_response['rates'])
+        self.assertEqual(len(self.session.calls), 1)
+        self.assertTrue(threads)
+        self.assertNotIn(threading.current_thread(), threads)
+
+    def test_releases_trial_request_beyond_rate_limit(self):
+        session = AsyncFakeSession(None, status=503)
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        client = AsyncFixerio(self.access_key, session=session,
+                              circuit_breaker=breaker,
+                              rate_limiter=RateLimiter(rate=0.001))
+        with self.assertRaises(FixerioException):
+            run(client.latest())
+
+        with self.assertRaises(RateLimitExceeded):
+            run(client.latest())
+
+        self.assertEqual(breaker.state, HALF_OPEN)
+        breaker.before_request()
+
+    def test_falls_back_on_snapshot_when_unreachable(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'rates.fxs')
+        write_snapshot(path, [(LATEST, self.expected_response, True)])
+        snapshot = Snapshot(path)
+        self.addCleanup(snapshot.close)
+        session = AsyncFakeSession(None, status=503)
+        client = AsyncFixerio(self.access_key, snapshot=snapshot,
+                              session=session)
+
+        response = run(client.latest())
+
+        self.assertDictEqual(response['rates'],
+                             self.expected_response['rates'])
+        self.assertEqual(len(session.calls), 1)
+        with self.assertRaises(FixerioException):
+            run(client.historical_rates('2000-01-04'))
+
+    def test_close_leaves_injected_session_open(self):
+        async def use_client():
+            async with AsyncFixerio(self.access_key,
+                                    session=self.session) as client:
+                await client.latest()
+
+        run(use_client())
+
+        self.assertFalse(self.session.closed)
+
+
+class AsyncSingleFlightTestCase(unittest.TestCase):
+    def test_shares_exception_of_call_in_flight(self):
+        flights = AsyncSingleFlight()
+        calls = []
+
+        async def fail():
+            calls.append(None)
+            await asyncio.sleep(0.01)
+            raise FixerioException('failed')
+
+        async def fetch_all():
+            return await asyncio.gather(
+                *[flights.do('key', fail) for _ in range(3)],
+                return_exceptions=True)
+
+        errors = run(fetch_all())
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(isinstance(error, FixerioException)
+                            for error in errors))
+        self.assertEqual(len(flights), 0)
+
+    def test_joined_calls_outlive_cancelled_leader(self):
+        flights = AsyncSingleFlight()
+        calls = []
+
+        async def fetch():
+            calls.append(None)
+            await asyncio.sleep(0.01)
+            return {'rates': {'USD': 1.009}}
+
+        async def cancel_leader():
+            leader = asyncio.ensure_future(flights.do('key', fetch))
+            await asyncio.sleep(0)
+            joiner = asyncio.ensure_future(flights.do('key', fetch))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await joiner
+
+        self.assertEqual(run(cancel_leader()), {'rates': {'USD': 1.009}})
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(flights), 0)
+
+    def test_cancels_call_once_every_caller_is(self):
+        flights = AsyncSingleFlight()
+        cancelled = []
+
+        async def fetch():
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                cancelled.append(None)
+                raise
+
+        async def cancel_all():
+            caller = asyncio.ensure_future(flights.do('key', fetch))
+            await asyncio.sleep(0.01)
+            caller.cancel()
+            await asyncio.sleep(0.01)
+
+        run(cancel_all())
+
+        self.assertEqual(len(cancelled), 1)
+        self.assertEqual(len(flights), 0)
+
+    def test_last_cancelled_caller_waits_for_call(self):
+        flights = AsyncSingleFlight()
+        cancelled = []
+
+        async def fetch():
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                await asyncio.sleep(0.01)
+                cancelled.append(None)
+                raise
+
+        async def cancel_caller():
+            caller = asyncio.ensure_future(flights.do('key', fetch))
+            await asyncio.sleep(0.01)
+            caller.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await caller
+            return len(cancelled)
+
+        self.assertEqual(run(cancel_caller()), 1)
+
+
+class AsyncBatcherTestCase(unittest.TestCase):
+    def test_joined_calls_outlive_cancelled_leader(self):
+        batcher = AsyncBatcher(window=0.01)
+        calls = []
+
+        async def fetch(symbols):
+            calls.append(symbols)
+            return {'rates': {'GBP': 0.6246, 'USD': 1.009}}
+
+        async def cancel_leader():
+            leader = asyncio.ensure_future(
+                batcher.do('key', SymbolSet(['GBP']), fetch))
+            await asyncio.sleep(0)
+            joiner = asyncio.ensure_future(
+                batcher.do('key', SymbolSet(['USD']), fetch))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await joiner
+
+        self.assertEqual(run(cancel_leader()), {'rates': {'USD': 1.009}})
+        self.assertEqual(calls, [SymbolSet(['GBP', 'USD'])])
+        self.assertEqual(len(batcher), 0)
@@ -0,0 +1,134 @@
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from fixerio.backends import FileBackend, MemoryBackend, RedisBackend
+from fixerio.exceptions import CacheBackendError
+
+from .fakes import FakeRedisServer
+
+
+class BackendTestsMixin(object):
+    def test_returns_none_for_absent_key(self):
+        self.assertIsNone(self.backend.get('absent'))
+
+    def test_sets_and_gets_value(self):
+        self.backend.set('key', b'\x00value\r\n')
+
+        self.assertEqual(self.backend.get('key'), b'\x00value\r\n')
+
+    def test_replaces_value(self):
+        self.backend.set('key', b'old')
+        self.backend.set('key', b'new')
+
+        self.assertEqual(self.backend.get('key'), b'new')
+
+    def test_expires_value(self):
+        self.backend.set('key', b'value', ttl=0.05)
+        self.assertEqual(self.backend.get('key'), b'value')
+
+        time.sleep(0.1)
+
+        self.assertIsNone(self.backend.get('key'))
+
+    def test_adds_only_absent_key(self):
+        self.assertTrue(self.backend.add('key', b'first', ttl=10))
+        self.assertFalse(self.backend.add('key', b'second', ttl=10))
+
+        self.assertEqual(self.backend.get('key'), b'first')
+
+    def test_adds_expired_key(self):
+        self.backend.add('key', b'first', ttl=0.05)
+        time.sleep(0.1)
+
+        self.assertTrue(self.backend.add('key', b'second'))
+
+    def test_deletes_key(self):
+        self.backend.set('key', b'value')
+
+        self.backend.delete('key')
+        self.backend.delete('key')
+
+        self.assertIsNone(self.backend.get('key'))
+
+    def test_deletes_key_only_if_it_holds_value(self):
+        self.backend.set('key', b'other')
+
+        self.assertFalse(self.backend.delete_if('key', b'value'))
+        self.assertFalse(self.backend.delete_if('absent', b'value'))
+        self.assertEqual(self.backend.get('key'), b'other')
+        self.assertTrue(self.backend.delete_if('key', b'other'))
+        self.assertIsNone(self.backend.get('key'))
+
+
+class MemoryBackendTestCase(BackendTestsMixin, unittest.TestCase):
+    def setUp(self):
+        self.backend = MemoryBackend()
+
+    def test_evicts_oldest_entries(self):
+        backend = MemoryBackend(maxsize=2)
+        backend.set('a', b'1')
+        backend.set('b', b'2')
+        backend.set('c', b'3')
+
+        self.assertIsNone(backend.get('a'))
+        self.assertEqual(len(backend), 2)
+
+
+class FileBackendTestCase(BackendTestsMixin, unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.backend = FileBackend(self.path)
+
+    def test_shares_entries_between_instances(self):
+        self.backend.set('key', b'value')
+
+        self.assertEqual(FileBackend(self.path).get('key'), b'value')
+        self.assertFalse(FileBackend(self.path).add('key', b'other'))
+
+    def test_raises_exception_if_directory_is_gone(self):
+        shutil.rmtree(self.path)
+
+        with self.assertRaises(CacheBackendError):
+            self.backend.set('key', b'value')
+        with self.assertRaises(CacheBackendError):
+            self.backend.add('key', b'value')
+        with self.assertRaises(CacheBackendError):
+            self.backend.delete('key')
+        os.makedirs(self.path)
+
+
+class RedisBackendTestCase(BackendTestsMixin, unittest.TestCase):
+    def setUp(self):
+        self.server = FakeRedisServer().start()
+        self.addCleanup(self.server.stop)
+        self.backend = RedisBackend(port=self.server.port, db=1,
+                                    password='secret', socket_timeout=5)
+        self.addCleanup(self.backend.close)
+
+    def test_authenticates_and_selects_database(self):
+        self.backend.get('key')
+
+        self.assertEqual(self.server.commands, [b'AUTH', b'SELECT', b'GET'])
+
+    def test_reuses_connection(self):
+        self.backend.set('key', b'value')
+        self.backend.get('key')
+
+        self.assertEqual(self.server.commands.count(b'AUTH'), 1)
+
+    def test_raises_exception_on_error_reply(self):
+        with self.assertRaises(CacheBackendError):
+            self.backend.execute('FLUSHALL')
+
+    def test_raises_exception_if_server_is_down(self):
+        self.server.stop()
+        backend = RedisBackend(port=self.server.port, socket_timeout=1)
+
+        with self.assertRaises(CacheBackendError):
+            backend.get('key')
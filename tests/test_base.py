@@ -3,6 +3,7 @@ from __future__ import unicode_literals
 import unittest
 
 from fixerio.client import Fixerio
+from fixerio.symbols import SymbolSet
 
 
 class FixerioInitTestCase(unittest.TestCase):
@@ -27,4 +28,9 @@ class FixerioInitTestCase(unittest.TestCase):
 
         client = Fixerio('test-access-key', symbols=symbols)
 
-        self.assertEqual(client.symbols, symbols)
+        self.assertIs(client.symbols, SymbolSet(symbols))
+        self.assertEqual(client.symbols, ('GBP', 'USD'))
+
+    def test_raises_if_symbols_are_unknown(self):
+        with self.assertRaises(ValueError):
+            Fixerio('test-access-key', symbols=['USD', 'XYZ'])
@@ -0,0 +1,113 @@
+from __future__ import unicode_literals
+
+import threading
+import time
+import unittest
+
+from fixerio.batching import Batcher
+from fixerio.client import BASE_URL, Fixerio
+from fixerio.symbols import SymbolSet
+
+from .fakes import FakeSession, respond
+
+LATEST_URL = BASE_URL + 'latest'
+
+
+def until_calls(batcher, calls):
+    """ Makes a batch wait until `calls` calls joined it. """
+    def sleep(window):
+        deadline = time.time() + 5
+        while batcher.calls < calls and time.time() < deadline:
+            time.sleep(0.001)
+    return sleep
+
+
+def call_all(function, arguments):
+    results = [None] * len(arguments)
+
+    def run(i):
+        try:
+            results[i] = function(arguments[i])
+        except Exception as ex:
+            results[i] = ex
+
+    threads = [threading.Thread(target=run, args=(i,))
+               for i in range(len(arguments))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class BatcherTestCase(unittest.TestCase):
+    def test_makes_one_call_for_the_union_of_symbols(self):
+        batcher = Batcher()
+        batcher.sleep = until_calls(batcher, 3)
+        unions = []
+
+        def function(symbols):
+            unions.append(symbols)
+            return respond(LATEST_URL, {'symbols': symbols.query})
+
+        results = call_all(
+            lambda symbols: batcher.do('key', SymbolSet(symbols), function),
+            [['USD'], ['GBP', 'USD'], ['JPY']])
+
+        self.assertEqual(unions, [SymbolSet(['GBP', 'JPY', 'USD'])])
+        self.assertEqual([result['rates'] for result in results],
+                         [{'USD': 4.0}, {'GBP': 3.5, 'USD': 4.0},
+                          {'JPY': 128.0}])
+        self.assertEqual((batcher.calls, batcher.batches, len(batcher)),
+                         (3, 1, 0))
+
+    def test_raises_the_error_of_the_batch_in_every_call(self):
+        batcher = Batcher()
+        batcher.sleep = until_calls(batcher, 2)
+
+        def function(symbols):
+            raise ValueError('failed')
+
+        results = call_all(
+            lambda symbols: batcher.do('key', SymbolSet(symbols), function),
+            [['USD'], ['GBP']])
+
+        self.assertTrue(all(isinstance(result, ValueError)
+                            for result in results))
+        self.assertEqual(len(batcher), 0)
+
+    def test_batches_keys_apart(self):
+        batcher = Batcher(window=0)
+
+        batcher.do('a', SymbolSet(['USD']), lambda symbols: respond(
+            LATEST_URL, {'symbols': symbols.query}))
+        batcher.do('b', SymbolSet(['USD']), lambda symbols: respond(
+            LATEST_URL, {'symbols': symbols.query}))
+
+        self.assertEqual(batcher.batches, 2)
+
+
+class FixerioBatchingTestCase(unittest.TestCase):
+    def test_merges_concurrent_latest_calls(self):
+        session = FakeSession(respond)
+        client = Fixerio('test-access-key', session=session,
+                         batch_window=0.005)
+        client._batcher.sleep = until_calls(client._batcher, 3)
+
+        results = call_all(lambda symbols: client.latest(symbols=symbols),
+                           [['USD'], ['gbp'], ['USD', 'JPY']])
+
+        self.assertEqual(len(session.calls), 1)
+        self.assertEqual(session.calls[0][1]['params']['symbols'],
+                         'GBP,JPY,USD')
+        self.assertEqual([sorted(result['rates']) for result in results],
+                         [['USD'], ['GBP'], ['JPY', 'USD']])
+
+    def test_does_not_batch_by_default(self):
+        session = FakeSession(respond)
+        client = Fixerio('test-access-key', session=session)
+
+        client.latest(symbols=['USD'])
+        client.latest(symbols=['GBP'])
+
+        self.assertEqual(len(session.calls), 2)
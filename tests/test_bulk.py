@@ -0,0 +1,169 @@
+from __future__ import unicode_literals
+
+import os
+import pickle
+import shutil
+import signal
+import tempfile
+import unittest
+
+from fixerio.bulk import historical_rates_range
+from fixerio.cache import RateCache
+from fixerio.client import Fixerio
+from fixerio.decoding import RateSnapshot
+from fixerio.ratelimit import RateLimiter
+from fixerio.retry import CircuitBreaker, RetryPolicy
+from fixerio.store import HistoricalStore
+
+from .fakes import FakeSession, historical
+
+
+class StoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.store = HistoricalStore(self.directory)
+        self.addCleanup(self.store.close)
+
+
+class PicklingTestCase(StoreTestCase):
+    def test_pickles_configuration_only(self):
+        client = Fixerio('test-access-key', symbols=['USD', 'GBP'],
+                         base='USD', session=FakeSession(None),
+                         cache=RateCache(), store=self.store,
+                         retry=RetryPolicy(max_attempts=5),
+                         circuit_breaker=CircuitBreaker(failure_threshold=2),
+                         result_type='snapshot', conditional=False,
+                         pool_maxsize=3)
+        client.base_url = 'http://localhost/api/'
+
+        copy = pickle.loads(pickle.dumps(client))
+        self.addCleanup(copy.store.close)
+
+        self.assertEqual((copy.access_key, copy.symbols, copy.base),
+                         ('test-access-key', client.symbols, 'USD'))
+        self.assertEqual((copy.result_type, copy.pool_maxsize, copy.base_url),
+                         ('snapshot', 3, 'http://localhost/api/'))
+        self.assertIsNone(copy.validators)
+        self.assertIsNone(copy.cache)
+        self.assertIsNone(copy._session)
+        self.assertEqual(copy.retry.max_attempts, 5)
+        self.assertEqual(copy.circuit_breaker.failure_threshold, 2)
+        self.assertEqual(copy.store.path, self.directory)
+        self.assertIsNot(copy.store, self.store)
+
+    def test_pickles_rate_snapshots(self):
+        snapshot = RateSnapshot('EUR', '2000-01-03', {'USD': 1.009})
+
+        self.assertEqual(pickle.loads(pickle.dumps(snapshot)), snapshot)
+
+
+class ForkTestCase(StoreTestCase):
+    def test_resets_client_in_forked_process(self):
+        client = Fixerio('test-access-key', batch_window=0.01)
+        session = client.session
+        flights = client._flights
+
+        client._pid = None
+        self.assertIsNot(client.session, session)
+        self.assertIsNot(client._flights, flights)
+        self.assertEqual(client._batcher.window, 0.01)
+
+    def test_keeps_session_passed_to_constructor(self):
+        session = FakeSession(None)
+        client = Fixerio('test-access-key', session=session)
+
+        client._pid = None
+        self.assertIs(client.session, session)
+
+    def test_drops_refresher_in_forked_process(self):
+        class Refresher(object):
+            def get(self, symbols):
+                return {'base': 'EUR', 'rates': {'USD': 1.0}}
+
+        latest = {'base': 'EUR', 'rates': {'USD': 1.009}}
+        client = Fixerio('test-access-key', session=FakeSession(latest))
+        client.refresher = Refresher()
+
+        client._pid = None
+        self.assertEqual(client.latest(), latest)
+        self.assertIsNone(client.refresher)
+
+    @unittest.skipUnless(hasattr(os, 'register_at_fork'),
+                         'requires os.register_at_fork')
+    def test_resets_locks_in_forked_process(self):
+        cache = RateCache()
+        limiter = RateLimiter(rate=1)
+        locks = [cache._lock, limiter._lock]
+        for lock in locks:
+            lock.acquire()
+        self.addCleanup(lambda: [lock.release() for lock in locks])
+
+        pid = os.fork()
+        if pid == 0:
+            signal.alarm(5)
+            try:
+                cache.get('latest', None)
+                limiter.bucket('test-access-key')
+                status = 0
+            except BaseException:
+                status = 1
+            os._exit(status)
+        _, status = os.waitpid(pid, 0)
+
+        self.assertEqual(status, 0)
+
+    def test_reopens_store_files_in_forked_process(self):
+        self.store.put(historical('2000-01-03', {'USD': 1.009}))
+        matrix = self.store._matrix('EUR')
+
+        self.store._pid = None
+        self.assertIsNot(self.store._matrix('EUR'), matrix)
+        self.assertEqual(self.store.get('2000-01-03')['rates'],
+                         {'USD': 1.009})
+        matrix.close()
+
+    @unittest.skipUnless(hasattr(os, 'fork'), 'requires fork')
+    def test_forked_process_uses_its_own_store_files(self):
+        self.store.put(historical('2000-01-03', {'USD': 1.009}))
+
+        pid = os.fork()
+        if pid == 0:
+            try:
+                self.store.put(historical('2000-01-04', {'USD': 1.5}))
+                status = 0 if self.store._pid == os.getpid() else 1
+            except BaseException:
+                status = 2
+            os._exit(status)
+        _, status = os.waitpid(pid, 0)
+
+        self.assertEqual(status, 0)
+        self.assertEqual(self.store.get('2000-01-04')['rates'],
+                         {'USD': 1.5})
+
+
+class BulkTestCase(StoreTestCase):
+    def test_yields_rates_in_date_order(self):
+        dates = ['2000-01-{0:02d}'.format(day) for day in range(1, 11)]
+        for day, date in enumerate(dates):
+            self.store.put(historical(date, {'USD': 1.0 + day}))
+        client = Fixerio('test-access-key', store=self.store,
+                         session=FakeSession(None))
+
+        responses = list(historical_rates_range(
+            client, dates[0], dates[-1], processes=2, chunk_size=3))
+
+        self.assertEqual([response['date'] for response in responses], dates)
+        self.assertEqual([response['rates']['USD'] for response in responses],
+                         [1.0 + day for day in range(10)])
+
+    def test_decodes_in_workers(self):
+        self.store.put(historical('2000-01-03', {'USD': 1.009}))
+        client = Fixerio('test-access-key', store=self.store,
+                         result_type='snapshot')
+
+        snapshot, = historical_rates_range(client, '2000-01-03',
+                                           '2000-01-03', processes=1)
+
+        self.assertIsInstance(snapshot, RateSnapshot)
+        self.assertEqual(snapshot['USD'], 1.009)
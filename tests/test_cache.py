@@ -0,0 +1,304 @@
+from __future__ import unicode_literals
+
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from fixerio.backends import FileBackend, MemoryBackend
+from fixerio.cache import HISTORICAL, LATEST, RateCache, SharedCache
+from fixerio.client import Fixerio
+from fixerio.exceptions import CacheBackendError
+
+from .fakes import Clock, FakeSession
+
+
+class RateCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock(1000)
+        self.cache = RateCache(maxsize=2, latest_ttl=60, clock=self.clock)
+        self.response = {'base': 'EUR', 'date': '2016-05-19',
+                         'timestamp': 1000,
+                         'rates': {'GBP': 0.76585, 'USD': 1.1197}}
+
+    def test_returns_none_on_miss(self):
+        self.assertIsNone(self.cache.get(LATEST))
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_returns_cached_response(self):
+        self.cache.set(LATEST, self.response, symbols=['USD', 'GBP'])
+
+        response = self.cache.get(LATEST, symbols=['GBP', 'USD'])
+
+        self.assertDictEqual(response, self.response)
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_returns_a_copy(self):
+        self.cache.set(LATEST, self.response)
+
+        self.cache.get(LATEST)['rates']['GBP'] = 0
+
+        self.assertEqual(self.cache.get(LATEST)['rates']['GBP'], 0.76585)
+
+    def test_serves_subset_from_cached_superset(self):
+        self.cache.set(LATEST, self.response, symbols=['USD', 'GBP'])
+
+        response = self.cache.get(LATEST, symbols=['USD'])
+
+        self.assertDictEqual(response['rates'], {'USD': 1.1197})
+        self.assertIsNone(self.cache.get(LATEST, symbols=['USD', 'JPY']))
+
+    def test_serves_any_symbols_from_all_symbols(self):
+        self.cache.set(LATEST, self.response)
+
+        response = self.cache.get(LATEST, symbols=['GBP'])
+
+        self.assertDictEqual(response['rates'], {'GBP': 0.76585})
+
+    def test_expires_latest_rates_after_publication(self):
+        self.cache.set(LATEST, self.response)
+
+        self.clock.now = 1059
+        self.assertIsNotNone(self.cache.get(LATEST))
+        self.clock.now = 1060
+        self.assertIsNone(self.cache.get(LATEST))
+
+    def test_expires_latest_rates_by_date_without_timestamp(self):
+        del self.response['timestamp']
+        self.clock.now = 1463616000  # 2016-05-19T00:00:00Z
+        self.cache.set(LATEST, self.response)
+
+        self.clock.now += 60
+        self.assertIsNone(self.cache.get(LATEST))
+
+    def test_never_expires_historical_rates(self):
+        self.cache.set(HISTORICAL, self.response, date='2016-05-19')
+
+        self.clock.now = 10 ** 10
+        response = self.cache.get(HISTORICAL, date='2016-05-19')
+
+        self.assertDictEqual(response, self.response)
+        self.assertIsNone(self.cache.get(HISTORICAL, date='2016-05-20'))
+
+    def test_evicts_least_recently_used(self):
+        self.cache.set(HISTORICAL, self.response, date='2016-05-17')
+        self.cache.set(HISTORICAL, self.response, date='2016-05-18')
+        self.cache.get(HISTORICAL, date='2016-05-17')
+
+        self.cache.set(HISTORICAL, self.response, date='2016-05-19')
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.evictions, 1)
+        self.assertIsNone(self.cache.get(HISTORICAL, date='2016-05-18'))
+        self.assertIsNotNone(self.cache.get(HISTORICAL, date='2016-05-17'))
+
+    def test_lists_expired_responses_too(self):
+        self.cache.set(LATEST, self.response, symbols=['USD'])
+        self.clock.now += 120
+
+        self.assertEqual(self.cache.items(),
+                         [((LATEST, None, None, frozenset(['USD'])),
+                           self.response)])
+
+    def test_stats(self):
+        self.cache.set(LATEST, self.response)
+        self.cache.get(LATEST)
+        self.cache.get(HISTORICAL, date='2016-05-19')
+
+        self.assertEqual(self.cache.stats,
+                         {'hits': 1, 'misses': 1, 'stale_hits': 0,
+                          'evictions': 0, 'size': 1})
+
+
+class FixerioCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.response = {'success': True, 'timestamp': int(time.time()),
+                         'base': 'EUR', 'date': '2016-05-19',
+                         'rates': {'GBP': 0.76585, 'USD': 1.1197}}
+        self.session = FakeSession(self.response)
+        self.client = Fixerio('test-access-key', session=self.session,
+                              cache=RateCache())
+
+    def test_serves_latest_rates_from_cache(self):
+        self.client.latest(symbols=['USD', 'GBP'])
+        response = self.client.latest(symbols=['GBP'])
+
+        self.assertDictEqual(response['rates'], {'GBP': 0.76585})
+        self.assertEqual(len(self.session.calls), 1)
+
+    def test_serves_historical_rates_from_cache(self):
+        self.client.historical_rates('2016-05-19')
+        self.client.historical_rates('2016-05-19')
+        self.client.historical_rates('2016-05-20')
+
+        self.assertEqual(len(self.session.calls), 2)
+
+    def test_does_not_cache_failed_responses(self):
+        self.session.data = {'success': False, 'error': {'code': 101}}
+
+        self.client.latest()
+        self.client.latest()
+
+        self.assertEqual(len(self.session.calls), 2)
+
+
+class BrokenBackend(MemoryBackend):
+    def get(self, key, *args, **kwargs):
+        raise CacheBackendError('down')
+
+    set = add = get
+
+
+class SharedCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock(1000)
+        self.backend = MemoryBackend(clock=self.clock)
+        self.cache = SharedCache(self.backend, latest_ttl=60, stale_ttl=600,
+                                 clock=self.clock)
+        self.response = {'base': 'EUR', 'date': '2016-05-19',
+                         'timestamp': 1000,
+                         'rates': {'GBP': 0.76585, 'USD': 1.1197}}
+
+    def test_returns_none_on_miss(self):
+        self.assertIsNone(self.cache.get(LATEST))
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_shares_responses_between_caches(self):
+        self.cache.set(LATEST, self.response, symbols=['USD', 'GBP'])
+        other = SharedCache(self.backend, clock=self.clock)
+
+        response = other.get(LATEST, symbols=['GBP', 'USD'])
+
+        self.assertDictEqual(response, self.response)
+        self.assertEqual(other.hits, 1)
+
+    def test_serves_any_symbols_from_all_symbols(self):
+        self.cache.set(HISTORICAL, self.response, date='2016-05-19')
+
+        response = self.cache.get(HISTORICAL, date='2016-05-19',
+                                  symbols=['GBP'])
+
+        self.assertDictEqual(response['rates'], {'GBP': 0.76585})
+
+    def test_keys_on_base(self):
+        self.cache.set(LATEST, self.response, base='EUR')
+
+        self.assertIsNone(self.cache.get(LATEST, base='USD'))
+
+    def test_expires_latest_rates_after_publication(self):
+        self.cache.set(LATEST, self.response)
+        self.clock.now = 1060
+
+        self.assertIsNone(self.cache.get(LATEST))
+        self.assertIsNotNone(self.cache.get(LATEST, allow_stale=True))
+        self.assertEqual(self.cache.stale_hits, 1)
+
+    def test_drops_stale_latest_rates(self):
+        self.cache.set(LATEST, self.response)
+        self.clock.now = 1660
+
+        self.assertIsNone(self.cache.get(LATEST, allow_stale=True))
+
+    def test_never_expires_historical_rates(self):
+        self.cache.set(HISTORICAL, self.response, date='2016-05-19')
+        self.clock.now = 10 ** 9
+
+        self.assertIsNotNone(self.cache.get(HISTORICAL, date='2016-05-19'))
+
+    def test_handles_backend_errors_as_misses(self):
+        cache = SharedCache(BrokenBackend())
+
+        cache.set(LATEST, self.response)
+
+        self.assertIsNone(cache.get(LATEST))
+        self.assertEqual(cache.stats, {'hits': 0, 'misses': 1,
+                                       'stale_hits': 0, 'errors': 2})
+
+    def test_handles_undecodable_entries_as_misses(self):
+        self.backend.set(self.cache.make_key(LATEST), b'{"base": "EU')
+
+        self.assertIsNone(self.cache.get(LATEST))
+        self.assertEqual(self.cache.errors, 1)
+
+    def test_lock_is_exclusive(self):
+        first = self.cache.lock(LATEST)
+        second = self.cache.lock(LATEST)
+
+        self.assertTrue(first.acquire())
+        self.assertFalse(second.acquire())
+        first.release()
+        self.assertTrue(second.acquire())
+
+    def test_lock_times_out(self):
+        self.cache.lock(LATEST).acquire()
+        lock = self.cache.lock(LATEST)
+
+        self.clock.now += self.cache.lock_timeout
+
+        self.assertTrue(lock.timed_out)
+        self.assertTrue(lock.acquire())
+
+    def test_expired_lock_leaves_lock_of_another_client(self):
+        first = self.cache.lock(LATEST)
+        first.acquire()
+        self.clock.now += self.cache.lock_timeout
+        second = self.cache.lock(LATEST)
+        self.assertTrue(second.acquire())
+
+        first.release()
+
+        self.assertFalse(self.cache.lock(LATEST).acquire())
+
+    def test_lock_is_taken_if_backend_is_down(self):
+        lock = SharedCache(BrokenBackend()).lock(LATEST)
+
+        self.assertTrue(lock.acquire())
+
+
+class FixerioSharedCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def respond(self, url, params):
+        with self.calls_lock:
+            self.calls += 1
+        time.sleep(0.1)
+        return {'success': True, 'timestamp': int(time.time()),
+                'base': 'EUR', 'date': '2016-05-19',
+                'rates': {'GBP': 0.76585, 'USD': 1.1197}}
+
+    def worker(self):
+        """ Creates a client as a separate worker process would. """
+        cache = SharedCache(FileBackend(self.path), poll_interval=0.01)
+        return Fixerio('test-access-key', session=FakeSession(self.respond),
+                       cache=cache)
+
+    def test_populates_cache_for_every_worker(self):
+        self.worker().latest()
+        response = self.worker().latest(symbols=['GBP'])
+
+        self.assertDictEqual(response['rates'], {'GBP': 0.76585})
+        self.assertEqual(self.calls, 1)
+
+    def test_sends_a_single_request_on_concurrent_misses(self):
+        workers = [self.worker() for _ in range(8)]
+        responses = []
+
+        def run(client):
+            responses.append(client.historical_rates('2016-05-19'))
+
+        threads = [threading.Thread(target=run, args=(client,))
+                   for client in workers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(responses), 8)
+        self.assertTrue(all(r['rates']['USD'] == 1.1197 for r in responses))
@@ -0,0 +1,152 @@
+from __future__ import unicode_literals
+
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+from fixerio.cli import Daemon, Runner, failed, forward, main, query_parser, \
+    to_line
+
+from .fakes import FakeSession, respond
+
+
+class QueryTestCase(unittest.TestCase):
+    def test_formats_queries_back_into_lines(self):
+        for line in ('latest',
+                     'latest --symbols USD,GBP --base USD',
+                     'historical 2000-01-03 --symbols USD',
+                     'range 2000-01-03 2000-01-07 --skip-weekends'):
+            query = query_parser().parse_args(line.split())
+            self.assertEqual(to_line(query), line)
+
+    def test_upper_cases_symbols(self):
+        query = query_parser().parse_args(['latest', '--symbols', 'usd, gbp'])
+
+        self.assertEqual(query.symbols, ['USD', 'GBP'])
+
+
+class RunnerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.session = FakeSession(respond)
+        self.runner = Runner('test-access-key', session=self.session)
+
+    def answer(self, line):
+        return [json.loads(output)
+                for output in self.runner.answer_line(line)]
+
+    def test_answers_latest(self):
+        answers = self.answer('latest --symbols USD')
+
+        self.assertEqual(len(answers), 1)
+        self.assertEqual(answers[0]['rates'], {'USD': 4.0})
+        self.assertEqual(self.session.calls[0][1]['params']['symbols'],
+                         'USD')
+
+    def test_answers_range_one_line_per_day(self):
+        answers = self.answer('range 2000-01-03 2000-01-05')
+
+        self.assertEqual([answer['date'] for answer in answers],
+                         ['2000-01-03', '2000-01-04', '2000-01-05'])
+
+    def test_serves_repeated_queries_from_cache(self):
+        self.answer('historical 2000-01-03')
+        self.answer('historical 2000-01-03')
+
+        self.assertEqual(len(self.session.calls), 1)
+
+    def test_keeps_a_client_per_base(self):
+        self.assertIs(self.runner.client('USD'), self.runner.client('USD'))
+        self.assertIsNot(self.runner.client('USD'), self.runner.client())
+
+    def test_answers_bad_query_with_error(self):
+        outputs = list(self.runner.answer_line('historical'))
+
+        self.assertEqual(len(outputs), 1)
+        self.assertTrue(failed(outputs[0]))
+        self.assertIn('error', json.loads(outputs[0]))
+
+
+class DaemonTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'fixerio.sock')
+
+        self.session = FakeSession(respond)
+        self.daemon = Daemon(self.path, Runner('test-access-key',
+                                               session=self.session))
+        thread = threading.Thread(target=self.daemon.serve_forever,
+                                  args=(0.05,))
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.daemon.server_close)
+        self.addCleanup(self.daemon.shutdown)
+
+    def test_socket_is_private(self):
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+
+    def test_answers_forwarded_queries(self):
+        outputs = []
+
+        ok = forward(self.path, ['latest', 'range 2000-01-03 2000-01-04',
+                                 'latest'], outputs.append)
+
+        self.assertTrue(ok)
+        self.assertEqual(len(outputs), 4)
+        self.assertEqual(len(self.session.calls), 3)
+
+    def test_reports_failed_queries(self):
+        outputs = []
+
+        ok = forward(self.path, ['historical', 'latest'], outputs.append)
+
+        self.assertFalse(ok)
+        self.assertTrue(failed(outputs[0]))
+        self.assertFalse(failed(outputs[1]))
+
+    def test_skips_blank_lines(self):
+        outputs = []
+
+        ok = forward(self.path, ['latest', '', '  \n', 'latest'],
+                     outputs.append)
+
+        self.assertTrue(ok)
+        self.assertEqual(len(outputs), 2)
+
+    def test_answers_blank_lines_sent_to_daemon(self):
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(client.close)
+        client.settimeout(5)
+        client.connect(self.path)
+        reader = client.makefile('rb')
+        self.addCleanup(reader.close)
+
+        client.sendall(b'\nlatest\n')
+
+        self.assertEqual(reader.readline(), b'\n')
+        self.assertFalse(failed(reader.readline().decode('utf-8')))
+        self.assertEqual(reader.readline(), b'\n')
+
+    def test_refuses_to_replace_a_listening_daemon(self):
+        with self.assertRaises(RuntimeError):
+            Daemon(self.path, Runner('test-access-key'))
+
+    def test_main_forwards_to_daemon(self):
+        self.assertEqual(main(['--socket', self.path, 'latest']), 0)
+        self.assertEqual(len(self.session.calls), 1)
+
+    def test_replaces_a_stale_socket(self):
+        self.daemon.shutdown()
+        self.daemon.socket.close()
+        self.assertTrue(os.path.exists(self.path))
+
+        daemon = Daemon(self.path, Runner('test-access-key'))
+        daemon.server_close()
+
+        self.assertFalse(os.path.exists(self.path))
+        with self.assertRaises(socket.error):
+            forward(self.path, ['latest'], None)
@@ -0,0 +1,208 @@
+from __future__ import unicode_literals
+
+import math
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+
+from fixerio import columnar
+from fixerio.cache import HISTORICAL
+from fixerio.client import Fixerio
+from fixerio.columnar import (AsOfIndex, CurrencyIndex, RateMatrix,
+                              rates_vector)
+from fixerio.currencies import CURRENCIES
+from fixerio.snapshot import Snapshot, write_snapshot
+from fixerio.store import HistoricalStore
+
+from .fakes import FakeSession
+
+BASE_URL = 'http://data.fixer.io/api/'
+
+
+@unittest.skipIf(columnar.np is None, 'numpy is not installed')
+class CurrencyIndexTestCase(unittest.TestCase):
+    def test_interns_indexes(self):
+        self.assertIs(CurrencyIndex(['GBP', 'USD']),
+                      CurrencyIndex(('GBP', 'USD')))
+        self.assertIsNot(CurrencyIndex(['GBP', 'USD']),
+                         CurrencyIndex(['USD', 'GBP']))
+
+    def test_indexes_every_currency_by_default(self):
+        index = CurrencyIndex()
+
+        self.assertEqual(index.codes, CURRENCIES)
+        self.assertEqual(index['AED'], 0)
+
+    def test_for_symbols(self):
+        self.assertIs(CurrencyIndex.for_symbols(['USD', 'GBP', 'USD']),
+                      CurrencyIndex(['GBP', 'USD']))
+        self.assertIs(CurrencyIndex.for_symbols(None), CurrencyIndex())
+
+
+@unittest.skipIf(columnar.np is None, 'numpy is not installed')
+class RatesVectorTestCase(unittest.TestCase):
+    def test_aligns_rates_to_index(self):
+        index = CurrencyIndex(['GBP', 'JPY', 'USD'])
+        response = {'rates': {'USD': 1.1197, 'GBP': 0.76585, 'XXX': 1.0}}
+
+        vector = rates_vector(response, index)
+
+        self.assertEqual(vector.dtype, columnar.np.float64)
+        self.assertEqual(vector[0], 0.76585)
+        self.assertTrue(math.isnan(vector[1]))
+        self.assertEqual(vector[2], 1.1197)
+
+
+@unittest.skipIf(columnar.np is None, 'numpy is not installed')
+class RateMatrixTestCase(unittest.TestCase):
+    def setUp(self):
+        self.index = CurrencyIndex(['GBP', 'USD'])
+
+    def test_appends_rows(self):
+        matrix = RateMatrix(self.index, capacity=1)
+
+        for day in range(1, 11):
+            matrix.append(date(2000, 1, day), {'GBP': float(day)})
+
+        self.assertEqual(len(matrix), 10)
+        self.assertEqual(matrix.values.shape, (10, 2))
+        self.assertEqual(list(matrix.values[:, 0]),
+                         [float(day) for day in range(1, 11)])
+        self.assertTrue(columnar.np.isnan(matrix.values[:, 1]).all())
+        self.assertEqual(str(matrix.dates[0]), '2000-01-01')
+        self.assertEqual(str(matrix.dates[-1]), '2000-01-10')
+        self.assertEqual(matrix.currencies, ('GBP', 'USD'))
+
+    @unittest.skipIf(columnar.pd is None, 'pandas is not installed')
+    def test_to_frame(self):
+        matrix = RateMatrix(self.index)
+        matrix.append('2000-01-03', {'GBP': 0.6246, 'USD': 1.009})
+
+        frame = matrix.to_frame()
+
+        self.assertEqual(list(frame.columns), ['GBP', 'USD'])
+        self.assertEqual(frame.loc['2000-01-03', 'USD'], 1.009)
+
+
+def at(day, hour=12):
+    """ The POSIX time of an hour of a day of January 2000. """
+    return 946684800 + (day - 1) * 86400 + hour * 3600
+
+
+@unittest.skipIf(columnar.np is None, 'numpy is not installed')
+class AsOfIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        index = CurrencyIndex(['GBP', 'USD'])
+        # Monday 3 to Friday 7, without Thursday 6 and the USD of Wednesday.
+        self.as_of = AsOfIndex.from_responses([
+            {'date': '2000-01-07', 'rates': {'GBP': 0.7, 'USD': 1.7}},
+            {'date': '2000-01-03', 'rates': {'GBP': 0.3, 'USD': 1.3}},
+            {'date': '2000-01-04', 'rates': {'GBP': 0.4, 'USD': 1.4}},
+            {'date': '2000-01-05', 'rates': {'GBP': 0.5}},
+        ], index=index)
+
+    def test_looks_up_rates_of_the_day(self):
+        self.assertEqual(len(self.as_of), 5)
+        self.assertEqual(self.as_of.last, date(2000, 1, 7))
+        self.assertEqual(self.as_of.rate_as_of(at(4), 'USD'), 1.4)
+        self.assertEqual(self.as_of.rate_as_of('2000-01-04', 'GBP'), 0.4)
+        self.assertEqual(self.as_of.rate_as_of(date(2000, 1, 7), 'GBP'), 0.7)
+
+    def test_fills_forward_missing_days_and_rates(self):
+        self.assertEqual(self.as_of.rate_as_of(at(5), 'USD'), 1.4)
+        self.assertEqual(self.as_of.rate_as_of(at(6), 'GBP'), 0.5)
+        self.assertEqual(self.as_of.date_as_of(at(6)), date(2000, 1, 5))
+        self.assertEqual(self.as_of.rate_as_of(at(9), 'USD'), 1.7)
+        self.assertEqual(self.as_of.date_as_of(at(9)), date(2000, 1, 7))
+
+    def test_knows_no_rates_before_the_history(self):
+        self.assertIsNone(self.as_of.rate_as_of(at(2), 'GBP'))
+        self.assertIsNone(self.as_of.date_as_of(at(3, hour=-1)))
+        with self.assertRaises(KeyError):
+            self.as_of.rate_as_of(at(3), 'JPY')
+
+    def test_looks_up_many_times_at_once(self):
+        times = columnar.np.array([at(2), at(3), at(5, hour=23), at(30)])
+
+        rates = self.as_of.rates_as_of(times, 'USD')
+
+        self.assertTrue(math.isnan(rates[0]))
+        self.assertEqual(rates[1:].tolist(), [1.3, 1.4, 1.7])
+        self.assertEqual(self.as_of.rates_as_of(
+            times.astype('datetime64[s]'), 'USD')[1:].tolist(),
+            [1.3, 1.4, 1.7])
+
+    def test_merges_rates_of_the_same_day(self):
+        as_of = AsOfIndex.from_responses([
+            {'date': '2000-01-03', 'rates': {'GBP': 0.3}},
+            {'date': '2000-01-03', 'rates': {'USD': 1.3}},
+        ], index=CurrencyIndex(['GBP', 'USD']))
+
+        self.assertEqual((as_of.rate_as_of(at(3), 'GBP'),
+                          as_of.rate_as_of(at(3), 'USD')), (0.3, 1.3))
+
+    def test_raises_if_history_is_empty(self):
+        with self.assertRaises(ValueError):
+            RateMatrix().as_of()
+
+    def historical(self, day, base='EUR', **rates):
+        return {'success': True, 'historical': True, 'base': base,
+                'date': '2000-01-{0:02d}'.format(day), 'rates': rates}
+
+    def test_indexes_store(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with HistoricalStore(directory) as store:
+            store.put(self.historical(3, GBP=0.3, USD=1.3))
+            store.put(self.historical(5, USD=1.5), complete=False)
+            store.put(self.historical(4, base='USD', GBP=0.4))
+
+            as_of = AsOfIndex.from_store(store)
+
+        self.assertEqual(as_of.last, date(2000, 1, 5))
+        self.assertEqual(as_of.rate_as_of(at(5), 'GBP'), 0.3)
+        self.assertEqual(as_of.rate_as_of(at(5), 'USD'), 1.5)
+
+    def test_indexes_snapshot(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'rates.fxs')
+        write_snapshot(path, [
+            (HISTORICAL, self.historical(3, GBP=0.3), True),
+            (HISTORICAL, self.historical(4, base='USD', GBP=0.4), True)])
+        snapshot = Snapshot(path)
+        self.addCleanup(snapshot.close)
+
+        as_of = AsOfIndex.from_snapshot(snapshot)
+
+        self.assertEqual(as_of.last, date(2000, 1, 3))
+        self.assertEqual(as_of.rate_as_of(at(4), 'GBP'), 0.3)
+
+
+@unittest.skipIf(columnar.np is None, 'numpy is not installed')
+class FixerioHistoricalRatesMatrixTestCase(unittest.TestCase):
+    def setUp(self):
+        def historical(url, params):
+            day = url[len(BASE_URL):]
+            return {'date': day, 'base': 'EUR',
+                    'rates': {'GBP': float(day[-2:]), 'USD': 1.0}}
+
+        self.client = Fixerio('test-access-key',
+                              session=FakeSession(historical))
+
+    def test_returns_matrix_aligned_to_symbols(self):
+        matrix = self.client.historical_rates_matrix(
+            '2000-01-01', '2000-01-05', symbols=['USD', 'GBP'])
+
+        self.assertIs(matrix.index, CurrencyIndex(['GBP', 'USD']))
+        self.assertEqual(matrix.values.tolist(),
+                         [[float(day), 1.0] for day in range(1, 6)])
+
+    @unittest.skipIf(columnar.pd is None, 'pandas is not installed')
+    def test_returns_data_frame(self):
+        frame = self.client.historical_rates_matrix(
+            '2000-01-01', '2000-01-05', symbols=['GBP'], as_frame=True)
+
+        self.assertEqual(frame.shape, (5, 1))
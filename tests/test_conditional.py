@@ -0,0 +1,131 @@
+from __future__ import unicode_literals
+
+import time
+import unittest
+
+from fixerio.cache import RateCache
+from fixerio.client import BASE_URL, Fixerio
+from fixerio.conditional import ValidatorCache
+
+from .fakes import FakeResponse, FakeSession
+
+URL = BASE_URL + 'latest'
+
+
+class ValidatorCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.validators = ValidatorCache(maxsize=2, clock=lambda: 1000)
+        self.response = {'base': 'EUR', 'rates': {'USD': 1.1197}}
+
+    def test_keeps_validators_of_response(self):
+        self.validators.update(URL, {'symbols': 'USD'},
+                               {'ETag': '"v1"', 'Last-Modified': 'then'},
+                               self.response)
+
+        validators = self.validators.get(URL, {'symbols': 'USD'})
+
+        self.assertEqual(validators.headers,
+                         {'If-None-Match': '"v1"',
+                          'If-Modified-Since': 'then'})
+        self.assertIsNone(self.validators.get(URL, {}))
+
+    def test_ignores_response_without_validators(self):
+        self.validators.update(URL, {}, {'ETag': '"v1"'}, self.response)
+        self.validators.update(URL, {}, {}, self.response)
+
+        self.assertIsNone(self.validators.get(URL, {}))
+
+    def test_evicts_least_recently_used(self):
+        for code in ('USD', 'GBP', 'JPY'):
+            self.validators.update(URL, {'symbols': code}, {'ETag': code},
+                                   self.response)
+
+        self.assertIsNone(self.validators.get(URL, {'symbols': 'USD'}))
+        self.assertEqual(len(self.validators), 2)
+
+    def test_answers_not_modified_with_a_copy(self):
+        self.validators.update(URL, {}, {'ETag': '"v1"'}, self.response)
+        validators = self.validators.get(URL, {})
+
+        response = self.validators.not_modified(validators)
+        response['rates']['USD'] = 0
+
+        self.assertEqual(self.response['rates']['USD'], 1.1197)
+        self.assertEqual(self.validators.not_modified_at(URL, {}), 1000)
+        self.assertEqual(self.validators.not_modified_count, 1)
+
+
+class FixerioConditionalTestCase(unittest.TestCase):
+    def setUp(self):
+        # Published long ago, so the cached rates are expired at once.
+        self.response = {'success': True, 'base': 'EUR',
+                         'date': '2016-05-19',
+                         'timestamp': int(time.time()) - 3600,
+                         'rates': {'GBP': 0.76585, 'USD': 1.1197}}
+        self.headers = []
+        self.modified = False
+
+        def respond(url, params):
+            headers = self.session.calls[-1][1]['headers'] or {}
+            self.headers.append(headers)
+            if headers.get('If-None-Match') == '"v1"' and not self.modified:
+                return FakeResponse(None, status_code=304)
+            etag = '"v2"' if self.modified else '"v1"'
+            return FakeResponse(self.response, headers={'ETag': etag})
+
+        self.session = FakeSession(respond)
+        self.client = Fixerio('test-access-key', session=self.session,
+                              cache=RateCache(latest_ttl=60))
+
+    def test_sends_validators_of_last_response(self):
+        self.client.latest()
+        response = self.client.latest()
+
+        self.assertEqual(self.headers, [{}, {'If-None-Match': '"v1"'}])
+        self.assertDictEqual(response, self.response)
+        self.assertEqual(self.client.validators.not_modified_count, 1)
+
+    def test_keeps_response_apart_from_the_one_returned(self):
+        self.client.latest()['rates']['USD'] = 0
+
+        response = self.client.latest()
+
+        self.assertEqual(self.client.validators.not_modified_count, 1)
+        self.assertEqual(response['rates']['USD'], 1.1197)
+
+    def test_not_modified_extends_cached_rates(self):
+        self.client.latest()
+        self.client.latest()
+        self.client.latest()
+
+        self.assertEqual(len(self.session.calls), 2)
+
+    def test_replaces_validators_of_modified_response(self):
+        self.client.latest()
+        self.modified = True
+        self.client.latest()
+        self.client.latest()
+
+        self.assertEqual(self.headers[-1], {'If-None-Match': '"v2"'})
+
+    def test_sends_last_modified(self):
+        last_modified = 'Thu, 19 May 2016 15:00:00 GMT'
+        self.session.data = FakeResponse(
+            self.response, headers={'Last-Modified': last_modified})
+
+        self.client.latest()
+        self.client.latest()
+
+        _, kwargs = self.session.calls[1]
+        self.assertEqual(kwargs['headers'],
+                         {'If-Modified-Since': last_modified})
+
+    def test_does_not_send_validators_if_disabled(self):
+        client = Fixerio('test-access-key', session=self.session,
+                         conditional=False)
+
+        client.latest()
+        client.latest()
+
+        self.assertEqual(self.headers, [{}, {}])
+        self.assertIsNone(client.validators)
@@ -0,0 +1,104 @@
+from __future__ import unicode_literals
+
+import time
+import unittest
+
+from fixerio import conversion
+from fixerio.cache import RateCache
+from fixerio.client import Fixerio
+from fixerio.conversion import CrossRates, rebase
+from fixerio.exceptions import FixerioException
+
+from .fakes import FakeSession
+
+BASE_URL = 'http://data.fixer.io/api/'
+
+
+class CrossRatesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.response = {'base': 'EUR', 'date': '2016-05-19',
+                         'rates': {'GBP': 0.8, 'USD': 1.25, 'JPY': 125.0}}
+        self.cross_rates = CrossRates(self.response)
+
+    def test_rate(self):
+        self.assertEqual(self.cross_rates.rate('EUR', 'USD'), 1.25)
+        self.assertEqual(self.cross_rates.rate('USD', 'EUR'), 0.8)
+        self.assertAlmostEqual(self.cross_rates.rate('USD', 'JPY'), 100.0)
+        self.assertAlmostEqual(self.cross_rates.rate('GBP', 'USD'), 1.5625)
+        self.assertEqual(self.cross_rates.rate('GBP', 'GBP'), 1.0)
+
+    def test_rate_of_unknown_currency(self):
+        with self.assertRaises(KeyError):
+            self.cross_rates.rate('XXX', 'USD')
+        with self.assertRaises(KeyError):
+            self.cross_rates.rate('USD', 'XXX')
+
+    def test_convert(self):
+        self.assertAlmostEqual(self.cross_rates.convert(10, 'USD', 'JPY'),
+                               1000.0)
+
+        amounts = self.cross_rates.convert([1, 2], 'USD', 'EUR')
+
+        self.assertEqual(amounts, [0.8, 1.6])
+
+    @unittest.skipIf(conversion.np is None, 'numpy is not installed')
+    def test_convert_array(self):
+        amounts = conversion.np.array([1.0, 2.0, 4.0])
+
+        converted = self.cross_rates.convert(amounts, 'EUR', 'GBP')
+
+        self.assertEqual(converted.tolist(), [0.8, 1.6, 3.2])
+
+    def test_rebase(self):
+        response = rebase(self.response, 'USD')
+
+        self.assertEqual(response['base'], 'USD')
+        self.assertEqual(response['date'], '2016-05-19')
+        self.assertAlmostEqual(response['rates']['EUR'], 0.8)
+        self.assertAlmostEqual(response['rates']['JPY'], 100.0)
+        self.assertAlmostEqual(response['rates']['GBP'], 0.64)
+        self.assertEqual(response['rates']['USD'], 1.0)
+
+
+class FixerioConversionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.response = {'success': True, 'timestamp': int(time.time()),
+                         'base': 'EUR', 'date': '2016-05-19',
+                         'rates': {'GBP': 0.8, 'USD': 1.25}}
+        self.session = FakeSession(self.response)
+        self.client = Fixerio('test-access-key', symbols=['GBP'],
+                              session=self.session, cache=RateCache())
+
+    def test_converts_from_one_snapshot(self):
+        self.assertAlmostEqual(self.client.convert(10, 'USD', 'GBP'), 6.4)
+        self.assertAlmostEqual(self.client.convert(10, 'GBP', 'USD'),
+                               15.625)
+
+        self.assertEqual(len(self.session.calls), 1)
+        url, kwargs = self.session.calls[0]
+        self.assertEqual(url, BASE_URL + 'latest')
+        self.assertNotIn('symbols', kwargs['params'])
+
+    def test_reuses_cross_rates_of_same_snapshot(self):
+        self.assertIs(self.client.cross_rates(), self.client.cross_rates())
+
+    def test_converts_at_historical_rates(self):
+        self.client.convert(1, 'USD', 'GBP', date='2016-05-19')
+
+        self.assertEqual(self.session.calls[0][0], BASE_URL + '2016-05-19')
+
+    def test_raises_exception_if_rates_are_missing(self):
+        self.session.data = {'success': False,
+                             'error': {'code': 101, 'type': 'invalid_key'}}
+
+        with self.assertRaises(FixerioException):
+            self.client.convert(1, 'USD', 'GBP')
+
+    def test_requests_base(self):
+        client = Fixerio('test-access-key', base='USD',
+                         session=self.session)
+
+        client.latest()
+
+        self.assertEqual(self.session.calls[0][1]['params'],
+                         {'access_key': 'test-access-key', 'base': 'USD'})
@@ -0,0 +1,47 @@
+from __future__ import unicode_literals
+
+import unittest
+from datetime import date, datetime
+
+from fixerio.dates import (date_range, easter_sunday, is_business_day,
+                           is_target_holiday, to_date)
+
+
+class DatesTestCase(unittest.TestCase):
+    def test_to_date(self):
+        self.assertEqual(to_date('2000-01-03'), date(2000, 1, 3))
+        self.assertEqual(to_date(date(2000, 1, 3)), date(2000, 1, 3))
+        self.assertEqual(to_date(datetime(2000, 1, 3, 12)), date(2000, 1, 3))
+
+    def test_easter_sunday(self):
+        self.assertEqual(easter_sunday(2000), date(2000, 4, 23))
+        self.assertEqual(easter_sunday(2018), date(2018, 4, 1))
+        self.assertEqual(easter_sunday(2038), date(2038, 4, 25))
+
+    def test_is_target_holiday(self):
+        for holiday in (date(2018, 1, 1), date(2018, 3, 30),
+                        date(2018, 4, 2), date(2018, 5, 1),
+                        date(2018, 12, 25), date(2018, 12, 26),
+                        date(2001, 12, 31), date(1999, 12, 31)):
+            self.assertTrue(is_target_holiday(holiday), holiday)
+
+        for day in (date(2018, 4, 3), date(2018, 12, 31),
+                    date(1999, 5, 3), date(1999, 12, 27)):
+            self.assertFalse(is_target_holiday(day), day)
+
+    def test_is_business_day(self):
+        self.assertTrue(is_business_day(date(2018, 6, 1)))
+        self.assertFalse(is_business_day(date(2018, 6, 2)))
+        self.assertFalse(is_business_day(date(2018, 5, 1)))
+
+    def test_date_range(self):
+        self.assertEqual(list(date_range('2018-12-22', '2018-12-27')),
+                         [date(2018, 12, day) for day in range(22, 28)])
+        self.assertEqual(list(date_range('2018-12-22', '2018-12-27',
+                                         skip_weekends=True)),
+                         [date(2018, 12, day) for day in range(24, 28)])
+        self.assertEqual(list(date_range('2018-12-22', '2018-12-27',
+                                         skip_weekends=True,
+                                         skip_holidays=True)),
+                         [date(2018, 12, 24), date(2018, 12, 27)])
+        self.assertEqual(list(date_range('2018-12-27', '2018-12-22')), [])
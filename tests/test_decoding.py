@@ -0,0 +1,129 @@
+from __future__ import unicode_literals
+
+import json
+import unittest
+
+from fixerio import decoding
+from fixerio.client import Fixerio
+from fixerio.decoding import SNAPSHOT, RateSnapshot, decode, loads
+from fixerio.exceptions import FixerioException
+
+from .fakes import FakeResponse, FakeSession
+
+BASE_URL = 'http://data.fixer.io/api/'
+
+
+class LoadsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.document = {'base': 'EUR', 'rates': {'GBP': 0.76585}}
+        self.data = json.dumps(self.document).encode('utf-8')
+
+    def test_loads(self):
+        self.assertEqual(loads(self.data), self.document)
+        self.assertEqual(loads(self.data.decode('utf-8')), self.document)
+
+    def test_loads_without_orjson(self):
+        orjson = decoding.orjson
+        decoding.orjson = None
+        try:
+            self.assertEqual(loads(self.data), self.document)
+        finally:
+            decoding.orjson = orjson
+
+    def test_raises_value_error_if_invalid(self):
+        with self.assertRaises(ValueError):
+            loads(b"{'success': false}")
+
+
+class RateSnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        self.response = {'success': True, 'historical': True,
+                         'timestamp': 946943999, 'base': 'EUR',
+                         'date': '2000-01-03',
+                         'rates': {'GBP': 0.6246, 'USD': 1.009}}
+        self.snapshot = RateSnapshot.from_response(self.response)
+
+    def test_reads_like_a_mapping(self):
+        self.assertEqual(self.snapshot['GBP'], 0.6246)
+        self.assertEqual(self.snapshot.get('USD'), 1.009)
+        self.assertIsNone(self.snapshot.get('JPY'))
+        self.assertIn('GBP', self.snapshot)
+        self.assertEqual(len(self.snapshot), 2)
+        self.assertEqual(sorted(self.snapshot), ['GBP', 'USD'])
+        self.assertEqual(self.snapshot.rates, self.response['rates'])
+        with self.assertRaises(KeyError):
+            self.snapshot['JPY']
+
+    def test_keeps_metadata(self):
+        self.assertEqual(self.snapshot.base, 'EUR')
+        self.assertEqual(self.snapshot.date, '2000-01-03')
+        self.assertEqual(self.snapshot.timestamp, 946943999)
+        self.assertTrue(self.snapshot.historical)
+
+    def test_shares_codes_between_snapshots(self):
+        other = RateSnapshot('EUR', '2000-01-04',
+                             {'GBP': 0.6, 'USD': 1.0})
+
+        self.assertIs(other.codes, self.snapshot.codes)
+
+    def test_has_no_instance_dict(self):
+        with self.assertRaises(AttributeError):
+            self.snapshot.other = None
+
+    def test_converts_to_dict(self):
+        self.assertDictEqual(self.snapshot.to_dict(), self.response)
+
+    def test_equality(self):
+        self.assertEqual(self.snapshot, RateSnapshot.from_response(
+            self.response))
+        self.response['rates']['GBP'] = 0.6
+        self.assertNotEqual(self.snapshot, RateSnapshot.from_response(
+            self.response))
+
+    def test_decode(self):
+        self.assertEqual(decode(self.response, SNAPSHOT), self.snapshot)
+        self.assertIs(decode(self.response), self.response)
+        error = {'success': False, 'error': {'code': 101}}
+        self.assertIs(decode(error, SNAPSHOT), error)
+
+
+class FixerioResultTypeTestCase(unittest.TestCase):
+    def setUp(self):
+        def respond(url, params):
+            return {'success': True, 'base': 'EUR',
+                    'date': url[len(BASE_URL):],
+                    'rates': {'GBP': 0.6246, 'USD': 1.009}}
+
+        self.client = Fixerio('test-access-key', session=FakeSession(respond),
+                              result_type=SNAPSHOT)
+
+    def test_raises_if_result_type_is_unknown(self):
+        with self.assertRaises(ValueError):
+            Fixerio('test-access-key', result_type='xml')
+
+    def test_returns_snapshots(self):
+        latest = self.client.latest()
+        historical = self.client.historical_rates('2000-01-03')
+
+        self.assertIsInstance(latest, RateSnapshot)
+        self.assertEqual(historical.date, '2000-01-03')
+        self.assertEqual(historical['GBP'], 0.6246)
+
+    def test_yields_snapshots_for_ranges(self):
+        snapshots = list(self.client.historical_rates_range('2000-01-03',
+                                                            '2000-01-04'))
+
+        self.assertEqual([snapshot.date for snapshot in snapshots],
+                         ['2000-01-03', '2000-01-04'])
+        self.assertTrue(all(isinstance(snapshot, RateSnapshot)
+                            for snapshot in snapshots))
+
+    def test_raises_exception_if_response_is_not_json(self):
+        class HTMLResponse(FakeResponse):
+            content = b'<html>Bad gateway</html>'
+
+        client = Fixerio('test-access-key',
+                         session=FakeSession(HTMLResponse(None)))
+
+        with self.assertRaises(FixerioException):
+            client.latest()
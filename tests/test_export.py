@@ -0,0 +1,157 @@
+from __future__ import unicode_literals
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from fixerio.client import Fixerio
+from fixerio.decoding import SNAPSHOT
+from fixerio.exceptions import FixerioException
+from fixerio.export import ARROW, PARQUET, export, guess_format, main, pa
+
+from .fakes import FakeSession, respond
+
+
+class ExportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.session = FakeSession(respond)
+        self.client = Fixerio('test-access-key', session=self.session)
+
+    def read(self, name):
+        with io.open(os.path.join(self.path, name)) as f:
+            return f.read().splitlines()
+
+    def test_guesses_format_from_extension(self):
+        self.assertEqual(guess_format('rates.parquet'), PARQUET)
+        self.assertEqual(guess_format('rates.ARROW'), ARROW)
+        with self.assertRaises(ValueError):
+            guess_format('rates.txt')
+
+    def test_exports_csv_in_date_order(self):
+        path = os.path.join(self.path, 'rates.csv')
+
+        written = export(self.client, path, '2000-01-01', '2000-01-05',
+                         symbols=['USD', 'GBP', 'CHF'], row_group_size=2)
+
+        self.assertEqual(written, 5)
+        lines = self.read('rates.csv')
+        self.assertEqual(lines[0], 'date,base,CHF,GBP,USD')
+        self.assertEqual(lines[1], '2000-01-01,EUR,,1.5,2.0')
+        self.assertEqual([line[:10] for line in lines[1:]],
+                         ['2000-01-0{0}'.format(day) for day in range(1, 6)])
+
+    def test_exports_with_snapshot_client(self):
+        path = os.path.join(self.path, 'rates.csv')
+        client = Fixerio('test-access-key', session=self.session,
+                         result_type=SNAPSHOT)
+
+        written = export(client, path, '2000-01-01', '2000-01-02',
+                         symbols=['USD', 'GBP'])
+
+        self.assertEqual(written, 2)
+        self.assertEqual(self.read('rates.csv')[1:],
+                         ['2000-01-01,EUR,1.5,2.0', '2000-01-02,EUR,2.5,3.0'])
+
+    def test_resumes_after_last_date_written(self):
+        path = os.path.join(self.path, 'rates.csv')
+        export(self.client, path, '2000-01-01', '2000-01-03',
+               symbols=['USD'])
+
+        written = export(self.client, path, '2000-01-01', '2000-01-05',
+                         symbols=['USD'])
+
+        self.assertEqual(written, 2)
+        self.assertEqual(len(self.session.calls), 5)
+        self.assertEqual(len(self.read('rates.csv')), 6)
+
+    def test_resumes_with_symbols_spelled_otherwise(self):
+        path = os.path.join(self.path, 'rates.csv')
+        export(self.client, path, '2000-01-01', '2000-01-02',
+               symbols=['USD', 'GBP'])
+
+        written = export(self.client, path, '2000-01-01', '2000-01-03',
+                         symbols='gbp,usd')
+
+        self.assertEqual(written, 1)
+        self.assertEqual(self.read('rates.csv')[-1], '2000-01-03,EUR,3.5,4.0')
+
+    def test_drops_incomplete_line_when_resuming(self):
+        path = os.path.join(self.path, 'rates.csv')
+        export(self.client, path, '2000-01-01', '2000-01-02',
+               symbols=['USD'])
+        with io.open(path, 'ab') as f:
+            f.write(b'2000-01-03,EU')
+
+        export(self.client, path, '2000-01-01', '2000-01-03',
+               symbols=['USD'])
+
+        self.assertEqual(self.read('rates.csv')[1:],
+                         ['2000-01-01,EUR,2.0', '2000-01-02,EUR,3.0',
+                          '2000-01-03,EUR,4.0'])
+
+    def test_refuses_to_overwrite_unless_resuming(self):
+        path = os.path.join(self.path, 'rates.csv')
+        export(self.client, path, '2000-01-01', '2000-01-02',
+               symbols=['USD'])
+
+        with self.assertRaises(ValueError):
+            export(self.client, path, '2000-01-01', '2000-01-03',
+                   symbols=['USD'], resume=False)
+
+    def test_refuses_to_resume_with_other_columns(self):
+        path = os.path.join(self.path, 'rates.csv')
+        export(self.client, path, '2000-01-01', '2000-01-02',
+               symbols=['USD'])
+
+        with self.assertRaises(ValueError):
+            export(self.client, path, '2000-01-01', '2000-01-03',
+                   symbols=['GBP'])
+
+    def test_raises_exception_if_rates_are_missing(self):
+        self.session.data = {'success': False, 'error': {'code': 302}}
+
+        with self.assertRaises(FixerioException):
+            export(self.client, os.path.join(self.path, 'rates.csv'),
+                   '2000-01-01', '2000-01-02')
+
+    def test_requires_access_key(self):
+        with self.assertRaises(SystemExit):
+            main(['--access-key', '', '2000-01-01', '2000-01-02',
+                  os.path.join(self.path, 'rates.csv')])
+
+
+@unittest.skipIf(pa is None, 'pyarrow is required')
+class ArrowExportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+        self.session = FakeSession(respond)
+        self.client = Fixerio('test-access-key', session=self.session)
+
+    def check_export(self, name):
+        from pyarrow import dataset
+
+        path = os.path.join(self.path, name)
+        export(self.client, path, '2000-01-01', '2000-01-03',
+               symbols=['USD', 'GBP'], row_group_size=2)
+        written = export(self.client, path, '2000-01-01', '2000-01-05',
+                         symbols=['USD', 'GBP'], row_group_size=2)
+
+        table = dataset.dataset(path, format=guess_format(name).replace(
+            ARROW, 'ipc')).to_table()
+        self.assertEqual(written, 2)
+        self.assertEqual(len(os.listdir(path)), 3)
+        self.assertEqual([d.day for d in table.column('date').to_pylist()],
+                         [1, 2, 3, 4, 5])
+        self.assertEqual(table.column('USD').to_pylist(),
+                         [2.0, 3.0, 4.0, 5.0, 6.0])
+
+    def test_exports_parquet_parts(self):
+        self.check_export('rates.parquet')
+
+    def test_exports_arrow_parts(self):
+        self.check_export('rates.arrow')
@@ -96,7 +96,7 @@ class FixerioHistoricalRatesSymbolsTestCase(unittest.TestCase):
         self.assertDictEqual(response, expected_response)
         request = responses.calls[0].request
         self.assertEqual(request.method, 'GET')
-        symbols_str = ','.join(symbols)
+        symbols_str = ','.join(sorted(symbols))
         params = urlencode(
             {'access_key': self.access_key, 'symbols': symbols_str})
         expected_path = '{url}?{params}'.format(url=self.path, params=params)
@@ -121,7 +121,7 @@ class FixerioHistoricalRatesSymbolsTestCase(unittest.TestCase):
         self.assertDictEqual(response, expected_response)
         request = responses.calls[0].request
         self.assertEqual(request.method, 'GET')
-        symbols_str = ','.join(symbols)
+        symbols_str = ','.join(sorted(symbols))
         params = urlencode(
             {'access_key': self.access_key, 'symbols': symbols_str})
         expected_path = '{url}?{params}'.format(url=self.path, params=params)
@@ -147,7 +147,7 @@ class FixerioHistoricalRatesSymbolsTestCase(unittest.TestCase):
         self.assertDictEqual(response, expected_response)
         request = responses.calls[0].request
         self.assertEqual(request.method, 'GET')
-        symbols_str = ','.join(symbols)
+        symbols_str = ','.join(sorted(symbols))
         params = urlencode(
             {'access_key': self.access_key, 'symbols': symbols_str})
         expected_path = '{url}?{params}'.format(url=self.path, params=params)
@@ -0,0 +1,131 @@
+from __future__ import unicode_literals
+
+import unittest
+from datetime import date, timedelta
+
+from fixerio.cache import HISTORICAL, RateCache
+from fixerio.client import Fixerio
+from fixerio.exceptions import FixerioException
+
+from .fakes import FakeSession, respond
+
+BASE_URL = 'http://data.fixer.io/api/'
+
+
+def timeseries(url, params):
+    start = date(*map(int, params['start_date'].split('-')))
+    end = date(*map(int, params['end_date'].split('-')))
+    rates = {}
+    while start <= end:
+        rates[start.isoformat()] = {'GBP': float(start.day)}
+        start += timedelta(days=1)
+    return {'success': True, 'timeseries': True, 'base': 'EUR',
+            'start_date': params['start_date'],
+            'end_date': params['end_date'], 'rates': rates}
+
+
+class FixerioHistoricalRatesRangeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.session = FakeSession(respond)
+        self.cache = RateCache()
+        self.client = Fixerio('test-access-key', session=self.session,
+                              cache=self.cache)
+
+    def test_yields_rates_in_date_order(self):
+        responses = self.client.historical_rates_range(
+            date(2000, 1, 1), '2000-01-31', workers=8)
+
+        dates = [response['date'] for response in responses]
+
+        self.assertEqual(dates, ['2000-01-{0:02d}'.format(day)
+                                 for day in range(1, 32)])
+        self.assertEqual(len(self.session.calls), 31)
+
+    def test_is_lazy(self):
+        responses = self.client.historical_rates_range(
+            '2000-01-01', '2099-12-31', workers=2)
+
+        next(responses)
+        responses.close()
+
+        self.assertLessEqual(len(self.session.calls), 5)
+
+    def test_does_not_request_cached_dates(self):
+        cached = respond(BASE_URL + '2000-01-02', None)
+        cached['rates']['GBP'] = 0.0
+        self.cache.set(HISTORICAL, cached, date='2000-01-02')
+
+        responses = list(self.client.historical_rates_range('2000-01-01',
+                                                            '2000-01-03'))
+
+        self.assertEqual(responses[1]['rates']['GBP'], 0.0)
+        self.assertEqual(sorted(url for url, _ in self.session.calls),
+                         [BASE_URL + '2000-01-01', BASE_URL + '2000-01-03'])
+
+    def test_skips_weekends_and_holidays(self):
+        responses = self.client.historical_rates_range(
+            '2018-12-22', '2018-12-28', skip_weekends=True,
+            skip_holidays=True)
+
+        dates = [response['date'] for response in responses]
+
+        self.assertEqual(dates, ['2018-12-24', '2018-12-27', '2018-12-28'])
+
+    def test_raises_exception_if_any_request_fails(self):
+        def fail(url, params):
+            raise FixerioException('failed')
+        self.session.data = fail
+
+        with self.assertRaises(FixerioException):
+            list(self.client.historical_rates_range('2000-01-01',
+                                                    '2000-01-03'))
+
+
+class FixerioTimeseriesRangeTestCase(unittest.TestCase):
+    def setUp(self):
+        self.session = FakeSession(timeseries)
+        self.cache = RateCache(maxsize=1000)
+        self.client = Fixerio('test-access-key', session=self.session,
+                              cache=self.cache)
+
+    def test_requests_a_year_at_a_time(self):
+        responses = list(self.client.historical_rates_range(
+            '2000-01-01', '2001-12-31', symbols=['GBP'], timeseries=True))
+
+        self.assertEqual(len(responses), 731)
+        self.assertEqual(responses[-1], {
+            'success': True, 'historical': True, 'date': '2001-12-31',
+            'base': 'EUR', 'rates': {'GBP': 31.0}})
+        self.assertEqual(
+            [(kwargs['params']['start_date'], kwargs['params']['end_date'])
+             for _, kwargs in self.session.calls],
+            [('2000-01-01', '2000-12-30'), ('2000-12-31', '2001-12-30'),
+             ('2001-12-31', '2001-12-31')])
+        self.assertEqual(self.session.calls[0][0], BASE_URL + 'timeseries')
+        self.assertEqual(self.session.calls[0][1]['params']['symbols'], 'GBP')
+
+    def test_only_requests_missing_dates(self):
+        list(self.client.historical_rates_range('2000-01-01', '2000-01-05',
+                                                timeseries=True))
+        list(self.client.historical_rates_range('2000-01-01', '2000-01-10',
+                                                timeseries=True))
+
+        params = self.session.calls[1][1]['params']
+        self.assertEqual((params['start_date'], params['end_date']),
+                         ('2000-01-06', '2000-01-10'))
+
+    def test_falls_back_to_each_date_if_not_allowed(self):
+        def restricted(url, params):
+            if url.endswith('timeseries'):
+                return {'success': False,
+                        'error': {'code': 105,
+                                  'type': 'function_access_restricted'}}
+            return respond(url, params)
+        self.session.data = restricted
+
+        responses = list(self.client.historical_rates_range(
+            '2000-01-01', '2000-01-03', timeseries=True))
+
+        self.assertEqual([response['rates']['GBP'] for response in responses],
+                         [1.5, 2.5, 3.5])
+        self.assertEqual(len(self.session.calls), 4)
@@ -0,0 +1,300 @@
+from __future__ import unicode_literals
+
+import time
+import unittest
+
+import requests
+
+from fixerio.cache import RateCache
+from fixerio.client import BASE_URL, Fixerio
+from fixerio.exceptions import FixerioException, RateLimitExceeded
+from fixerio.instrumentation import (CACHE_HIT, CACHE_MISS, PHASES, QUOTA,
+                                     REQUEST, REQUEST_ERROR, RETRY,
+                                     STALE_HIT, Instrumentation,
+                                     OpenTelemetrySpans, PrometheusMetrics)
+from fixerio.lazy import optional_import
+from fixerio.ratelimit import QuotaTracker, RateLimiter
+from fixerio.retry import RetryPolicy
+
+from .fakes import FakeResponse, FakeSession
+
+
+class Recorder(object):
+    def __init__(self):
+        self.events = []
+
+    def __call__(self, event, data):
+        self.events.append((event, data))
+
+    def names(self):
+        return [event for event, _ in self.events]
+
+    def last(self, name):
+        return [data for event, data in self.events if event == name][-1]
+
+
+class InstrumentationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.instrumentation = Instrumentation()
+        self.recorder = Recorder()
+
+    def test_calls_subscribed_callbacks(self):
+        self.instrumentation.subscribe(self.recorder, [RETRY])
+
+        self.instrumentation.emit(RETRY, attempt=1)
+        self.instrumentation.emit(REQUEST, attempt=1)
+
+        self.assertEqual(self.recorder.events, [(RETRY, {'attempt': 1})])
+
+    def test_unsubscribes_callback(self):
+        self.instrumentation.subscribe(self.recorder)
+        self.instrumentation.unsubscribe(self.recorder)
+
+        self.instrumentation.emit(RETRY, attempt=1)
+
+        self.assertEqual(self.recorder.events, [])
+
+    def test_ignores_failing_callbacks(self):
+        def fail(event, data):
+            raise ValueError(event)
+
+        self.instrumentation.subscribe(fail)
+        self.instrumentation.subscribe(self.recorder)
+
+        self.instrumentation.emit(RETRY, attempt=1)
+
+        self.assertEqual(self.recorder.names(), [RETRY])
+
+
+class FixerioInstrumentationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.response = {'success': True, 'timestamp': int(time.time()),
+                         'base': 'EUR', 'date': '2016-05-19',
+                         'rates': {'GBP': 0.76585, 'USD': 1.1197}}
+        self.session = FakeSession(self.response)
+        self.recorder = Recorder()
+        self.instrumentation = Instrumentation()
+        self.instrumentation.subscribe(self.recorder)
+
+    def client(self, **kwargs):
+        return Fixerio('test-access-key', session=self.session,
+                       instrumentation=self.instrumentation, **kwargs)
+
+    def test_times_requests(self):
+        self.client().latest()
+
+        data = self.recorder.last(REQUEST)
+        self.assertEqual(data['url'], BASE_URL + 'latest')
+        self.assertEqual(data['status'], 200)
+        self.assertEqual(data['attempt'], 1)
+        self.assertGreater(data['bytes'], 0)
+        self.assertIsNone(data['dns'])
+        for phase in ('queue', 'ttfb', 'download', 'decode', 'duration'):
+            self.assertGreaterEqual(data[phase], 0)
+        self.assertGreaterEqual(data['duration'],
+                                data['ttfb'] + data['download'])
+
+    def test_streams_responses_to_time_downloads(self):
+        self.client().latest()
+
+        _, kwargs = self.session.calls[0]
+        self.assertTrue(kwargs['stream'])
+
+    def test_reports_cache_lookups(self):
+        client = self.client(cache=RateCache())
+
+        client.historical_rates('2016-05-19')
+        client.historical_rates('2016-05-19')
+
+        self.assertEqual(self.recorder.names(),
+                         [CACHE_MISS, REQUEST, CACHE_HIT])
+        self.assertEqual(self.recorder.last(CACHE_HIT),
+                         {'endpoint': 'historical', 'date': '2016-05-19',
+                          'source': 'cache'})
+
+    def test_reports_each_miss_of_a_range_once(self):
+        cache = RateCache()
+        client = self.client(cache=cache)
+
+        list(client.historical_rates_range('2016-05-19', '2016-05-20'))
+
+        self.assertEqual(sorted(self.recorder.names()),
+                         [CACHE_MISS, CACHE_MISS, REQUEST, REQUEST])
+        self.assertEqual(cache.misses, 2)
+
+    def test_reports_stale_hits(self):
+        self.response['timestamp'] = 0
+        client = self.client(cache=RateCache(),
+                             rate_limiter=RateLimiter(rate=0.001))
+
+        client.latest()
+        client.latest()
+
+        self.assertEqual(self.recorder.names()[-1], STALE_HIT)
+
+    def test_reports_failed_requests_and_retries(self):
+        def respond(url, params):
+            if len(self.session.calls) == 1:
+                raise requests.exceptions.ConnectionError('refused')
+            return self.response
+
+        self.session.data = respond
+        client = self.client(retry=RetryPolicy(backoff_factor=0))
+
+        client.latest()
+
+        self.assertEqual(self.recorder.names(),
+                         [CACHE_MISS, REQUEST_ERROR, RETRY, REQUEST])
+        self.assertIsNone(self.recorder.last(REQUEST_ERROR)['status'])
+        self.assertEqual(self.recorder.last(RETRY)['attempt'], 1)
+        self.assertEqual(self.recorder.last(REQUEST)['attempt'], 2)
+
+    def test_reports_invalid_json_responses(self):
+        class HTMLResponse(FakeResponse):
+            content = b'<html>Bad gateway</html>'
+
+        self.session.data = HTMLResponse(None)
+
+        with self.assertRaises(FixerioException):
+            self.client().latest()
+
+        self.assertEqual(self.recorder.names(), [CACHE_MISS, REQUEST_ERROR])
+        self.assertEqual(self.recorder.last(REQUEST_ERROR)['status'], 200)
+
+    def test_reports_quota(self):
+        limiter = RateLimiter(rate=100, burst=10, quota=QuotaTracker(2))
+        client = self.client(rate_limiter=limiter)
+
+        client.latest()
+
+        self.assertEqual(self.recorder.last(QUOTA),
+                         {'used': 1, 'remaining': 1})
+
+    def test_does_not_time_requests_without_instrumentation(self):
+        client = Fixerio('test-access-key', session=self.session)
+
+        def fail(*args):
+            raise AssertionError('Timed without instrumentation')
+
+        client._get_timed = fail
+        client.latest()
+
+        _, kwargs = self.session.calls[0]
+        self.assertFalse(kwargs['stream'])
+
+
+class FakeSpan(object):
+    def __init__(self, name, start_time, attributes):
+        self.name = name
+        self.start_time = start_time
+        self.attributes = attributes
+        self.end_time = None
+        self.exceptions = []
+        self.exception_attributes = []
+
+    def record_exception(self, error, attributes=None):
+        self.exceptions.append(error)
+        self.exception_attributes.append(attributes)
+
+    def set_status(self, status):
+        self.status = status
+
+    def end(self, end_time=None):
+        self.end_time = end_time
+
+
+class FakeTracer(object):
+    def __init__(self):
+        self.spans = []
+
+    def start_span(self, name, start_time=None, attributes=None):
+        span = FakeSpan(name, start_time, attributes)
+        self.spans.append(span)
+        return span
+
+
+class OpenTelemetrySpansTestCase(unittest.TestCase):
+    def setUp(self):
+        self.instrumentation = Instrumentation()
+        self.tracer = FakeTracer()
+        OpenTelemetrySpans(self.instrumentation, tracer=self.tracer)
+
+    def test_records_requests_as_spans(self):
+        self.instrumentation.emit(
+            REQUEST, url=BASE_URL + 'latest', status=200, bytes=100,
+            attempt=1, started_at=10, queue=0, dns=None, connect=None,
+            ttfb=0.5, download=0.25, decode=0.125, duration=1)
+
+        span, = self.tracer.spans
+        self.assertEqual(span.start_time, 10 * 10 ** 9)
+        self.assertEqual(span.end_time, 11 * 10 ** 9)
+        self.assertEqual(span.attributes['http.status_code'], 200)
+        self.assertEqual(span.attributes['fixerio.ttfb_seconds'], 0.5)
+        self.assertNotIn('fixerio.dns_seconds', span.attributes)
+
+    def test_records_exceptions(self):
+        error = RateLimitExceeded('limit')
+        self.instrumentation.emit(
+            REQUEST_ERROR, url=BASE_URL + 'latest', status=None, attempt=1,
+            started_at=10, duration=1, error=error)
+
+        span, = self.tracer.spans
+        self.assertEqual(span.exceptions, [error])
+        self.assertNotIn('http.status_code', span.attributes)
+
+    def test_hides_access_key_of_failed_requests(self):
+        class NotFound(FakeResponse):
+            def raise_for_status(self):
+                raise requests.exceptions.HTTPError(
+                    '404 Client Error: Not Found for url: ' + BASE_URL +
+                    'latest?access_key=test-access-key&symbols=USD')
+
+        client = Fixerio('test-access-key',
+                         session=FakeSession(NotFound(None, 404)),
+                         instrumentation=self.instrumentation)
+
+        with self.assertRaises(FixerioException):
+            client.latest()
+
+        span, = self.tracer.spans
+        attributes, = span.exception_attributes
+        self.assertIn('access_key=REDACTED', attributes['exception.message'])
+        self.assertNotIn('test-access-key', repr(span.attributes))
+        self.assertNotIn('test-access-key', repr(attributes))
+
+
+prometheus_client = optional_import('prometheus_client')
+
+
+@unittest.skipIf(prometheus_client is None, 'prometheus_client is required')
+class PrometheusMetricsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.registry = prometheus_client.CollectorRegistry()
+        self.instrumentation = Instrumentation()
+        PrometheusMetrics(self.instrumentation, registry=self.registry)
+
+    def value(self, name, **labels):
+        return self.registry.get_sample_value(name, labels)
+
+    def test_records_requests(self):
+        timings = dict((phase, 0.5) for phase in PHASES)
+        timings['dns'] = None
+        self.instrumentation.emit(REQUEST, url='', status=200, bytes=100,
+                                  attempt=1, started_at=0, **timings)
+
+        self.assertEqual(self.value('fixerio_requests_total', status='200'),
+                         1)
+        self.assertEqual(self.value('fixerio_response_bytes_total'), 100)
+        self.assertEqual(self.value('fixerio_request_phase_seconds_count',
+                                    phase='ttfb'), 1)
+        self.assertIsNone(self.value('fixerio_request_phase_seconds_count',
+                                     phase='dns'))
+
+    def test_records_cache_lookups_and_quota(self):
+        self.instrumentation.emit(CACHE_HIT, endpoint='latest', date=None,
+                                  source='cache')
+        self.instrumentation.emit(QUOTA, used=3, remaining=7)
+
+        self.assertEqual(self.value('fixerio_cache_lookups_total',
+                                    result='hit'), 1)
+        self.assertEqual(self.value('fixerio_quota_remaining'), 7)
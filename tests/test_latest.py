@@ -86,7 +86,7 @@ class FixerioLatestSymbolsTestCase(unittest.TestCase):
         self.assertDictEqual(response, expected_response)
         request = responses.calls[0].request
         self.assertEqual(request.method, 'GET')
-        symbols_str = ','.join(symbols)
+        symbols_str = ','.join(sorted(symbols))
         params = urlencode(
             {'access_key': self.access_key, 'symbols': symbols_str})
         expected_path = '{url}?{params}'.format(url=self.path, params=params)
@@ -113,7 +113,7 @@ class FixerioLatestSymbolsTestCase(unittest.TestCase):
         self.assertDictEqual(response, expected_response)
         request = responses.calls[0].request
         self.assertEqual(request.method, 'GET')
-        symbols_str = ','.join(symbols)
+        symbols_str = ','.join(sorted(symbols))
         params = urlencode(
             {'access_key': self.access_key, 'symbols': symbols_str})
         expected_path = '{url}?{params}'.format(url=self.path, params=params)
@@ -141,7 +141,7 @@ class FixerioLatestSymbolsTestCase(unittest.TestCase):
         self.assertDictEqual(response, expected_response)
         request = responses.calls[0].request
         self.assertEqual(request.method, 'GET')
-        symbols_str = ','.join(symbols)
+        symbols_str = ','.join(sorted(symbols))
         params = urlencode(
             {'access_key': self.access_key, 'symbols': symbols_str})
         expected_path = '{url}?{params}'.format(url=self.path, params=params)
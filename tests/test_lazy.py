@@ -0,0 +1,51 @@
+from __future__ import unicode_literals
+
+import subprocess
+import sys
+import unittest
+
+from fixerio.lazy import LazyModule, optional_import
+
+
+class LazyModuleTestCase(unittest.TestCase):
+    def test_imports_on_first_attribute_access(self):
+        module = LazyModule('json')
+
+        self.assertIsNone(module._module)
+        self.assertEqual(module.loads('[1]'), [1])
+        self.assertIs(module._module, sys.modules['json'])
+
+    def test_raises_import_error_on_access_if_missing(self):
+        module = LazyModule('fixerio_missing_module')
+
+        with self.assertRaises(ImportError):
+            module.anything
+
+
+class OptionalImportTestCase(unittest.TestCase):
+    def test_returns_module(self):
+        self.assertIs(optional_import('json'), sys.modules['json'])
+
+    def test_returns_none_if_missing(self):
+        self.assertIsNone(optional_import('fixerio_missing_module'))
+        self.assertIsNone(optional_import('fixerio_missing_module'))
+
+
+class ImportTestCase(unittest.TestCase):
+    def test_does_not_import_transport_dependencies(self):
+        code = ('import sys, fixerio; '
+                'print(" ".join(name for name in ("requests", "aiohttp", '
+                '"numpy") if name in sys.modules))')
+
+        output = subprocess.check_output([sys.executable, '-c', code])
+
+        self.assertEqual(output.strip(), b'')
+
+    @unittest.skipIf(sys.version_info < (3, 7), 'requires Python 3.7')
+    def test_imports_async_client_on_access(self):
+        code = ('import sys, fixerio; '
+                'assert "fixerio.aio" not in sys.modules; '
+                'fixerio.AsyncFixerio; '
+                'assert "fixerio.aio" in sys.modules')
+
+        subprocess.check_call([sys.executable, '-c', code])
@@ -0,0 +1,206 @@
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from fixerio.cache import RateCache
+from fixerio.client import Fixerio
+from fixerio.exceptions import FixerioException, RateLimitExceeded
+from fixerio.ratelimit import QuotaTracker, RateLimiter, TokenBucket
+
+from .fakes import Clock, FakeSession
+
+
+class TokenBucketTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.bucket = TokenBucket(rate=2, capacity=3, clock=self.clock)
+
+    def test_allows_bursts_up_to_capacity(self):
+        self.assertEqual([self.bucket.reserve() for _ in range(4)],
+                         [0.0, 0.0, 0.0, None])
+
+    def test_refills_over_time(self):
+        for _ in range(3):
+            self.bucket.reserve()
+
+        self.clock.now = 0.5
+
+        self.assertEqual(self.bucket.reserve(), 0.0)
+        self.assertIsNone(self.bucket.reserve())
+
+    def test_reserves_ahead_within_max_wait(self):
+        for _ in range(3):
+            self.bucket.reserve()
+
+        self.assertEqual(self.bucket.reserve(max_wait=1), 0.5)
+        self.assertEqual(self.bucket.reserve(max_wait=1), 1.0)
+        self.assertIsNone(self.bucket.reserve(max_wait=1))
+        self.assertEqual(self.bucket.tokens, -2)
+
+    def test_never_exceeds_capacity(self):
+        self.clock.now = 100
+
+        self.assertEqual(self.bucket.tokens, 3)
+
+    def test_refunds_tokens_up_to_capacity(self):
+        self.bucket.reserve()
+        self.bucket.refund()
+        self.bucket.refund()
+
+        self.assertEqual(self.bucket.tokens, 3)
+
+
+class QuotaTrackerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.period = '2018-06'
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_counts_requests_within_limit(self):
+        quota = QuotaTracker(2)
+
+        self.assertTrue(quota.consume())
+        self.assertTrue(quota.consume())
+        self.assertFalse(quota.consume())
+        self.assertEqual(quota.used, 2)
+        self.assertEqual(quota.remaining, 0)
+
+    def test_resets_every_period(self):
+        quota = QuotaTracker(1, period=lambda: self.period)
+        quota.consume()
+
+        self.period = '2018-07'
+
+        self.assertEqual(quota.remaining, 1)
+        self.assertTrue(quota.consume())
+
+    def test_persists_count(self):
+        path = os.path.join(self.path, 'quota.json')
+        quota = QuotaTracker(3, path=path, period=lambda: self.period)
+        quota.consume()
+        quota.consume()
+
+        quota = QuotaTracker(3, path=path, period=lambda: self.period)
+
+        self.assertEqual(quota.used, 2)
+        self.assertTrue(quota.consume())
+        self.assertFalse(quota.consume())
+
+        self.period = '2018-07'
+        self.assertEqual(quota.used, 0)
+
+    def test_shares_count_between_trackers(self):
+        path = os.path.join(self.path, 'quota.json')
+        consumed = []
+
+        def consume():
+            quota = QuotaTracker(50, path=path, period=lambda: self.period)
+            consumed.extend(quota.consume() for _ in range(20))
+
+        threads = [threading.Thread(target=consume) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(consumed.count(True), 50)
+        self.assertEqual(QuotaTracker(50, path=path,
+                                      period=lambda: self.period).used, 50)
+
+    def test_replaces_count_file_atomically(self):
+        path = os.path.join(self.path, 'quota.json')
+        quota = QuotaTracker(3, path=path, period=lambda: self.period)
+        quota.consume()
+        inode = os.stat(path).st_ino
+
+        quota.consume()
+
+        self.assertNotEqual(os.stat(path).st_ino, inode)
+        self.assertEqual(sorted(os.listdir(self.path)),
+                         ['quota.json', 'quota.json.lock'])
+
+    def test_raises_exception_if_count_file_is_invalid(self):
+        path = os.path.join(self.path, 'quota.json')
+        with open(path, 'wb') as f:
+            f.write(b'{"period": "2018-06", "us')
+        quota = QuotaTracker(3, path=path, period=lambda: self.period)
+
+        with self.assertRaises(FixerioException):
+            quota.consume()
+
+
+class RateLimiterTestCase(unittest.TestCase):
+    def test_keeps_a_bucket_per_access_key(self):
+        limiter = RateLimiter(rate=0.001, burst=1)
+
+        limiter.acquire('a')
+        limiter.acquire('b')
+
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire('a')
+        self.assertEqual(limiter.rejected, 1)
+
+    def test_waits_for_turn_within_max_wait(self):
+        limiter = RateLimiter(rate=50, burst=1, max_wait=1)
+        limiter.acquire('a')
+
+        started_at = time.time()
+        limiter.acquire('a')
+
+        self.assertGreaterEqual(time.time() - started_at, 0.015)
+
+    def test_rejects_beyond_quota(self):
+        limiter = RateLimiter(rate=1000, burst=10, quota=QuotaTracker(1))
+        limiter.acquire('a')
+
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire('a')
+
+    def test_gives_token_back_if_quota_refuses_request(self):
+        class RacedQuota(QuotaTracker):
+            """ A quota used up by another process once checked. """
+            def consume(self, count=1):
+                return False
+
+        limiter = RateLimiter(rate=0.001, burst=1, quota=RacedQuota(10))
+
+        with self.assertRaises(RateLimitExceeded):
+            limiter.acquire('a')
+
+        self.assertEqual(limiter.bucket('a').tokens, 1)
+
+
+class FixerioRateLimiterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.response = {'success': True, 'timestamp': 0, 'base': 'EUR',
+                         'date': '1970-01-01', 'rates': {'GBP': 0.78}}
+        self.session = FakeSession(self.response)
+        self.limiter = RateLimiter(rate=0.001, burst=1)
+
+    def test_rejects_requests_beyond_limit(self):
+        client = Fixerio('test-access-key', session=self.session,
+                         rate_limiter=self.limiter)
+        client.latest()
+
+        with self.assertRaises(FixerioException):
+            client.latest()
+        self.assertEqual(len(self.session.calls), 1)
+
+    def test_serves_stale_cached_rates_beyond_limit(self):
+        cache = RateCache()
+        client = Fixerio('test-access-key', session=self.session,
+                         cache=cache, rate_limiter=self.limiter)
+        client.latest()
+
+        response = client.latest(symbols=['GBP'])
+
+        self.assertDictEqual(response, self.response)
+        self.assertEqual(len(self.session.calls), 1)
+        self.assertEqual(cache.stale_hits, 1)
@@ -0,0 +1,121 @@
+from __future__ import unicode_literals
+
+import threading
+import time
+import unittest
+
+from fixerio.client import Fixerio
+from fixerio.exceptions import FixerioException
+from fixerio.refresh import Refresher
+
+from .fakes import FakeSession
+
+
+class RefresherScheduleTestCase(unittest.TestCase):
+    def test_aligns_refreshes_to_publication(self):
+        refresher = Refresher(Fixerio('test-access-key'), interval=3600,
+                              offset=60)
+
+        self.assertEqual(refresher.next_refresh_at(7200), 7260)
+        self.assertEqual(refresher.next_refresh_at(7259), 7260)
+        self.assertEqual(refresher.next_refresh_at(7260), 10860)
+
+    def test_aligns_daily_refreshes(self):
+        # The ECB publishes its reference rates around 14:00 UTC.
+        refresher = Refresher(Fixerio('test-access-key'), interval=86400,
+                              offset=14 * 3600 + 600)
+
+        self.assertEqual(refresher.next_refresh_at(86400), 86400 + 51000)
+
+
+class FixerioRefresherTestCase(unittest.TestCase):
+    def setUp(self):
+        self.count = 0
+        self.fail = False
+
+        def respond(url, params):
+            if self.fail:
+                raise FixerioException('failed')
+            self.count += 1
+            return {'success': True, 'base': 'EUR', 'date': '2016-05-19',
+                    'rates': {'GBP': float(self.count), 'USD': 1.1197}}
+
+        self.session = FakeSession(respond)
+        self.client = Fixerio('test-access-key', symbols=['GBP', 'USD'],
+                              session=self.session)
+        self.addCleanup(self.client.close)
+
+    def test_serves_latest_rates_from_snapshot(self):
+        self.client.start_refresher(interval=3600)
+
+        first = self.client.latest()
+        second = self.client.latest(symbols=['GBP'])
+
+        self.assertEqual(first['rates'], {'GBP': 1.0, 'USD': 1.1197})
+        self.assertEqual(second['rates'], {'GBP': 1.0})
+        self.assertEqual(len(self.session.calls), 1)
+
+    def test_requests_symbols_out_of_snapshot(self):
+        self.client.start_refresher(symbols=['GBP'], interval=3600)
+
+        self.client.latest(symbols=['USD'])
+
+        self.assertEqual(len(self.session.calls), 2)
+
+    def test_requests_every_symbol_if_snapshot_has_some(self):
+        client = Fixerio('test-access-key', session=self.session)
+        self.addCleanup(client.close)
+        client.start_refresher(symbols=['GBP'], interval=3600)
+
+        self.assertIsNone(client.refresher.get())
+        client.latest()
+
+        self.assertEqual(len(self.session.calls), 2)
+        self.assertNotIn('symbols', self.session.calls[1][1]['params'])
+
+    def test_refreshes_in_background(self):
+        refresher = self.client.start_refresher(interval=0.02, offset=0)
+
+        deadline = time.time() + 5
+        while refresher.refreshes < 3 and time.time() < deadline:
+            time.sleep(0.01)
+
+        self.assertGreaterEqual(refresher.refreshes, 3)
+        self.assertEqual(self.client.latest()['rates']['GBP'],
+                         refresher.snapshot['rates']['GBP'])
+
+    def test_keeps_snapshot_if_refresh_fails(self):
+        refresher = self.client.start_refresher(interval=3600)
+        self.fail = True
+
+        with self.assertRaises(FixerioException):
+            refresher.refresh()
+
+        self.assertEqual(self.client.latest()['rates']['GBP'], 1.0)
+
+    def test_serves_old_snapshot_while_refreshing(self):
+        refresher = self.client.start_refresher(interval=3600)
+        release = threading.Event()
+        respond = self.session.data
+
+        def slow(url, params):
+            release.wait()
+            return respond(url, params)
+
+        self.session.data = slow
+        thread = threading.Thread(target=refresher.refresh)
+        thread.start()
+
+        self.assertEqual(self.client.latest()['rates']['GBP'], 1.0)
+        release.set()
+        thread.join()
+        self.assertEqual(self.client.latest()['rates']['GBP'], 2.0)
+
+    def test_stop_refresher(self):
+        self.client.start_refresher(interval=3600)
+
+        self.client.stop_refresher()
+        self.client.latest()
+
+        self.assertIsNone(self.client.refresher)
+        self.assertEqual(len(self.session.calls), 2)
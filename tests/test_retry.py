@@ -0,0 +1,209 @@
+from __future__ import unicode_literals
+
+import json
+import time
+import unittest
+
+try:
+    from urllib.parse import urlencode
+except ImportError:  # For Python 2
+    from urllib import urlencode
+
+import requests
+import responses
+
+from fixerio.cache import RateCache
+from fixerio.client import Fixerio
+from fixerio.exceptions import CircuitOpenError, FixerioException
+from fixerio.retry import (CLOSED, HALF_OPEN, OPEN, CircuitBreaker,
+                           RetryPolicy)
+
+from .fakes import Clock
+
+BASE_URL = 'http://data.fixer.io/api/'
+
+
+class RetryPolicyTestCase(unittest.TestCase):
+    def test_retries_transient_failures(self):
+        policy = RetryPolicy(max_attempts=3)
+
+        self.assertTrue(policy.should_retry(1, None))
+        self.assertTrue(policy.should_retry(2, 503))
+        self.assertFalse(policy.should_retry(3, 503))
+        self.assertFalse(policy.should_retry(1, 404))
+        self.assertEqual(policy.stats, {'retries': 2, 'exhausted': 1})
+
+    def test_backs_off_exponentially(self):
+        policy = RetryPolicy(backoff_factor=0.5, max_backoff=3, jitter=False)
+
+        self.assertEqual([policy.backoff(attempt) for attempt in range(1, 6)],
+                         [0.5, 1, 2, 3, 3])
+
+    def test_jitters_backoff(self):
+        policy = RetryPolicy(backoff_factor=1, random=lambda: 0.25)
+
+        self.assertEqual(policy.backoff(3), 1.0)
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10,
+                                      clock=self.clock)
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CLOSED)
+
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, OPEN)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request()
+        self.assertEqual(self.breaker.stats, {'state': OPEN, 'failures': 2,
+                                              'trips': 1, 'rejected': 1})
+
+    def test_lets_a_single_request_through_once_reset(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+
+        self.clock.now = 10
+
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.breaker.before_request()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.before_request()
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CLOSED)
+        self.breaker.before_request()
+
+    def test_reopens_if_trial_request_fails(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 10
+        self.breaker.before_request()
+
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, OPEN)
+        self.assertEqual(self.breaker.trips, 2)
+
+    def test_lets_another_request_through_once_trial_is_released(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.clock.now = 10
+        self.breaker.before_request()
+
+        self.breaker.release()
+
+        self.assertEqual(self.breaker.state, HALF_OPEN)
+        self.breaker.before_request()
+
+
+class FixerioRetryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.access_key = 'test-access-key'
+        self.url = BASE_URL + 'latest?' + urlencode(
+            {'access_key': self.access_key})
+        self.expected_response = {'success': True, 'timestamp': 0,
+                                  'base': 'EUR', 'date': '1970-01-01',
+                                  'rates': {'GBP': 0.78}}
+        self.retry = RetryPolicy(max_attempts=3, backoff_factor=0)
+
+    def add_failure(self, status=503):
+        responses.add(responses.GET, self.url, body='{}', status=status,
+                      content_type='application/json')
+
+    def add_success(self):
+        responses.add(responses.GET, self.url,
+                      body=json.dumps(self.expected_response),
+                      content_type='application/json')
+
+    @responses.activate
+    def test_retries_server_errors(self):
+        self.add_failure()
+        responses.add(responses.GET, self.url,
+                      body=requests.exceptions.ConnectionError('reset'))
+        self.add_success()
+
+        client = Fixerio(self.access_key, retry=self.retry)
+
+        self.assertDictEqual(client.latest(), self.expected_response)
+        self.assertEqual(len(responses.calls), 3)
+        self.assertEqual(self.retry.retries, 2)
+
+    @responses.activate
+    def test_raises_exception_once_exhausted(self):
+        for _ in range(3):
+            self.add_failure()
+
+        client = Fixerio(self.access_key, retry=self.retry)
+
+        with self.assertRaises(FixerioException):
+            client.latest()
+        self.assertEqual(len(responses.calls), 3)
+
+    @responses.activate
+    def test_does_not_retry_client_errors(self):
+        self.add_failure(status=400)
+
+        client = Fixerio(self.access_key, retry=self.retry)
+
+        with self.assertRaises(FixerioException):
+            client.latest()
+        self.assertEqual(len(responses.calls), 1)
+
+    @responses.activate
+    def test_fails_fast_while_circuit_is_open(self):
+        for _ in range(3):
+            self.add_failure()
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+
+        client = Fixerio(self.access_key, retry=self.retry,
+                         circuit_breaker=breaker)
+        with self.assertRaises(FixerioException):
+            client.latest()
+
+        with self.assertRaises(CircuitOpenError):
+            client.latest()
+        self.assertEqual(len(responses.calls), 3)
+        self.assertEqual(breaker.state, OPEN)
+
+    @responses.activate
+    def test_releases_trial_request_failing_for_other_reasons(self):
+        self.add_failure()
+        responses.add(responses.GET, self.url, body='<html></html>',
+                      content_type='text/html')
+        self.add_success()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        client = Fixerio(self.access_key, circuit_breaker=breaker)
+        with self.assertRaises(FixerioException):
+            client.latest()
+
+        with self.assertRaises(FixerioException):
+            client.latest()
+
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertDictEqual(client.latest(), self.expected_response)
+        self.assertEqual(breaker.state, CLOSED)
+
+    @responses.activate
+    def test_serves_stale_cached_rates_while_circuit_is_open(self):
+        self.add_success()
+        self.add_failure()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        client = Fixerio(self.access_key, cache=RateCache(latest_ttl=0),
+                         circuit_breaker=breaker)
+        client.latest()
+        with self.assertRaises(FixerioException):
+            client.latest()
+
+        started_at = time.time()
+        response = client.latest()
+
+        self.assertDictEqual(response, self.expected_response)
+        self.assertLess(time.time() - started_at, 1)
+        self.assertEqual(len(responses.calls), 2)
@@ -0,0 +1,91 @@
+from __future__ import unicode_literals
+
+import json
+import unittest
+
+try:
+    from urllib.parse import urlencode
+except ImportError:  # For Python 2
+    from urllib import urlencode
+
+import requests
+import responses
+
+from fixerio.client import Fixerio
+
+from .fakes import FakeSession
+
+BASE_URL = 'http://data.fixer.io/api/'
+
+
+class FixerioSessionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.access_key = 'test-access-key'
+        self.expected_response = {'base': 'EUR', 'date': '2016-04-29',
+                                  'rates': {'GBP': 0.78025}}
+
+    def test_creates_session_lazily(self):
+        client = Fixerio(self.access_key)
+
+        self.assertIsNone(client._session)
+        self.assertIsInstance(client.session, requests.Session)
+        self.assertIs(client.session, client.session)
+
+    def test_mounts_pooled_adapter(self):
+        client = Fixerio(self.access_key, pool_connections=3, pool_maxsize=7,
+                         pool_block=True)
+
+        for prefix in ('http://', 'https://'):
+            adapter = client.session.get_adapter(prefix + 'data.fixer.io')
+            self.assertEqual(adapter._pool_connections, 3)
+            self.assertEqual(adapter._pool_maxsize, 7)
+            self.assertTrue(adapter._pool_block)
+
+    def test_disables_keep_alive(self):
+        client = Fixerio(self.access_key, keep_alive=False)
+
+        self.assertEqual(client.session.headers['Connection'], 'close')
+
+    def test_uses_injected_session(self):
+        session = FakeSession(self.expected_response)
+
+        client = Fixerio(self.access_key, session=session, timeout=(1, 5))
+        response = client.latest()
+
+        self.assertDictEqual(response, self.expected_response)
+        url, kwargs = session.calls[0]
+        self.assertEqual(url, BASE_URL + 'latest')
+        self.assertEqual(kwargs['params'], {'access_key': self.access_key})
+        self.assertEqual(kwargs['timeout'], (1, 5))
+
+    def test_close_leaves_injected_session_open(self):
+        session = FakeSession(self.expected_response)
+
+        with Fixerio(self.access_key, session=session) as client:
+            client.latest()
+
+        self.assertFalse(session.closed)
+        self.assertIs(client.session, session)
+
+    def test_close_releases_owned_session(self):
+        with Fixerio(self.access_key) as client:
+            session = client.session
+
+        self.assertIsNone(client._session)
+        self.assertIsNot(client.session, session)
+
+    @responses.activate
+    def test_reuses_session_between_calls(self):
+        url = BASE_URL + 'latest?' + urlencode(
+            {'access_key': self.access_key})
+        responses.add(responses.GET, url,
+                      body=json.dumps(self.expected_response),
+                      content_type='application/json')
+
+        client = Fixerio(self.access_key)
+        client.latest()
+        session = client.session
+        client.latest()
+
+        self.assertIs(client.session, session)
+        self.assertEqual(len(responses.calls), 2)
@@ -0,0 +1,128 @@
+from __future__ import unicode_literals
+
+import threading
+import time
+import unittest
+
+from fixerio.client import Fixerio
+from fixerio.exceptions import FixerioException
+from fixerio.singleflight import SingleFlight, flight_key
+
+from .fakes import FakeSession
+
+
+def run_threads(target, count):
+    results = []
+    errors = []
+
+    def run():
+        try:
+            results.append(target())
+        except BaseException as ex:
+            errors.append(ex)
+
+    threads = [threading.Thread(target=run) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def join(threads):
+    for thread in threads:
+        thread.join()
+
+
+class SingleFlightTestCase(unittest.TestCase):
+    def setUp(self):
+        self.flights = SingleFlight()
+        self.release = threading.Event()
+        self.calls = []
+
+    def function(self):
+        self.calls.append(None)
+        self.release.wait()
+        return {'rates': {'GBP': 0.78}}
+
+    def wait_for_leader(self):
+        while not self.calls:
+            time.sleep(0.001)
+        # Give the other threads time to join the call in flight.
+        time.sleep(0.05)
+
+    def test_shares_result_of_call_in_flight(self):
+        threads, results, errors = run_threads(
+            lambda: self.flights.do('key', self.function), 10)
+        self.wait_for_leader()
+        self.release.set()
+        join(threads)
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(results, [{'rates': {'GBP': 0.78}}] * 10)
+        self.assertEqual(len(set(id(result) for result in results)), 10)
+        self.assertEqual(len(self.flights), 0)
+
+    def test_shares_exception_of_call_in_flight(self):
+        def fail():
+            self.function()
+            raise FixerioException('failed')
+
+        threads, results, errors = run_threads(
+            lambda: self.flights.do('key', fail), 5)
+        self.wait_for_leader()
+        self.release.set()
+        join(threads)
+
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(len(errors), 5)
+        self.assertEqual(len(self.flights), 0)
+
+    def test_calls_again_once_done(self):
+        self.release.set()
+
+        self.flights.do('key', self.function)
+        self.flights.do('key', self.function)
+
+        self.assertEqual(len(self.calls), 2)
+
+    def test_does_not_coalesce_different_keys(self):
+        self.release.set()
+
+        self.flights.do(flight_key('url', {'symbols': 'USD'}), self.function)
+        self.flights.do(flight_key('url', {'symbols': 'GBP'}), self.function)
+
+        self.assertEqual(len(self.calls), 2)
+
+
+class FixerioSingleFlightTestCase(unittest.TestCase):
+    def setUp(self):
+        self.release = threading.Event()
+
+        def respond(url, params):
+            self.release.wait()
+            return {'base': 'EUR', 'rates': {'GBP': 0.78}}
+
+        self.session = FakeSession(respond)
+
+    def test_coalesces_identical_requests(self):
+        client = Fixerio('test-access-key', session=self.session)
+
+        threads, results, errors = run_threads(
+            lambda: client.latest(symbols=['GBP']), 10)
+        while not self.session.calls:
+            time.sleep(0.001)
+        time.sleep(0.05)
+        self.release.set()
+        join(threads)
+
+        self.assertEqual(len(self.session.calls), 1)
+        self.assertEqual(len(results), 10)
+
+    def test_does_not_coalesce_if_disabled(self):
+        client = Fixerio('test-access-key', session=self.session,
+                         coalesce=False)
+        self.release.set()
+
+        threads, results, errors = run_threads(client.latest, 5)
+        join(threads)
+
+        self.assertEqual(len(self.session.calls), 5)
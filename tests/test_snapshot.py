@@ -0,0 +1,200 @@
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import requests
+
+from fixerio.cache import HISTORICAL, LATEST, RateCache
+from fixerio.client import Fixerio
+from fixerio.exceptions import FixerioException
+from fixerio.snapshot import NONE, Snapshot, save_snapshot, write_snapshot
+from fixerio.store import HistoricalStore
+
+from .fakes import FakeSession, historical
+
+NOW = 1527847508
+
+
+def latest(timestamp=NOW, rates=None):
+    return {'success': True, 'date': '2018-06-01', 'timestamp': timestamp,
+            'base': 'EUR', 'rates': rates or {'GBP': 0.87, 'USD': 1.17}}
+
+
+class SnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'rates.fxs')
+        self.now = NOW
+
+    def write(self, responses, **kwargs):
+        return write_snapshot(self.path, responses, clock=lambda: self.now,
+                              **kwargs)
+
+    def load(self, **kwargs):
+        snapshot = Snapshot(self.path, clock=lambda: self.now, **kwargs)
+        self.addCleanup(snapshot.close)
+        return snapshot
+
+    def test_reads_written_rates(self):
+        response = historical('2000-01-03', {'GBP': 0.6246, 'USD': 1.009})
+        for compression in ('zlib', NONE):
+            self.write([(HISTORICAL, response, True)],
+                       compression=compression)
+            snapshot = self.load()
+
+            self.assertEqual(len(snapshot), 1)
+            self.assertEqual(snapshot.compression, compression)
+            self.assertEqual(snapshot.created_at, NOW)
+            self.assertDictEqual(snapshot.get(HISTORICAL, '2000-01-03'),
+                                 response)
+            self.assertIsNone(snapshot.get(HISTORICAL, '2000-01-04'))
+            self.assertIsNone(snapshot.get(HISTORICAL, '2000-01-03',
+                                           base='USD'))
+
+    def test_finds_every_entry(self):
+        responses = [(HISTORICAL, historical('2000-01-{0:02d}'.format(day),
+                                             {'USD': day}, base=base), True)
+                     for day in range(1, 32) for base in ('EUR', 'USD')]
+        responses.append((LATEST, latest(), True))
+        self.write(responses)
+        snapshot = self.load()
+
+        for _, response, _ in responses:
+            endpoint = LATEST if 'historical' not in response else HISTORICAL
+            found = snapshot.get(endpoint, response['date'],
+                                 base=response['base'])
+            self.assertEqual(found['rates'], response['rates'])
+
+    def test_partial_entries_only_answer_their_symbols(self):
+        self.write([(HISTORICAL, historical('2000-01-03', {'USD': 1.009}),
+                     False)])
+        snapshot = self.load()
+
+        self.assertIsNone(snapshot.get(HISTORICAL, '2000-01-03'))
+        self.assertIsNone(snapshot.get(HISTORICAL, '2000-01-03',
+                                       symbols=['USD', 'GBP']))
+        self.assertEqual(snapshot.get(HISTORICAL, '2000-01-03',
+                                      symbols=['USD'])['rates'],
+                         {'USD': 1.009})
+
+    def test_merges_rates_and_keeps_newest_latest(self):
+        self.write([
+            (HISTORICAL, historical('2000-01-03', {'USD': 1.009}), False),
+            (HISTORICAL, historical('2000-01-03', {'GBP': 0.6246}), True),
+            (LATEST, latest(NOW - 60, {'USD': 1.0}), True),
+            (LATEST, latest(NOW, {'USD': 2.0}), True),
+            (LATEST, latest(NOW - 120, {'USD': 3.0}), True),
+        ])
+        snapshot = self.load()
+
+        self.assertEqual(snapshot.get(HISTORICAL, '2000-01-03')['rates'],
+                         {'USD': 1.009, 'GBP': 0.6246})
+        self.assertEqual(snapshot.get(LATEST)['rates'], {'USD': 2.0})
+
+    def test_serves_latest_rates_by_age(self):
+        self.write([(LATEST, latest(), True)])
+        snapshot = self.load(latest_ttl=60, stale_ttl=600)
+
+        self.now = NOW + 30
+        self.assertIsNotNone(snapshot.get(LATEST))
+        self.now = NOW + 300
+        self.assertIsNone(snapshot.get(LATEST))
+        self.assertIsNotNone(snapshot.get(LATEST, allow_stale=True))
+        self.now = NOW + 3000
+        self.assertIsNone(snapshot.get(LATEST, allow_stale=True))
+
+    def test_rejects_other_files(self):
+        with open(self.path, 'wb') as f:
+            f.write(b'FXRS' + b'\0' * 64)
+
+        with self.assertRaises(ValueError):
+            Snapshot(self.path)
+
+    def test_lists_entries(self):
+        responses = [(HISTORICAL, historical('2000-01-03', {'USD': 1.009}),
+                      False),
+                     (LATEST, latest(), True)]
+        self.write(responses)
+
+        self.assertEqual(sorted(self.load().responses()), sorted(responses))
+
+
+class FixerioSnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'rates.fxs')
+
+        self.response = historical('2000-01-03', {'GBP': 0.6246,
+                                                  'USD': 1.009})
+        write_snapshot(self.path, [(HISTORICAL, self.response, True),
+                                   (LATEST, latest(), True)])
+
+    def client(self, session, **kwargs):
+        snapshot = Snapshot(self.path, **kwargs)
+        self.addCleanup(snapshot.close)
+        return Fixerio('test-access-key', session=session, snapshot=snapshot)
+
+    def test_serves_historical_rates_without_requests(self):
+        session = FakeSession(None)
+        client = self.client(session)
+
+        self.assertDictEqual(client.historical_rates('2000-01-03'),
+                             self.response)
+        self.assertEqual(client.historical_rates(
+            '2000-01-03', symbols=['USD'])['rates'], {'USD': 1.009})
+        self.assertEqual(session.calls, [])
+
+    def test_requests_expired_latest_rates(self):
+        fresh = latest(NOW + 1)
+        session = FakeSession(fresh)
+        client = self.client(session)
+
+        self.assertDictEqual(client.latest(), fresh)
+        self.assertEqual(len(session.calls), 1)
+
+    def test_falls_back_on_snapshot_when_unreachable(self):
+        def respond(url, params):
+            raise requests.exceptions.ConnectionError('unreachable')
+
+        client = self.client(FakeSession(respond))
+
+        self.assertEqual(client.latest()['timestamp'], NOW)
+        with self.assertRaises(FixerioException):
+            client.historical_rates('2000-01-04')
+
+    def test_offline_snapshot_never_requests(self):
+        session = FakeSession(None)
+        client = self.client(session, offline=True)
+
+        self.assertEqual(client.latest()['timestamp'], NOW)
+        with self.assertRaises(FixerioException):
+            client.historical_rates('2000-01-04')
+        self.assertEqual(session.calls, [])
+
+    def test_saves_cache_and_store(self):
+        def respond(url, params):
+            if url.endswith('latest'):
+                return latest(NOW + 1, {'USD': 2.0})
+            return historical(url[-10:], {'USD': 1.5})
+
+        store = HistoricalStore(os.path.join(self.directory, 'store'))
+        self.addCleanup(store.close)
+        client = Fixerio('test-access-key', session=FakeSession(respond),
+                         cache=RateCache(), store=store)
+        client.latest()
+        client.historical_rates('2000-01-04')
+
+        path = os.path.join(self.directory, 'saved.fxs')
+        self.assertEqual(save_snapshot(client, path), 2)
+
+        offline = Fixerio('test-access-key', session=FakeSession(None),
+                          snapshot=Snapshot(path, offline=True))
+        self.assertEqual(offline.latest()['rates'], {'USD': 2.0})
+        self.assertEqual(offline.historical_rates('2000-01-04')['rates'],
+                         {'USD': 1.5})
+        offline.snapshot.close()
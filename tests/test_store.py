@@ -0,0 +1,262 @@
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+
+from fixerio.client import Fixerio
+from fixerio.exceptions import FixerioException
+from fixerio.store import HistoricalStore
+
+from .fakes import FakeSession
+
+
+class HistoricalStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store = HistoricalStore(self.path)
+        self.response = {'success': True, 'historical': True,
+                         'date': '2000-01-03', 'timestamp': 946943999,
+                         'base': 'EUR',
+                         'rates': {'GBP': 0.6246, 'USD': 1.009}}
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.path)
+
+    def test_returns_none_if_not_stored(self):
+        self.assertIsNone(self.store.get('2000-01-03'))
+
+    def test_returns_stored_rates(self):
+        self.store.put(self.response)
+
+        self.assertDictEqual(self.store.get(date(2000, 1, 3)), self.response)
+        self.assertIsNone(self.store.get('2000-01-04'))
+        self.assertIsNone(self.store.get('2000-01-03', base='USD'))
+
+    def test_keeps_a_file_per_base(self):
+        self.store.put(self.response)
+        self.response['base'] = 'USD'
+        self.store.put(self.response)
+
+        self.assertEqual(sorted(os.listdir(self.path)),
+                         ['EUR.fxr', 'USD.fxr'])
+
+    def test_returns_stored_symbols(self):
+        self.store.put(self.response)
+
+        response = self.store.get('2000-01-03', symbols=['USD'])
+
+        self.assertDictEqual(response['rates'], {'USD': 1.009})
+
+    def test_partial_rows_only_answer_stored_symbols(self):
+        self.store.put(self.response, complete=False)
+
+        self.assertIsNone(self.store.get('2000-01-03'))
+        self.assertIsNone(self.store.get('2000-01-03', symbols=['JPY']))
+        self.assertIsNotNone(self.store.get('2000-01-03', symbols=['GBP']))
+
+    def test_merges_partial_rows(self):
+        self.store.put(self.response, complete=False)
+        self.response['rates'] = {'JPY': 102.6}
+        self.store.put(self.response, complete=False)
+
+        response = self.store.get('2000-01-03', symbols=['GBP', 'JPY'])
+
+        self.assertDictEqual(response['rates'], {'GBP': 0.6246, 'JPY': 102.6})
+
+    def test_lists_stored_responses(self):
+        self.store.put(self.response)
+        self.response['base'] = 'USD'
+        self.response['rates'] = {'GBP': 0.619}
+        self.store.put(self.response, complete=False)
+
+        self.assertEqual(
+            [(response['base'], response['rates'], complete)
+             for response, complete in self.store.responses()],
+            [('EUR', {'GBP': 0.6246, 'USD': 1.009}, True),
+             ('USD', {'GBP': 0.619}, False)])
+
+    def test_ignores_dates_before_epoch(self):
+        self.response['date'] = '1998-12-31'
+        self.store.put(self.response)
+
+        self.assertIsNone(self.store.get('1998-12-31'))
+
+    def test_reads_without_creating_or_writing_files(self):
+        self.store.put(self.response)
+        reader = HistoricalStore(self.path)
+        self.addCleanup(reader.close)
+
+        self.assertIsNotNone(reader.get('2000-01-03'))
+        self.assertIsNone(reader.get('2000-01-03', base='USD'))
+        self.assertEqual(reader.missing([date(2000, 1, 3)], base='USD'),
+                         [(date(2000, 1, 3), None)])
+
+        self.assertEqual(os.listdir(self.path), ['EUR.fxr'])
+        self.assertEqual(reader._matrix('EUR')._file.mode, 'rb')
+
+    def test_shares_files_between_stores(self):
+        reader = HistoricalStore(self.path)
+        self.addCleanup(reader.close)
+        self.store.put(self.response)
+        self.assertIsNotNone(reader.get('2000-01-03'))
+
+        self.response['date'] = '2018-06-01'
+        self.response['rates'] = {'CHF': 1.1523}
+        self.store.put(self.response)
+
+        response = reader.get('2018-06-01')
+        self.assertDictEqual(response['rates'], {'CHF': 1.1523})
+
+    def test_finds_missing_days_and_symbols(self):
+        self.store.put(self.response)
+        self.response['date'] = '2000-01-04'
+        self.store.put(self.response, complete=False)
+        days = [date(2000, 1, 3), date(2000, 1, 4), date(2000, 1, 5)]
+
+        self.assertEqual(self.store.missing(days),
+                         [(date(2000, 1, 4), None), (date(2000, 1, 5), None)])
+        self.assertEqual(self.store.missing(days, symbols=['JPY', 'USD']),
+                         [(date(2000, 1, 4), ['JPY']),
+                          (date(2000, 1, 5), ['JPY', 'USD'])])
+        self.assertEqual(self.store.missing(days, base='USD'),
+                         [(day, None) for day in days])
+
+    def test_records_symbols_without_rates(self):
+        self.store.put(self.response, complete=False,
+                       symbols=['BTC', 'GBP', 'USD'])
+        days = [date(2000, 1, 3)]
+
+        self.assertEqual(self.store.missing(days, symbols=['BTC', 'USD']),
+                         [])
+        self.assertEqual(self.store.missing(days, symbols=['BTC', 'JPY']),
+                         [(date(2000, 1, 3), ['JPY'])])
+        self.assertEqual(self.store.get('2000-01-03',
+                                        symbols=['BTC', 'USD'])['rates'],
+                         {'USD': 1.009})
+        self.assertIsNone(self.store.get('2000-01-03'))
+
+    def test_rates_replace_symbols_without_rates(self):
+        self.store.put(self.response, complete=False, symbols=['BTC'])
+        self.store.put(dict(self.response, rates={'BTC': 0.0001}),
+                       complete=False)
+
+        self.assertEqual(self.store.get('2000-01-03',
+                                        symbols=['BTC'])['rates'],
+                         {'BTC': 0.0001})
+
+    def test_puts_responses_at_once(self):
+        other = dict(self.response, date='2000-01-04', base='USD',
+                     rates={'JPY': 102.6})
+
+        self.store.put_all([(self.response, True), (other, False)])
+
+        self.assertDictEqual(self.store.get('2000-01-03'), self.response)
+        self.assertIsNone(self.store.get('2000-01-04', base='USD'))
+        self.assertEqual(self.store.get('2000-01-04', base='USD',
+                                        symbols=['JPY'])['rates'],
+                         {'JPY': 102.6})
+
+
+class FixerioStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store = HistoricalStore(self.path)
+        self.response = {'success': True, 'historical': True,
+                         'date': '2000-01-03', 'base': 'EUR',
+                         'rates': {'GBP': 0.6246, 'USD': 1.009}}
+        self.session = FakeSession(self.response)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.path)
+
+    def test_writes_through_to_store(self):
+        client = Fixerio('test-access-key', session=self.session,
+                         store=self.store)
+
+        client.historical_rates('2000-01-03')
+
+        self.assertDictEqual(self.store.get('2000-01-03'), self.response)
+
+    def test_reads_from_store(self):
+        self.store.put(self.response)
+        client = Fixerio('test-access-key', session=self.session,
+                         store=self.store)
+
+        response = client.historical_rates(date(2000, 1, 3),
+                                           symbols=['GBP'])
+
+        self.assertDictEqual(response['rates'], {'GBP': 0.6246})
+        self.assertEqual(self.session.calls, [])
+
+    def test_does_not_store_latest_rates(self):
+        client = Fixerio('test-access-key', session=self.session,
+                         store=self.store)
+
+        client.latest()
+
+        self.assertEqual(os.listdir(self.path), [])
+
+    def test_syncs_missing_days_and_symbols(self):
+        def respond(url, params):
+            rates = {'GBP': 0.6246, 'JPY': 102.6, 'USD': 1.009}
+            if 'symbols' in params:
+                rates = dict((code, rates[code])
+                             for code in params['symbols'].split(','))
+            return {'success': True, 'historical': True, 'date': url[-10:],
+                    'base': 'EUR', 'rates': rates}
+
+        self.store.put(self.response, complete=False)
+        self.session.data = respond
+        client = Fixerio('test-access-key', session=self.session)
+
+        synced = client.sync('2000-01-03', '2000-01-05',
+                             symbols=['JPY', 'USD'], store=self.store)
+
+        self.assertEqual(synced, 3)
+        self.assertEqual(
+            sorted((url[-10:], kwargs['params']['symbols'])
+                   for url, kwargs in self.session.calls),
+            [('2000-01-03', 'JPY'), ('2000-01-04', 'JPY,USD'),
+             ('2000-01-05', 'JPY,USD')])
+        self.assertEqual(self.store.get('2000-01-03', symbols=['JPY', 'USD'])
+                         ['rates'], {'JPY': 102.6, 'USD': 1.009})
+        self.assertEqual(client.sync('2000-01-03', '2000-01-05',
+                                     symbols=['JPY', 'USD'],
+                                     store=self.store), 0)
+
+    def test_syncs_symbols_without_rates_once(self):
+        self.session.data = lambda url, params: dict(
+            self.response, date=url[-10:], rates={'USD': 1.009})
+        client = Fixerio('test-access-key', session=self.session)
+
+        client.sync('2000-01-03', '2000-01-04', symbols=['BTC', 'USD'],
+                    store=self.store)
+
+        self.assertEqual(client.sync('2000-01-03', '2000-01-04',
+                                     symbols=['BTC', 'USD'],
+                                     store=self.store), 0)
+        self.assertEqual(len(self.session.calls), 2)
+
+    def test_writes_nothing_if_any_day_fails(self):
+        def respond(url, params):
+            if url.endswith('2000-01-04'):
+                return {'success': False, 'error': {'code': 106}}
+            return dict(self.response, date=url[-10:])
+
+        self.session.data = respond
+        client = Fixerio('test-access-key', session=self.session,
+                         store=self.store)
+
+        with self.assertRaises(FixerioException):
+            client.sync('2000-01-03', '2000-01-05')
+        self.assertEqual(self.store.missing([date(2000, 1, 3)]),
+                         [(date(2000, 1, 3), None)])
+
+    def test_raises_if_there_is_no_store(self):
+        with self.assertRaises(ValueError):
+            Fixerio('test-access-key').sync('2000-01-03', '2000-01-05')
@@ -0,0 +1,75 @@
+from __future__ import unicode_literals
+
+import pickle
+import unittest
+
+from fixerio.cache import RateCache, SharedCache
+from fixerio.client import Fixerio
+from fixerio.symbols import SymbolSet, _known, add_currencies
+
+
+class SymbolSetTestCase(unittest.TestCase):
+    def test_is_sorted_upper_cased_and_deduplicated(self):
+        symbols = SymbolSet(['usd', 'GBP', ' jpy', 'USD'])
+
+        self.assertEqual(symbols, ('GBP', 'JPY', 'USD'))
+        self.assertEqual(symbols.query, 'GBP,JPY,USD')
+        self.assertEqual(symbols.codes, frozenset(['GBP', 'JPY', 'USD']))
+
+    def test_interns_equal_sets(self):
+        symbols = SymbolSet(['USD', 'GBP'])
+
+        self.assertIs(SymbolSet(('GBP', 'USD')), symbols)
+        self.assertIs(SymbolSet('usd,gbp'), symbols)
+        self.assertIs(pickle.loads(pickle.dumps(symbols)), symbols)
+
+    def test_raises_if_codes_are_unknown_or_missing(self):
+        with self.assertRaises(ValueError):
+            SymbolSet(['USD', 'XYZ'])
+        with self.assertRaises(ValueError):
+            SymbolSet([])
+
+    def test_accepts_current_iso_codes(self):
+        self.assertEqual(SymbolSet(['VES', 'MRU', 'STN', 'SLE']).query,
+                         'MRU,SLE,STN,VES')
+
+    def test_accepts_added_codes(self):
+        self.addCleanup(_known.discard, 'XTS')
+
+        add_currencies(['xts'])
+
+        self.assertEqual(SymbolSet(['USD', 'XTS']).query, 'USD,XTS')
+        with self.assertRaises(ValueError):
+            add_currencies(['US'])
+
+    def test_of(self):
+        symbols = SymbolSet(['USD'])
+
+        self.assertIsNone(SymbolSet.of(None))
+        self.assertIsNone(SymbolSet.of([]))
+        self.assertIs(SymbolSet.of(symbols), symbols)
+        self.assertIs(SymbolSet.of(['usd']), symbols)
+
+    def test_makes_the_same_cache_keys_as_plain_symbols(self):
+        symbols = SymbolSet(['USD', 'GBP'])
+        shared = SharedCache(backend=None)
+
+        self.assertEqual(RateCache.make_key('latest', symbols=symbols),
+                         RateCache.make_key('latest', symbols=['USD', 'GBP']))
+        self.assertEqual(shared.make_key('latest', symbols=symbols),
+                         shared.make_key('latest', symbols=['USD', 'GBP']))
+
+
+class PayloadTestCase(unittest.TestCase):
+    def test_reuses_payloads(self):
+        client = Fixerio('test-access-key', base='USD')
+        symbols = SymbolSet(['GBP', 'EUR'])
+
+        payload = client._create_payload(symbols)
+
+        self.assertEqual(payload, {'access_key': 'test-access-key',
+                                   'base': 'USD', 'symbols': 'EUR,GBP'})
+        self.assertIs(client._create_payload(SymbolSet('eur,gbp')), payload)
+
+        client.base = 'GBP'
+        self.assertEqual(client._create_payload(symbols)['base'], 'GBP')